@@ -0,0 +1,215 @@
+import gzip
+import hashlib
+import mimetypes
+import re
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_SIZE = 1024
+
+# larger static files are served from disk (starlette handles ranges)
+MEMORY_LIMIT = 2 * 1024 * 1024
+HASH_CHUNK = 1 << 20
+
+# UIs change with the modules: always revalidate, the 304 is nearly free
+NO_CACHE = "no-cache"
+# content-hashed static URLs never change meaning
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml", "application/xml", "application/wasm")
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def compressible(media_type: str) -> bool:
+    return media_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def media_type_for(path: Path) -> str:
+    media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    if media_type.startswith("text/") or media_type == "application/javascript":
+        media_type += "; charset=utf-8"
+    return media_type
+
+
+class Asset:
+    """A response body kept in memory with its precompressed variants."""
+
+    def __init__(self, body: bytes, media_type: str):
+        self.media_type = media_type
+        self.digest = hashlib.sha256(body).hexdigest()[:32]
+        self.etag = f'"{self.digest}"'
+
+        self.variants: Dict[str, bytes] = {"identity": body}
+        if len(body) >= COMPRESS_MIN_SIZE and compressible(media_type):
+            self.variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.variants["br"] = brotli.compress(body, quality=11)
+
+    def encoding_for(self, accept_encoding: str) -> str:
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in ("br", "gzip"):
+            if encoding in accepted and encoding in self.variants:
+                return encoding
+        return "identity"
+
+
+def accepted_encodings(accept_encoding: str) -> Set[str]:
+    """Codings of an Accept-Encoding header, less those refused with q=0 (or 0.0, 0.000)."""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, *params = (p.strip() for p in part.split(";"))
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name and q > 0:
+            accepted.add(name)
+    return accepted
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # weak comparison, proxies may add W/ after compressing
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+
+def asset_response(request: Request, asset: Asset, cache_control: str = NO_CACHE) -> Response:
+    byte_range = request.headers.get("range")
+
+    # ranges address the plain bytes (resumed or partial downloads)
+    encoding = "identity" if byte_range else asset.encoding_for(request.headers.get("accept-encoding", ""))
+
+    # strong ETags differ per content encoding
+    etag = asset.etag if encoding == "identity" else f'{asset.etag[:-1]}-{encoding}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding",
+    }
+
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+
+    body = asset.variants[encoding]
+    headers["Accept-Ranges"] = "bytes"
+
+    if byte_range:
+        bounds = parse_range(byte_range, len(body))
+        if bounds is None:
+            headers["Content-Range"] = f"bytes */{len(body)}"
+            return Response(status_code=416, headers=headers)
+        start, end = bounds
+        headers["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+        return Response(content=body[start:end + 1], status_code=206, media_type=asset.media_type, headers=headers)
+
+    return Response(content=body, media_type=asset.media_type, headers=headers)
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Single `bytes=` range as inclusive (start, end); None if unsatisfiable."""
+    m = RANGE_RE.match(header.strip())
+    if not m or m.groups() == ("", ""):
+        return None
+
+    first, last = m.groups()
+    if first == "":
+        # suffix range: the last N bytes
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+
+    if start >= size or start > end:
+        return None
+    return start, end
+
+
+def mtimes(paths: List[Path]) -> Tuple:
+    stamps = []
+    for path in paths:
+        try:
+            stat = path.stat()
+            stamps.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            stamps.append(None)
+    return tuple(stamps)
+
+
+class AssetCache:
+    """Assets built from files, rebuilt when one of the files changes."""
+
+    def __init__(self):
+        self._assets: Dict[str, Tuple[Tuple, Asset]] = {}
+        self._digests: Dict[str, Tuple[Tuple, str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, paths: List[Path], build: Callable[[], bytes], media_type: str) -> Asset:
+        stamp = mtimes(paths)
+
+        cached: Optional[Tuple[Tuple, Asset]] = self._assets.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        asset = Asset(build(), media_type)
+        with self._lock:
+            self._assets[key] = (stamp, asset)
+        return asset
+
+    def file(self, path: Path, media_type: str) -> Asset:
+        return self.get(str(path), [path], path.read_bytes, media_type)
+
+    def digest(self, path: Path) -> str:
+        """Content hash of a file of any size, recomputed when it changes."""
+        stamp = mtimes([path])
+        cached = self._digests.get(str(path))
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        h = hashlib.sha256()
+        with path.open("rb") as f:
+            while chunk := f.read(HASH_CHUNK):
+                h.update(chunk)
+        digest = h.hexdigest()[:32]
+
+        with self._lock:
+            self._digests[str(path)] = (stamp, digest)
+        return digest
+
+
+def static_response(request: Request, path: Path, version: str | None) -> Response:
+    """
+    A module static file. Requested with `?v=<content hash>` it may be
+    cached forever; any other URL is revalidated.
+    """
+    digest = assets.digest(path)
+    cache_control = IMMUTABLE if version == digest else NO_CACHE
+
+    if path.stat().st_size <= MEMORY_LIMIT:
+        return asset_response(request, assets.file(path, media_type_for(path)), cache_control)
+
+    etag = f'"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type_for(path), headers=headers)
+
+
+assets = AssetCache()
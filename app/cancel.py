@@ -0,0 +1,58 @@
+"""
+Cancellation of the request served on the current thread of the 32-bit
+worker. Code blocked in a driver call registers a callback that interrupts
+it (`connection.cancel()` for an Oracle round-trip); loops check
+`cancelled` between steps.
+"""
+import threading
+from contextlib import contextmanager
+from typing import Callable, List
+
+_local = threading.local()
+
+
+class CancelScope:
+    def __init__(self):
+        self.cancelled = False
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            callbacks = list(self._callbacks)
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    @contextmanager
+    def on_cancel(self, callback: Callable[[], None]):
+        with self._lock:
+            self._callbacks.append(callback)
+            cancelled = self.cancelled
+        if cancelled:
+            callback()
+
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._callbacks.remove(callback)
+
+
+def current() -> CancelScope:
+    # outside the worker nothing can cancel: a scope that never fires
+    scope = getattr(_local, "scope", None)
+    return scope if scope is not None else CancelScope()
+
+
+@contextmanager
+def active(scope: CancelScope):
+    _local.scope = scope
+    try:
+        yield scope
+    finally:
+        _local.scope = None
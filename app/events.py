@@ -0,0 +1,125 @@
+import asyncio
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Tuple
+
+BUS_BUFFER = 5000
+BATCH_WINDOW = 0.1
+
+
+class EventLog:
+    """
+    Numbered events in a bounded ring buffer. Publishers may be any thread;
+    readers are asyncio tasks woken when something new is published.
+    """
+
+    def __init__(self, capacity: int):
+        self.events: deque = deque(maxlen=capacity)
+        self.last_id = 0
+
+        self._lock = threading.Lock()
+        self._waiters: set = set()
+
+    def _wake(self):
+        # readers come and go on the event loop while publishers run on
+        # other threads: notify from a snapshot taken under the lock
+        with self._lock:
+            waiters = list(self._waiters)
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    def publish(self, event: Any) -> int:
+        with self._lock:
+            self.last_id += 1
+            event_id = self.last_id
+            self.events.append((event_id, event))
+        self._wake()
+        # not self.last_id: another publish may have moved it already
+        return event_id
+
+    def since(self, last_id: int) -> List[Tuple[int, Any]]:
+        with self._lock:
+            return [(i, e) for i, e in self.events if i > last_id]
+
+    @contextmanager
+    def waiter(self):
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters.add(waiter)
+        try:
+            yield waiter[1]
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+
+def topic_matches(topics: Iterable[str], patterns: List[str]) -> bool:
+    """`job:*` matches every job topic, `*` matches everything."""
+    for topic in topics:
+        for pattern in patterns:
+            if pattern == "*" or topic == pattern:
+                return True
+            if pattern.endswith("*") and topic.startswith(pattern[:-1]):
+                return True
+    return False
+
+
+def coalesce(batch: List[Tuple[int, Dict[str, Any]]]) -> List[Tuple[int, Dict[str, Any]]]:
+    """Within one batch only the latest progress event of each job matters."""
+    latest = {}
+    for event_id, message in batch:
+        if message["event"].get("type") == "progress":
+            latest[message["job_id"]] = event_id
+
+    return [
+        (event_id, message) for event_id, message in batch
+        if message["event"].get("type") != "progress" or latest[message["job_id"]] == event_id
+    ]
+
+
+class EventBus(EventLog):
+    """
+    Server-wide channel carrying the events of every job, so a page needs
+    a single connection to watch all background work. Each message lists
+    its topics (`job:<id>`, `module:<id>`) for filtering.
+    """
+
+    def __init__(self, capacity: int = BUS_BUFFER):
+        super().__init__(capacity)
+
+    def publish_job_event(self, job_id: str, module_id: str, status: str, event: Dict[str, Any]) -> int:
+        return self.publish({
+            "topics": [f"job:{job_id}", f"module:{module_id}"],
+            "job_id": job_id,
+            "module_id": module_id,
+            "status": status,
+            "event": event,
+        })
+
+    async def subscribe(self, patterns: List[str], last_id: int = 0, window: float = BATCH_WINDOW):
+        """
+        Yields `(last id, messages)` batches matching `patterns`, starting
+        after `last_id`. Events published within `window` of each other are
+        delivered together.
+        """
+        with self.waiter() as woken:
+            while True:
+                woken.clear()
+                pending = self.since(last_id)
+
+                if not pending:
+                    await woken.wait()
+                    await asyncio.sleep(window)
+                    continue
+
+                last_id = pending[-1][0]
+                batch = coalesce([
+                    (event_id, message) for event_id, message in pending
+                    if topic_matches(message["topics"], patterns)
+                ])
+                if batch:
+                    yield last_id, [{"id": event_id, **message} for event_id, message in batch]
+
+
+bus = EventBus()
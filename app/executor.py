@@ -1,12 +1,82 @@
 import importlib
-import subprocess
-import json
+import logging
 import sys
+import threading
+import time
 from pathlib import Path
-from app.registry import registry
+from app.registry import MODULES_PATH, registry
+from app.supervisor import run_supervised
+from app.worker32 import worker32
 
-PYTHON32 = Path("python32/python.exe")
-RUNNER32 = Path("python32/runner.py")
+# module code is imported on first use; flag the ones that make that slow
+IMPORT_BUDGET = 0.5
+
+logger = logging.getLogger(__name__)
+
+import_times = {}
+
+
+def module_name(module_id: str) -> str:
+    """Import name of a module's entrypoint, from its folder (not its id)."""
+    module = registry.modules[module_id]
+    entrypoint = Path(module["meta"].get("entrypoint", "module.py")).stem
+    return f"{MODULES_PATH.name}.{module['path'].name}.{entrypoint}"
+
+
+def load_module(module_id: str):
+    name = module_name(module_id)
+    if name in sys.modules:
+        return sys.modules[name]
+
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    elapsed = time.perf_counter() - started
+
+    import_times[module_id] = round(elapsed * 1000, 1)
+    if elapsed > IMPORT_BUDGET:
+        logger.warning(
+            "Importing module %s took %.0f ms (budget %.0f ms)",
+            module_id, elapsed * 1000, IMPORT_BUDGET * 1000
+        )
+    return module
+
+
+def module_health():
+    """`health()` of the loaded 64-bit modules defining one; never imports."""
+    report = {}
+    for module_id, module in list(registry.modules.items()):
+        if module["meta"].get("interpreter", "64") == "32":
+            continue
+        check = getattr(sys.modules.get(module_name(module_id)), "health", None)
+        if check is None:
+            continue
+        try:
+            report[module_id] = check()
+        except Exception as e:
+            report[module_id] = {"error": str(e)}
+    return report
+
+
+# modules flagged "warm" in config.json, imported in the background at startup
+warm_state = {}
+
+
+def warm_modules():
+    for module_id, module in list(registry.modules.items()):
+        meta = module["meta"]
+        if meta.get("warm") and meta.get("interpreter", "64") != "32":
+            warm_state[module_id] = "pending"
+
+    threading.Thread(target=_warm, args=(list(warm_state),), daemon=True).start()
+
+
+def _warm(module_ids):
+    for module_id in module_ids:
+        try:
+            load_module(module_id)
+            warm_state[module_id] = "ready"
+        except Exception as e:
+            warm_state[module_id] = f"failed: {e}"
 
 
 def execute(module_id: str, payload: dict, mode="sync", format=None):
@@ -22,7 +92,12 @@ def execute(module_id: str, payload: dict, mode="sync", format=None):
 
 def execute_64(module_id, payload, mode, format):
 
-    module = importlib.import_module(f"modules.{module_id}.module")
+    limits = registry.modules[module_id]["meta"].get("limits")
+    if limits:
+        # isolated so a runaway job cannot take the server down
+        return run_supervised(module_id, module_name(module_id), payload, mode, format, limits)
+
+    module = load_module(module_id)
 
     if mode == "stream":
         return module.stream(payload)
@@ -35,29 +110,14 @@ def execute_64(module_id, payload, mode, format):
 
 def execute_32(module_id, payload, mode, format):
 
-    req = {
-        "module_id": module_id,
+    request = {
+        "module_name": module_name(module_id),
         "payload": payload,
         "mode": mode,
         "format": format
     }
 
-    proc = subprocess.Popen(
-        [str(PYTHON32), str(RUNNER32)],
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
-    )
-
-    stdout, stderr = proc.communicate(json.dumps(req))
-
-    if proc.returncode != 0:
-        raise RuntimeError(stderr)
-
-    resp = json.loads(stdout)
-
-    if not resp["success"]:
-        raise RuntimeError(resp["error"])
+    if mode == "stream":
+        return worker32.stream(request)
 
-    return resp["result"]
+    return worker32.call(request)
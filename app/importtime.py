@@ -0,0 +1,99 @@
+"""
+Startup import report: what `import app.server` costs, from
+`python -X importtime`.
+
+    python -m app.importtime            # top 20 imports, budget check (median of 5 runs)
+    python -m app.importtime --module check_real_addresses
+"""
+import argparse
+import re
+import subprocess
+import sys
+from typing import List, Tuple
+
+# time to import the web server before the first page can be served,
+# median of RUNS. Measured on one CPU (Python 3.11, fastapi 0.143): single
+# imports 367-551 ms, medians of 5 between 451 and 510 ms, of which fastapi
+# 356-407 ms and app.* about 20 ms. The budget leaves ~20% over the medians.
+STARTUP_BUDGET_MS = 600
+
+# single runs vary by +-80 ms: the budget is checked on a median
+RUNS = 5
+
+# must never be imported by the server itself, only by the modules using them
+HEAVY_PACKAGES = ["pandas", "numpy", "pyarrow", "requests", "openpyxl", "oracledb"]
+
+LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure(code: str) -> List[Tuple[int, int, int, str]]:
+    """(self us, cumulative us, depth, name) per import, in -X importtime order."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr)
+
+    entries = []
+    for line in proc.stderr.splitlines():
+        m = LINE_RE.match(line)
+        if m:
+            entries.append((int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2, m.group(4)))
+    return entries
+
+
+def total(entries: List[Tuple[int, int, int, str]]) -> int:
+    return sum(cumulative for _, cumulative, depth, _ in entries if depth == 0)
+
+
+def report(code: str, top: int, runs: int = 1) -> List[Tuple[int, int, int, str]]:
+    """Prints the run with the median total; returns its entries."""
+    measured = sorted((measure(code) for _ in range(max(runs, 1))), key=total)
+    entries = measured[len(measured) // 2]
+    total_us = total(entries)
+
+    spread = f" (median of {runs}: {total(measured[0]) / 1000:.0f}-{total(measured[-1]) / 1000:.0f} ms)" if runs > 1 else ""
+    print(f"{code}: {total_us / 1000:.1f} ms{spread}")
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    for self_us, cumulative, depth, name in sorted(entries, key=lambda e: -e[1])[:top]:
+        print(f"{cumulative / 1000:>14.1f} {self_us / 1000:>8.1f}  {'  ' * depth}{name}")
+
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time report for the server and modules")
+    parser.add_argument("--module", help="also measure a module's entrypoint import")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=RUNS)
+    args = parser.parse_args()
+
+    entries = report("import app.server", args.top, args.runs)
+    total_us = total(entries)
+
+    heavy = sorted({name.split(".")[0] for _, _, _, name in entries} & set(HEAVY_PACKAGES))
+
+    failed = False
+    if heavy:
+        print(f"\nServer imports module dependencies at startup: {', '.join(heavy)}")
+        failed = True
+    if total_us / 1000 > args.budget_ms:
+        print(f"\nServer import {total_us / 1000:.1f} ms is over the {args.budget_ms:.0f} ms budget")
+        failed = True
+
+    if args.module:
+        print()
+        report(
+            "from app.executor import load_module; "
+            f"load_module({args.module!r})",
+            args.top,
+        )
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from app.events import EventLog, bus
+from app.executor import execute
+
+EVENT_BUFFER = 1000
+FINISHED_JOB_TTL = 3600
+MAX_FINISHED_JOBS = 50
+
+
+class Job(EventLog):
+    """
+    One background run of a module's `stream()`. Its events are numbered
+    and kept in a bounded ring buffer, so any number of clients can follow
+    the job and a client that reconnects resumes after the last event it saw.
+    Every event is also forwarded to the server-wide event bus.
+    """
+
+    def __init__(self, module_id: str, capacity: int = EVENT_BUFFER):
+        super().__init__(capacity)
+        self.id = uuid.uuid4().hex
+        self.module_id = module_id
+        self.status = "running"
+        self.created = time.time()
+        self.finished_at: Optional[float] = None
+        self.cancelled = False
+        # the module's event iterator; `events` is the ring buffer
+        self.stream = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status != "running"
+
+    def publish(self, event: Dict[str, Any]) -> int:
+        bus.publish_job_event(self.id, self.module_id, self.status, event)
+        return super().publish(event)
+
+    def finish(self, status: str):
+        with self._lock:
+            self.status = status
+            self.finished_at = time.time()
+        bus.publish_job_event(self.id, self.module_id, status, {"type": "job_finished", "status": status})
+        self._wake()
+
+    async def follow(self, last_id: int = 0):
+        """Yields `(id, event)` after `last_id`, live until the job ends."""
+        with self.waiter() as woken:
+            while True:
+                woken.clear()
+                finished = self.finished
+                pending = self.since(last_id)
+
+                for event_id, event in pending:
+                    yield event_id, event
+                    last_id = event_id
+
+                if finished and not self.since(last_id):
+                    return
+                if not pending:
+                    await woken.wait()
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "module_id": self.module_id,
+            "status": self.status,
+            "created": self.created,
+            "last_event_id": self.last_id,
+        }
+
+
+class JobManager:
+    def __init__(self):
+        self.jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def start(self, module_id: str, payload: dict) -> Job:
+        job = Job(module_id)
+        events = job.stream = execute(module_id, payload, mode="stream")
+
+        with self._lock:
+            self._purge()
+            self.jobs[job.id] = job
+
+        bus.publish_job_event(job.id, module_id, job.status, {"type": "job_started"})
+
+        threading.Thread(target=self._run, args=(job, events), daemon=True).start()
+        return job
+
+    def _run(self, job: Job, events):
+        status = "done"
+        try:
+            for event in events:
+                if job.cancelled:
+                    status = "cancelled"
+                    break
+                job.publish(event)
+            if job.cancelled:
+                status = "cancelled"
+        except Exception as e:
+            status = "failed"
+            job.publish({"type": "error", "message": str(e)})
+        finally:
+            # stops the module generator (and its cleanup) on cancel
+            if hasattr(events, "close"):
+                events.close()
+            if status == "cancelled":
+                # terminal event on the job's own stream, so clients stop
+                # reconnecting instead of waiting for a done or error
+                job.publish({"type": "cancelled"})
+            job.finish(status)
+
+    def _purge(self):
+        now = time.time()
+        finished = sorted(
+            (job for job in self.jobs.values() if job.finished),
+            key=lambda job: job.finished_at  # type: ignore
+        )
+        for i, job in enumerate(finished):
+            if now - job.finished_at > FINISHED_JOB_TTL or i < len(finished) - MAX_FINISHED_JOBS:  # type: ignore
+                del self.jobs[job.id]
+
+    def get(self, job_id: str) -> Job:
+        return self.jobs[job_id]
+
+    def cancel(self, job_id: str):
+        job = self.jobs[job_id]
+        job.cancelled = True
+
+        # streams that can be interrupted while no event is coming (32-bit worker)
+        if hasattr(job.stream, "cancel"):
+            job.stream.cancel()
+
+    def list_jobs(self, module_id: str | None = None) -> List[Dict[str, Any]]:
+        return [
+            job.info() for job in list(self.jobs.values())
+            if module_id is None or job.module_id == module_id
+        ]
+
+
+jobs = JobManager()
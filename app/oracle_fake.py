@@ -0,0 +1,445 @@
+"""
+Stand-in for `oracledb` backed by SQLite: the subset of the DB-API and
+pool API the Oracle modules use, to run them without an Oracle client.
+
+    ORACLE_DRIVER=fake ORACLE_FAKE_DB=/tmp/fake.db python main.py
+
+The database is shared by every session (a file, or a shared in-memory
+database by default). `user_tables` and `dual` exist as views. Columns
+declared with Oracle types (NUMBER(10,2), DATE, TIMESTAMP, CLOB, ...) are
+described and fetched like Oracle does:
+
+    python -m app.oracle_fake /tmp/fake.db --rows 2000000
+"""
+import argparse
+import datetime
+import decimal
+import itertools
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+FAKE_DB = os.environ.get("ORACLE_FAKE_DB", "file:oracle_fake?mode=memory&cache=shared")
+VERSION = "11.2.0.4.0"
+
+# simulated network round-trip per logon, so pooling shows in timings
+LOGON_DELAY = float(os.environ.get("ORACLE_FAKE_LOGON_DELAY", "0.05"))
+
+POOL_GETMODE_WAIT = 0
+POOL_GETMODE_NOWAIT = 1
+POOL_GETMODE_FORCEGET = 2
+POOL_GETMODE_TIMEDWAIT = 3
+
+# logons performed, to check that sessions are reused
+logons = 0
+
+DECLTYPE_RE = re.compile(r"^\s*(\w+)\s*(?:\(\s*(\d+)\s*(?:,\s*(-?\d+)\s*)?\))?", re.IGNORECASE)
+
+_describe_ids = itertools.count()
+
+_KEEPALIVE = None
+_LOCK = threading.Lock()
+
+
+class Error(Exception):
+    pass
+
+
+class InterfaceError(Error):
+    pass
+
+
+class DatabaseError(Error):
+    pass
+
+
+class DbType:
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self):
+        return f"<DbType {self.name}>"
+
+
+DB_TYPE_BINARY_DOUBLE = DbType("DB_TYPE_BINARY_DOUBLE")
+DB_TYPE_BINARY_FLOAT = DbType("DB_TYPE_BINARY_FLOAT")
+DB_TYPE_BLOB = DbType("DB_TYPE_BLOB")
+DB_TYPE_CHAR = DbType("DB_TYPE_CHAR")
+DB_TYPE_CLOB = DbType("DB_TYPE_CLOB")
+DB_TYPE_DATE = DbType("DB_TYPE_DATE")
+DB_TYPE_LONG = DbType("DB_TYPE_LONG")
+DB_TYPE_LONG_NVARCHAR = DbType("DB_TYPE_LONG_NVARCHAR")
+DB_TYPE_LONG_RAW = DbType("DB_TYPE_LONG_RAW")
+DB_TYPE_NCHAR = DbType("DB_TYPE_NCHAR")
+DB_TYPE_NCLOB = DbType("DB_TYPE_NCLOB")
+DB_TYPE_NUMBER = DbType("DB_TYPE_NUMBER")
+DB_TYPE_NVARCHAR = DbType("DB_TYPE_NVARCHAR")
+DB_TYPE_RAW = DbType("DB_TYPE_RAW")
+DB_TYPE_TIMESTAMP = DbType("DB_TYPE_TIMESTAMP")
+DB_TYPE_TIMESTAMP_TZ = DbType("DB_TYPE_TIMESTAMP_TZ")
+DB_TYPE_VARCHAR = DbType("DB_TYPE_VARCHAR")
+
+DECLTYPES = {
+    "NUMBER": DB_TYPE_NUMBER,
+    "INTEGER": DB_TYPE_NUMBER,
+    "INT": DB_TYPE_NUMBER,
+    "FLOAT": DB_TYPE_BINARY_DOUBLE,
+    "REAL": DB_TYPE_BINARY_DOUBLE,
+    "BINARY_DOUBLE": DB_TYPE_BINARY_DOUBLE,
+    "BINARY_FLOAT": DB_TYPE_BINARY_FLOAT,
+    "DATE": DB_TYPE_DATE,
+    "TIMESTAMP": DB_TYPE_TIMESTAMP,
+    "CHAR": DB_TYPE_CHAR,
+    "NCHAR": DB_TYPE_NCHAR,
+    "VARCHAR": DB_TYPE_VARCHAR,
+    "VARCHAR2": DB_TYPE_VARCHAR,
+    "NVARCHAR2": DB_TYPE_NVARCHAR,
+    "TEXT": DB_TYPE_VARCHAR,
+    "CLOB": DB_TYPE_CLOB,
+    "NCLOB": DB_TYPE_NCLOB,
+    "RAW": DB_TYPE_RAW,
+    "BLOB": DB_TYPE_BLOB,
+}
+
+
+def describe_column(name: str, decltype: str) -> Tuple:
+    """DB-API description entry for a column declared with an Oracle type."""
+    m = DECLTYPE_RE.match(decltype or "")
+    kind = m.group(1).upper() if m else ""
+    type_code = DECLTYPES.get(kind, DB_TYPE_VARCHAR if kind else None)
+    precision = int(m.group(2)) if m and m.group(2) else 0
+    scale = int(m.group(3)) if m and m.group(3) else 0
+
+    if type_code is DB_TYPE_NUMBER:
+        if kind in ("INTEGER", "INT"):
+            precision, scale = 38, 0
+        elif not precision:
+            # unconstrained NUMBER, as Oracle describes it
+            scale = -127
+
+    return (name, type_code, None, None, precision, scale, True)
+
+
+def converter(description: Tuple) -> Optional[Callable[[Any], Any]]:
+    type_code, precision, scale = description[1], description[4], description[5]
+    if type_code in (DB_TYPE_DATE, DB_TYPE_TIMESTAMP):
+        return datetime.datetime.fromisoformat
+    if type_code is DB_TYPE_NUMBER and precision and scale > 0:
+        return lambda v: decimal.Decimal(str(v))
+    if type_code is DB_TYPE_NUMBER and precision and scale <= 0:
+        return int
+    if type_code in (DB_TYPE_BLOB, DB_TYPE_RAW):
+        return bytes
+    return None
+
+
+def init_oracle_client(lib_dir=None, **kwargs):
+    pass
+
+
+class Cursor:
+    def __init__(self, connection: "Connection"):
+        self.connection = connection
+        self._cursor = connection._db.cursor()
+        self.arraysize = 100
+        self.prefetchrows = 2
+        # accepted for compatibility: values already come back as Oracle's would
+        self.outputtypehandler = None
+        self.description: Optional[List[Tuple]] = None
+        self._converters: List[Tuple[int, Callable[[Any], Any]]] = []
+
+    def var(self, type_code, arraysize=None, **kwargs):
+        return None
+
+    def _describe(self, statement: str) -> Optional[List[Tuple]]:
+        # SQLite keeps the declared type of the columns a view selects
+        name = f"fake_describe_{next(_describe_ids)}"
+        try:
+            self.connection._db.execute(f'CREATE TEMP VIEW "{name}" AS {statement}')
+        except sqlite3.Error:
+            return None
+        try:
+            return [
+                describe_column(column, decltype)
+                for _, column, decltype, *_ in self.connection._db.execute(f'PRAGMA table_info("{name}")')
+            ]
+        finally:
+            self.connection._db.execute(f'DROP VIEW "{name}"')
+
+    def _convert(self, rows: List[Tuple]) -> List[Tuple]:
+        if not self._converters or not rows:
+            return rows
+        converted = []
+        for row in rows:
+            row = list(row)
+            for i, convert in self._converters:
+                if row[i] is not None:
+                    row[i] = convert(row[i])
+            converted.append(tuple(row))
+        return converted
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def execute(self, statement, parameters=None, **kwargs):
+        self.connection._check()
+        parameters = parameters or kwargs
+        typed = None if parameters else self._describe(statement)
+        try:
+            self._cursor.execute(statement, parameters)
+        except sqlite3.Error as e:
+            raise DatabaseError(str(e)) from e
+
+        if self._cursor.description is None:
+            self.description = None
+            self._converters = []
+        else:
+            self.description = typed or [describe_column(d[0], "") for d in self._cursor.description]
+            self._converters = [
+                (i, convert) for i, d in enumerate(self.description)
+                if (convert := converter(d)) is not None
+            ]
+        return self
+
+    def executemany(self, statement, parameters):
+        self.connection._check()
+        try:
+            self._cursor.executemany(statement, parameters)
+        except sqlite3.Error as e:
+            raise DatabaseError(str(e)) from e
+
+    def fetchone(self):
+        try:
+            row = self._cursor.fetchone()
+        except sqlite3.Error as e:
+            raise DatabaseError(str(e)) from e
+        return row if row is None else self._convert([row])[0]
+
+    def fetchmany(self, size=None):
+        try:
+            rows = self._cursor.fetchmany(size or self.arraysize)
+        except sqlite3.Error as e:
+            raise DatabaseError(str(e)) from e
+        return self._convert(rows)
+
+    def fetchall(self):
+        try:
+            rows = self._cursor.fetchall()
+        except sqlite3.Error as e:
+            raise DatabaseError(str(e)) from e
+        return self._convert(rows)
+
+    def __iter__(self):
+        while True:
+            rows = self.fetchmany()
+            if not rows:
+                return
+            yield from rows
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Connection:
+    def __init__(self, user: str, password: str, dsn: str):
+        global logons, _KEEPALIVE
+        time.sleep(LOGON_DELAY)
+        # when set, logons with another password fail like a wrong Oracle password
+        expected = os.environ.get("ORACLE_FAKE_PASSWORD")
+        if expected is not None and password != expected:
+            raise DatabaseError("ORA-01017: invalid username/password; logon denied")
+
+        with _LOCK:
+            logons += 1
+            uri = FAKE_DB.startswith("file:")
+            self._db = sqlite3.connect(FAKE_DB, uri=uri, check_same_thread=False)
+            if uri and _KEEPALIVE is None:
+                # a shared in-memory database lives while one connection is open
+                _KEEPALIVE = sqlite3.connect(FAKE_DB, uri=True, check_same_thread=False)
+
+        self._db.executescript("""
+            CREATE TEMP VIEW IF NOT EXISTS dual AS SELECT 'X' AS dummy;
+            CREATE TEMP VIEW IF NOT EXISTS user_tables AS
+                SELECT upper(name) AS table_name FROM sqlite_master WHERE type = 'table';
+        """)
+        self.username = user
+        self.dsn = dsn
+        self.version = VERSION
+        self.broken = False
+        self.released = time.monotonic()
+        self._open = True
+
+    def _check(self):
+        if not self._open:
+            raise InterfaceError("DPI-1001: not connected")
+        if self.broken:
+            raise DatabaseError("ORA-03113: end-of-file on communication channel")
+
+    def cursor(self) -> Cursor:
+        self._check()
+        return Cursor(self)
+
+    def ping(self):
+        self._check()
+
+    def cancel(self):
+        # the running statement fails with "interrupted"
+        self._db.interrupt()
+
+    def commit(self):
+        self._check()
+        self._db.commit()
+
+    def rollback(self):
+        self._db.rollback()
+
+    def close(self):
+        if self._open:
+            self._open = False
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def connect(user=None, password=None, dsn=None, **kwargs) -> Connection:
+    return Connection(user, password, dsn)
+
+
+class ConnectionPool:
+    def __init__(self, user, password, dsn, min=1, max=2, increment=1,
+                 getmode=POOL_GETMODE_WAIT, wait_timeout=0, ping_interval=60, **kwargs):
+        self._args = (user, password, dsn)
+        self.min, self.max, self.increment = min, max, increment
+        self.getmode = getmode
+        self.wait_timeout = wait_timeout
+        self.ping_interval = ping_interval
+
+        self._idle = [Connection(*self._args) for _ in range(min)]
+        self._busy = set()
+        self._cond = threading.Condition()
+
+    @property
+    def opened(self) -> int:
+        return len(self._idle) + len(self._busy)
+
+    @property
+    def busy(self) -> int:
+        return len(self._busy)
+
+    def acquire(self) -> Connection:
+        deadline = time.monotonic() + self.wait_timeout / 1000
+        with self._cond:
+            while not self._idle:
+                if self.opened < self.max:
+                    grow = min(self.increment, self.max - self.opened)
+                    self._idle.extend(Connection(*self._args) for _ in range(grow))
+                    break
+
+                remaining = deadline - time.monotonic()
+                if self.getmode == POOL_GETMODE_NOWAIT or (self.getmode == POOL_GETMODE_TIMEDWAIT and remaining <= 0):
+                    raise DatabaseError("ORA-24459: timeout waiting for a pool session")
+                self._cond.wait(remaining if self.getmode == POOL_GETMODE_TIMEDWAIT else None)
+
+            conn = self._idle.pop()
+            if time.monotonic() - conn.released >= self.ping_interval:
+                try:
+                    conn.ping()
+                except Error:
+                    # dead session: replaced transparently, like oracledb does
+                    conn.close()
+                    conn = Connection(*self._args)
+            self._busy.add(conn)
+            return conn
+
+    def release(self, connection: Connection):
+        with self._cond:
+            self._busy.discard(connection)
+            connection.released = time.monotonic()
+            self._idle.append(connection)
+            self._cond.notify()
+
+    def drop(self, connection: Connection):
+        with self._cond:
+            self._busy.discard(connection)
+            connection.close()
+            self._cond.notify()
+
+    def close(self, force=False):
+        with self._cond:
+            for conn in [*self._idle, *self._busy]:
+                conn.close()
+            self._idle.clear()
+            self._busy.clear()
+
+
+def create_pool(user=None, password=None, dsn=None, **kwargs) -> ConnectionPool:
+    return ConnectionPool(user, password, dsn, **kwargs)
+
+
+def seed(path: str, rows: int, batch: int = 50000):
+    """A SAMPLE_ORDERS table covering the types the extract maps."""
+    db = sqlite3.connect(path)
+    db.execute("DROP TABLE IF EXISTS sample_orders")
+    db.execute("""
+        CREATE TABLE sample_orders (
+            order_id NUMBER(12),
+            customer VARCHAR2(60),
+            amount NUMBER(12,2),
+            weight BINARY_DOUBLE,
+            quantity INTEGER,
+            score NUMBER,
+            region CHAR(2),
+            ordered_on DATE,
+            shipped_at TIMESTAMP,
+            notes CLOB,
+            payload BLOB
+        )
+    """)
+
+    start = datetime.datetime(2020, 1, 1)
+    regions = ["NO", "SO", "EA", "WE"]
+    for offset in range(0, rows, batch):
+        db.executemany(
+            "INSERT INTO sample_orders VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    i,
+                    f"Customer {i % 5000}",
+                    f"{(i * 37) % 100000 / 100:.2f}",
+                    i * 0.25,
+                    i % 50,
+                    i / 7 if i % 3 else None,
+                    regions[i % 4],
+                    (start + datetime.timedelta(days=i % 1500)).isoformat(" "),
+                    (start + datetime.timedelta(seconds=i * 17, microseconds=i % 1000)).isoformat(" "),
+                    f"note {i}" if i % 10 == 0 else None,
+                    i.to_bytes(4, "big") if i % 100 == 0 else None,
+                )
+                for i in range(offset, min(offset + batch, rows))
+            ),
+        )
+    db.commit()
+    db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create a sample table in a fake Oracle database")
+    parser.add_argument("path", help="SQLite file, used with ORACLE_FAKE_DB")
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+    seed(args.path, args.rows)
+    print(f"{args.rows} rows in SAMPLE_ORDERS at {args.path}")
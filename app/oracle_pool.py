@@ -0,0 +1,268 @@
+"""
+Oracle session pools shared by the modules of a process: the 32-bit
+worker, or the server itself for the 64-bit modules (oracle_extract).
+
+Both processes live as long as the server, so the Oracle client is
+initialized once and a pool per (DSN alias, user) keeps logged-on sessions
+between runs:
+
+    from app.oracle_pool import pools
+
+    with pools.connection("LAVAUR_PROD", user, password) as conn:
+        cur = conn.cursor()
+        ...
+
+ORACLE_DRIVER=fake swaps `oracledb` for `app.oracle_fake` (SQLite behind a
+DB-API surface), to run the Oracle modules without a database.
+"""
+import hashlib
+import hmac
+import importlib
+import json
+import os
+import re
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# the Instant Client must match the interpreter: the 32-bit worker loads
+# the 32-bit one, the 64-bit server (oracle_extract) a 64-bit one if set.
+# Empty: no client library, thin mode (servers 12.1 and later only)
+if struct.calcsize("P") == 4:
+    ORACLE_CLIENT = os.environ.get("ORACLE_CLIENT_DIR", r"C:\oracle\instantclient_11_2")
+else:
+    ORACLE_CLIENT = os.environ.get("ORACLE_CLIENT_DIR_64", "")
+
+# per-alias overrides of the pool settings below, e.g.
+# {"LAVAUR_PROD": {"min": 2, "max": 8}}
+POOLS_CONFIG_PATH = Path(os.environ.get(
+    "ORACLE_POOLS_PATH",
+    Path.home() / ".local_tool_suite" / "oracle_pools.json"
+))
+
+POOL_MIN = 1
+POOL_MAX = 4
+POOL_INCREMENT = 1
+
+# sessions idle for longer are pinged before being handed out again
+PING_INTERVAL = 60
+# how long acquire() waits for a busy pool
+WAIT_TIMEOUT_MS = 30000
+
+# keys the in-memory credential digests: never the same across processes
+_DIGEST_KEY = os.urandom(32)
+
+READ_ONLY_RE = re.compile(r"^\s*(?:--[^\n]*\n\s*|/\*.*?\*/\s*)*(select|with)\b", re.IGNORECASE | re.DOTALL)
+
+
+def load_driver():
+    name = os.environ.get("ORACLE_DRIVER", "oracledb")
+    return importlib.import_module("app.oracle_fake" if name == "fake" else name)
+
+
+def is_query(sql: str) -> bool:
+    """SELECT / WITH only: the modules never run DML or DDL."""
+    return bool(READ_ONLY_RE.match(sql))
+
+
+def lob_as_value(cursor, metadata):
+    """
+    Output type handler fetching LOBs inline, as str / bytes, instead of
+    locators that each need another round-trip to read.
+    """
+    inline = {
+        getattr(pools.driver, "DB_TYPE_CLOB", None): "DB_TYPE_LONG",
+        getattr(pools.driver, "DB_TYPE_NCLOB", None): "DB_TYPE_LONG_NVARCHAR",
+        getattr(pools.driver, "DB_TYPE_BLOB", None): "DB_TYPE_LONG_RAW",
+    }
+    if metadata.type_code in inline:
+        return cursor.var(getattr(pools.driver, inline[metadata.type_code]), arraysize=cursor.arraysize)
+
+
+def credential_digest(user: str, password: str) -> bytes:
+    return hmac.new(_DIGEST_KEY, f"{user}\0{password}".encode("utf-8"), hashlib.sha256).digest()
+
+
+def pool_settings(alias: str) -> Dict[str, int]:
+    settings = {"min": POOL_MIN, "max": POOL_MAX, "increment": POOL_INCREMENT}
+    try:
+        overrides = json.loads(POOLS_CONFIG_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return settings
+
+    settings.update({k: int(v) for k, v in overrides.get(alias, {}).items() if k in settings})
+    return settings
+
+
+class PoolManager:
+    def __init__(self, driver=None):
+        self._driver = driver
+        self._pools: Dict[Tuple[str, str], Any] = {}
+        self._stats: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # digest of the credentials each pool logged on with
+        self._credentials: Dict[Tuple[str, str], bytes] = {}
+        # replaced pools still lending sessions, closed once idle
+        self._retired: List[Any] = []
+        self._lock = threading.Lock()
+        self._client_ready = False
+
+    @property
+    def driver(self):
+        if self._driver is None:
+            self._driver = load_driver()
+        return self._driver
+
+    def init_client(self):
+        """Thick mode, once per process (the 11.2 servers need it)."""
+        if self._client_ready:
+            return
+        with self._lock:
+            if not self._client_ready:
+                if ORACLE_CLIENT:
+                    self.driver.init_oracle_client(lib_dir=ORACLE_CLIENT)
+                self._client_ready = True
+
+    def pool(self, dsn: str, user: str, password: str):
+        """
+        The pool of (dsn, user), for these credentials only: other ones log
+        on afresh, and replace the pool once accepted by the server.
+        """
+        key = (dsn, user.upper())
+        digest = credential_digest(user.upper(), password)
+        pool = self._pools.get(key)
+        if pool is not None and hmac.compare_digest(self._credentials[key], digest):
+            return pool
+
+        self.init_client()
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is not None and hmac.compare_digest(self._credentials[key], digest):
+                return pool
+
+            settings = pool_settings(dsn)
+            started = time.perf_counter()
+            created = self.driver.create_pool(
+                user=user,
+                password=password,
+                dsn=dsn,
+                min=settings["min"],
+                max=settings["max"],
+                increment=settings["increment"],
+                ping_interval=PING_INTERVAL,
+                getmode=self.driver.POOL_GETMODE_TIMEDWAIT,
+                wait_timeout=WAIT_TIMEOUT_MS,
+            )
+            try:
+                # a pool may log on lazily: prove the password before using it
+                created.release(created.acquire())
+            except self.driver.Error:
+                created.close(force=True)
+                raise
+
+            if pool is not None:
+                self._retired.append(pool)
+            self._close_retired()
+
+            previous = self._stats.get(key)
+            self._pools[key] = created
+            self._credentials[key] = digest
+            self._stats[key] = {
+                **settings,
+                "created_ms": round((time.perf_counter() - started) * 1000, 1),
+                "acquired": previous["acquired"] if previous else 0,
+                "dropped": previous["dropped"] if previous else 0,
+                "replaced": previous["replaced"] + 1 if previous else 0,
+            }
+            return created
+
+    def _close_retired(self):
+        for pool in list(self._retired):
+            if pool.busy:
+                continue
+            try:
+                pool.close()
+            except self.driver.Error:
+                continue
+            self._retired.remove(pool)
+
+    def acquire(self, dsn: str, user: str, password: str):
+        # idle sessions are pinged by the pool itself (ping_interval)
+        pool = self.pool(dsn, user, password)
+        conn = pool.acquire()
+        self._stats[(dsn, user.upper())]["acquired"] += 1
+        return pool, conn
+
+    @contextmanager
+    def connection(self, dsn: str, user: str, password: str):
+        pool, conn = self.acquire(dsn, user, password)
+        broken = False
+        try:
+            yield conn
+        except self.driver.Error:
+            broken = True
+            raise
+        finally:
+            # also reached when a streaming caller is closed early
+            if broken:
+                # the session may be unusable: do not return it to the pool
+                pool.drop(conn)
+                self._stats[(dsn, user.upper())]["dropped"] += 1
+            else:
+                pool.release(conn)
+            if self._retired:
+                with self._lock:
+                    self._close_retired()
+
+    def health(self) -> Dict[str, Dict[str, Any]]:
+        """Pings one session of every pool."""
+        report = {}
+        for (dsn, user), pool in list(self._pools.items()):
+            started = time.perf_counter()
+            error: Optional[str] = None
+            try:
+                conn = pool.acquire()
+                try:
+                    conn.ping()
+                except self.driver.Error:
+                    pool.drop(conn)
+                    self._stats[(dsn, user)]["dropped"] += 1
+                    raise
+                pool.release(conn)
+            except self.driver.Error as e:
+                error = str(e)
+
+            report[f"{user}@{dsn}"] = {
+                "healthy": error is None,
+                "error": error,
+                "ping_ms": round((time.perf_counter() - started) * 1000, 1),
+            }
+        return report
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            f"{user}@{dsn}": {**self._stats[(dsn, user)], "opened": pool.opened, "busy": pool.busy}
+            for (dsn, user), pool in list(self._pools.items())
+        }
+
+    def close(self):
+        with self._lock:
+            for pool in self._pools.values():
+                try:
+                    pool.close(force=True)
+                except Exception:
+                    pass
+            for pool in self._retired:
+                try:
+                    pool.close(force=True)
+                except Exception:
+                    pass
+            self._pools.clear()
+            self._stats.clear()
+            self._credentials.clear()
+            self._retired.clear()
+
+
+pools = PoolManager()
@@ -0,0 +1,155 @@
+"""
+Long-lived worker for the 32-bit interpreter, started once by the server.
+
+Requests arrive as JSON lines on stdin and are served on a few threads, so
+modules stay imported and their Oracle pools stay logged on between runs.
+Every reply is a JSON line on stdout carrying the request id.
+
+Streams send one line per event and wait for the server to acknowledge
+them, never more than STREAM_WINDOW ahead: a large query costs a bounded
+amount of memory on both sides. A `cancel` line interrupts a request,
+including a blocked database call.
+"""
+import base64
+import datetime
+import decimal
+import importlib
+import json
+import os
+import sys
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict
+
+# the embedded interpreter only has its own folder on sys.path
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app import cancel
+
+WORKER_THREADS = 4
+
+# stream events sent ahead of the server's acknowledgements
+STREAM_WINDOW = 8
+
+_OUT = sys.stdout
+_OUT_LOCK = threading.Lock()
+
+# request id -> (cancel scope, stream credits) of the requests being served
+_active: Dict[str, tuple] = {}
+
+
+def json_default(value):
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode("ascii")
+    return str(value)
+
+
+def send(message: dict):
+    line = json.dumps(message, default=json_default)
+    with _OUT_LOCK:
+        _OUT.write(line + "\n")
+        _OUT.flush()
+
+
+def handle(req: dict, credits: threading.Semaphore):
+    op = req.get("op", "run")
+
+    if op == "ping":
+        return {"pid": os.getpid()}
+
+    if op == "pools":
+        from app.oracle_pool import pools
+        return {"stats": pools.stats(), "health": pools.health()}
+
+    module = importlib.import_module(req["module_name"])
+    mode = req.get("mode", "sync")
+
+    if mode == "download":
+        return module.download(req["payload"], format=req.get("format"))
+    if mode == "stream":
+        return stream(req, module.stream(req["payload"]), credits)
+    return module.run(req["payload"])
+
+
+def stream(req: dict, events, credits: threading.Semaphore):
+    scope = cancel.current()
+    try:
+        for event in events:
+            credits.acquire()
+            if scope.cancelled:
+                break
+            send({"id": req["id"], "type": "event", "event": event})
+    finally:
+        # runs the module's cleanup (cursor, pooled session) on cancel too
+        events.close()
+    return {"cancelled": scope.cancelled}
+
+
+def serve(req: dict):
+    scope, credits = _active[req["id"]]
+    try:
+        with cancel.active(scope):
+            result = handle(req, credits)
+        send({"id": req["id"], "type": "result", "result": result})
+    except Exception as e:
+        if scope.cancelled:
+            # the interrupted call raised: that is the expected outcome
+            send({"id": req["id"], "type": "result", "result": {"cancelled": True}})
+        else:
+            send({
+                "id": req["id"],
+                "type": "error",
+                "error": str(e),
+                "traceback": traceback.format_exc(),
+            })
+    finally:
+        del _active[req["id"]]
+
+
+def interrupt(request_id: str):
+    scope, credits = _active.get(request_id, (None, None))
+    if scope is not None:
+        scope.cancel()
+        credits.release()
+
+
+def main():
+    # module output must not corrupt the protocol
+    sys.stdout = sys.stderr
+
+    with ThreadPoolExecutor(max_workers=WORKER_THREADS) as pool:
+        for line in sys.stdin:
+            if not line.strip():
+                continue
+            req = json.loads(line)
+
+            # control messages are handled here, never queued behind work
+            op = req.get("op")
+            if op == "ack":
+                entry = _active.get(req["target"])
+                if entry is not None:
+                    entry[1].release()
+            elif op == "cancel":
+                interrupt(req["target"])
+            else:
+                _active[req["id"]] = (cancel.CancelScope(), threading.Semaphore(STREAM_WINDOW))
+                pool.submit(serve, req)
+
+        # stdin closed: the server is going away
+        for request_id in list(_active):
+            interrupt(request_id)
+
+    if "app.oracle_pool" in sys.modules:
+        sys.modules["app.oracle_pool"].pools.close()
+
+
+if __name__ == "__main__":
+    main()
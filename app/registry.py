@@ -1,53 +1,183 @@
+import hashlib
 import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 MODULES_PATH = Path("modules")
 
+# What the last discovery found, so unchanged folders are not re-read
+MANIFEST_PATH = Path(os.environ.get(
+    "REGISTRY_MANIFEST_PATH",
+    Path.home() / ".local_tool_suite" / "registry_manifest.json"
+))
+MANIFEST_VERSION = 1
+
+# module folders may live on a network share: overlap the slow reads
+PARALLEL_READS = 8
+READ_WORKERS = 16
+
+
+def stat_key(path: Path):
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def read_config(config: Path, previous: dict | None) -> dict:
+    """Manifest entry for one module folder: its meta or its error."""
+    entry = {"config": stat_key(config)}
+
+    try:
+        data = config.read_bytes()
+        entry["hash"] = hashlib.sha256(data).hexdigest()
+
+        # touched but unchanged: keep the parsed result
+        if previous and previous.get("hash") == entry["hash"]:
+            return {**previous, **entry}
+
+        raw = data.decode("utf-8").strip()
+        if not raw:
+            raise ValueError("config.json is empty")
+
+        meta = json.loads(raw)
+
+        if not meta.get("id"):
+            raise ValueError("Missing 'id' in config.json")
+
+        entry["meta"] = meta
+
+    except Exception as e:
+        entry["error"] = str(e)
+
+    return entry
+
+
 class ModuleRegistry:
     def __init__(self):
         self.modules = {}
         self.errors = {}
+        self.configs = []
+        self.timing = {}
         self.discover()
 
+    def load_manifest(self) -> dict:
+        try:
+            manifest = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+        if manifest.get("version") != MANIFEST_VERSION or manifest.get("root") != str(MODULES_PATH.resolve()):
+            return {}
+        return manifest.get("folders", {})
+
+    def save_manifest(self, folders: dict):
+        try:
+            MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+            tmp = MANIFEST_PATH.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps({
+                "version": MANIFEST_VERSION,
+                "root": str(MODULES_PATH.resolve()),
+                "folders": folders,
+            }), encoding="utf-8")
+            tmp.replace(MANIFEST_PATH)
+        except OSError:
+            # read-only home: discovery still works, just uncached
+            pass
+
     def discover(self):
+        started = time.perf_counter()
+        modules = {}
+        errors = {}
+
         if not MODULES_PATH.exists():
+            self.modules, self.errors = modules, errors
             return
 
+        previous = self.load_manifest()
+        folders = {}
+        stale = []
+
         for folder in MODULES_PATH.iterdir():
             if not folder.is_dir():
                 continue
 
             config = folder / "config.json"
-            if not config.exists():
+            key = stat_key(config)
+            if key is None:
                 continue
 
-            try:
-                raw = config.read_text(encoding="utf-8").strip()
-                if not raw:
-                    raise ValueError("config.json is empty")
+            entry = previous.get(folder.name)
+            if entry is not None and entry.get("config") == key:
+                folders[folder.name] = entry
+            else:
+                stale.append(folder)
+                folders[folder.name] = None
+
+        scanned = time.perf_counter()
+
+        def reread(folder):
+            return folder.name, read_config(folder / "config.json", previous.get(folder.name))
+
+        if len(stale) >= PARALLEL_READS:
+            with ThreadPoolExecutor(max_workers=READ_WORKERS) as pool:
+                folders.update(pool.map(reread, stale))
+        else:
+            folders.update(map(reread, stale))
+
+        for name, entry in folders.items():
+            if "error" in entry:
+                errors[name] = entry["error"]
+                continue
 
-                meta = json.loads(raw)
+            meta = entry["meta"]
+            modules[meta["id"]] = {
+                "path": MODULES_PATH / name,
+                "meta": meta
+            }
 
-                module_id = meta.get("id")
-                if not module_id:
-                    raise ValueError("Missing 'id' in config.json")
+        if stale or set(folders) != set(previous):
+            self.save_manifest(folders)
 
-                self.modules[module_id] = {
-                    "path": folder,
-                    "meta": meta
-                }
+        self.modules, self.errors = modules, errors
+        self.configs = [MODULES_PATH / name / "config.json" for name in folders]
+        self.timing = {
+            "total_ms": round((time.perf_counter() - started) * 1000, 2),
+            "scan_ms": round((scanned - started) * 1000, 2),
+            "folders": len(folders),
+            "reread": len(stale),
+            "from_manifest": len(folders) - len(stale),
+        }
 
-            except Exception as e:
-                self.errors[folder.name] = str(e)
+    def refresh(self):
+        """Pick up added, removed or edited modules (cheap when nothing changed)."""
+        self.discover()
 
     def list_errors(self):
         return self.errors
 
+    def discovery_stats(self):
+        return self.timing
+
     def list_modules(self):
         return [m["meta"] for m in self.modules.values()]
 
-    def load_ui(self, module_id):
+    def config_paths(self):
+        # the folder itself changes when a module is added or removed
+        return [MODULES_PATH, *self.configs]
+
+    def ui_path(self, module_id):
         module = self.modules[module_id]
-        return (module["path"] / module["meta"]["ui"]).read_text(encoding="utf-8")
+        return module["path"] / module["meta"]["ui"]
+
+    def static_dir(self, module_id):
+        module = self.modules[module_id]
+        return module["path"] / module["meta"].get("static", "static")
+
+    def load_ui(self, module_id):
+        return self.ui_path(module_id).read_text(encoding="utf-8")
 
 registry = ModuleRegistry()
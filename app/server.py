@@ -1,41 +1,122 @@
+import re
 import tempfile
 import uuid
-from fastapi import FastAPI, File, Query, HTTPException, UploadFile
-from fastapi.responses import FileResponse, HTMLResponse, StreamingResponse
+from fastapi import FastAPI, File, Header, Query, HTTPException, Request, UploadFile
+from fastapi.responses import FileResponse, StreamingResponse
 from pathlib import Path
+from app.assets import asset_response, assets, static_response
 from app.registry import registry
-from app.executor import execute
+from app.executor import execute, import_times, module_health, warm_modules, warm_state
+from app.events import bus
+from app.jobs import Job, jobs
+from app.supervisor import limit_metrics
+from app.worker32 import worker32
 import json
-from modules.check_real_addresses.module import stream
+import time
+from contextlib import asynccontextmanager
 
-app = FastAPI()
+STARTED_AT = time.time()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # pay the heavy imports now rather than on the first click
+    warm_modules()
+    yield
+    worker32.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 
 ROOT_UI = Path("app/ui/root.html")
+HTML = "text/html; charset=utf-8"
+STATIC_REF_RE = re.compile(r"\{\{\s*static:([^}\s]+)\s*\}\}")
 
 
 @app.get("/")
-def root_ui():
-    return HTMLResponse(
-        content=ROOT_UI.read_text(encoding="utf-8"),
-        media_type="text/html; charset=utf-8"
-    )
+def root_ui(request: Request):
+    return asset_response(request, assets.file(ROOT_UI, HTML))
+
+def refreshed_modules() -> str:
+    registry.refresh()
+    return json.dumps(registry.list_modules())
+
+
+@app.get("/api/health")
+def health():
+    """Ready once the registry is loaded and the warm modules are imported."""
+    warming = [m for m, state in warm_state.items() if state == "pending"]
+    return {
+        "ready": not warming,
+        "modules": len(registry.modules),
+        "warm": warm_state,
+        "uptime_s": round(time.time() - STARTED_AT, 3),
+        "worker32": worker32.info(),
+        "module_health": module_health(),
+    }
+
+
+@app.get("/api/registry")
+def registry_status():
+    return {
+        "modules": len(registry.modules),
+        "errors": registry.list_errors(),
+        "discovery": registry.discovery_stats(),
+        "import_ms": import_times,
+        "limits": limit_metrics,
+    }
+
 
 @app.get("/api/modules")
-def list_modules():
-    return registry.list_modules()
+def list_modules(request: Request):
+    asset = assets.get(
+        "/api/modules",
+        registry.config_paths(),
+        lambda: refreshed_modules().encode("utf-8"),
+        "application/json"
+    )
+    return asset_response(request, asset)
+
+
+def static_url(module_id: str, relative: str) -> str:
+    path = registry.static_dir(module_id) / relative
+    return f"/static/{module_id}/{relative}?v={assets.digest(path)}"
+
+
+def render_ui(module_id: str, path: Path) -> bytes:
+    # {{ static:app.js }} -> /static/<module>/app.js?v=<content hash>
+    html = path.read_text(encoding="utf-8")
+    html = STATIC_REF_RE.sub(lambda m: static_url(module_id, m.group(1)), html)
+    return html.encode("utf-8")
 
 
 @app.get("/ui/{module_id}")
-def module_ui(module_id: str):
+def module_ui(module_id: str, request: Request):
     try:
-        html = registry.load_ui(module_id)
-        return HTMLResponse(
-            content=html,
-            media_type="text/html; charset=utf-8"
-        )
+        path = registry.ui_path(module_id)
+        static_dir = registry.static_dir(module_id)
     except KeyError:
         raise HTTPException(status_code=404, detail="Module not found")
 
+    # the page embeds the static files' hashes, so it changes with them
+    static_files = sorted(static_dir.rglob("*")) if static_dir.is_dir() else []
+    asset = assets.get(f"/ui/{module_id}", [path, *static_files], lambda: render_ui(module_id, path), HTML)
+    return asset_response(request, asset)
+
+
+@app.get("/static/{module_id}/{relative:path}")
+def module_static(module_id: str, relative: str, request: Request, v: str | None = Query(None)):
+    try:
+        static_dir = registry.static_dir(module_id).resolve()
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Module not found")
+
+    path = (static_dir / relative).resolve()
+    if not path.is_relative_to(static_dir) or not path.is_file():
+        raise HTTPException(status_code=404, detail="File not found")
+
+    return static_response(request, path, v)
+
 
 # @app.post("/api/run/{module_id}")
 # def run_module(module_id: str, payload: dict):
@@ -52,15 +133,32 @@ def run_module(
     format: str | None = Query(None),
 ):
     if mode == "stream":
-        def event_stream():
-            for event in execute(module_id, payload, mode="stream"):
-                yield f"data: {json.dumps(event)}\n\n"
+        job = jobs.start(module_id, payload)
+        return event_response(job, 0)
+
+    if mode == "ndjson":
+        # one JSON event per line, no job: closing the response cancels the run
+        return StreamingResponse(
+            ndjson_lines(execute(module_id, payload, mode="stream")),
+            media_type="application/x-ndjson",
+            headers={"Cache-Control": "no-cache"},
+        )
 
-        return StreamingResponse(event_stream(), media_type="text/event-stream")
+    if mode == "background":
+        # progress is followed through /api/events or /api/jobs/{id}/events
+        return jobs.start(module_id, payload).info()
 
     if mode == "download":
         result = execute(module_id, payload, mode="download", format=format)
 
+        if "stream" in result:
+            filename = result.get("filename", "download")
+            return StreamingResponse(
+                result["stream"],
+                media_type=result.get("media_type", "application/octet-stream"),
+                headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+            )
+
         return FileResponse(
             path=result["path"],
             filename=result.get("filename"),
@@ -70,6 +168,83 @@ def run_module(
     return execute(module_id, payload)
     
 
+def ndjson_lines(events):
+    try:
+        for event in events:
+            yield json.dumps(event) + "\n"
+    except Exception as e:
+        # the status line is already sent: report like a job does
+        yield json.dumps({"type": "error", "message": str(e)}) + "\n"
+    finally:
+        if hasattr(events, "close"):
+            events.close()
+
+
+def event_response(job: Job, last_event_id: int) -> StreamingResponse:
+    async def event_stream():
+        async for event_id, event in job.follow(last_event_id):
+            yield f"id: {event_id}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"X-Job-Id": job.id, "Cache-Control": "no-cache"},
+    )
+
+
+@app.get("/api/events")
+def events(
+    topics: str = Query("*"),
+    last_event_id: int = Query(0),
+    last_event_id_header: int | None = Header(None, alias="Last-Event-ID"),
+):
+    """
+    Single SSE channel for all jobs, e.g. `?topics=job:*` or
+    `?topics=module:check_real_addresses`. Each message is a batch.
+    """
+    patterns = [t.strip() for t in topics.split(",") if t.strip()]
+
+    async def event_stream():
+        start = last_event_id_header or last_event_id
+        async for batch_id, batch in bus.subscribe(patterns, start):
+            yield f"id: {batch_id}\ndata: {json.dumps(batch)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@app.get("/api/jobs")
+def list_jobs(module_id: str | None = Query(None)):
+    return jobs.list_jobs(module_id)
+
+
+@app.get("/api/jobs/{job_id}/events")
+def job_events(
+    job_id: str,
+    last_event_id: int = Query(0),
+    last_event_id_header: int | None = Header(None, alias="Last-Event-ID"),
+):
+    try:
+        job = jobs.get(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    # EventSource sends the header on its own reconnects
+    return event_response(job, last_event_id_header or last_event_id)
+
+
+@app.delete("/api/jobs/{job_id}")
+def cancel_job(job_id: str):
+    try:
+        jobs.cancel(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"job_id": job_id, "cancelled": True}
+
+
 UPLOAD_DIR = Path(tempfile.gettempdir()) / "local_tool_uploads"
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -0,0 +1,355 @@
+import importlib
+import multiprocessing
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# how often the watchdog samples the child
+POLL_INTERVAL = 0.1
+
+# rlimits are a backstop: the watchdog reports first, with a clear message
+CPU_RLIMIT_GRACE = 5
+
+SUPERVISED_DIR = Path(tempfile.gettempdir()) / "module_supervised"
+
+# spools left by downloads that were never read (client gone before the
+# first byte) are swept on the next spool
+SPOOL_MAX_AGE_S = 3600
+SPOOL_CHUNK = 1024 * 1024
+
+_CTX = multiprocessing.get_context("spawn")
+
+# module_id -> usage of the last run and the highest share of each limit seen
+limit_metrics: Dict[str, Dict[str, Any]] = {}
+_METRICS_LOCK = threading.Lock()
+
+
+class ModuleLimitExceeded(RuntimeError):
+    pass
+
+
+def process_usage(pid: int) -> Tuple[Optional[int], Optional[float]]:
+    """(RSS bytes, CPU seconds) of a running process, None where unknown."""
+    if sys.platform.startswith("linux"):
+        try:
+            with open(f"/proc/{pid}/statm") as f:
+                rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+            with open(f"/proc/{pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+            return rss, cpu
+        except (OSError, ValueError, IndexError):
+            return None, None
+
+    if sys.platform == "win32":
+        return _windows_usage(pid)
+
+    return None, None
+
+
+def _windows_usage(pid: int) -> Tuple[Optional[int], Optional[float]]:
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    PROCESS_QUERY_INFORMATION = 0x0400
+    PROCESS_VM_READ = 0x0010
+
+    kernel32 = ctypes.windll.kernel32  # type: ignore
+    psapi = ctypes.windll.psapi  # type: ignore
+
+    handle = kernel32.OpenProcess(PROCESS_QUERY_INFORMATION | PROCESS_VM_READ, False, pid)
+    if not handle:
+        return None, None
+
+    try:
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        rss = None
+        if psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            rss = counters.WorkingSetSize
+
+        creation, exit_, kernel, user = (wintypes.FILETIME() for _ in range(4))
+        cpu = None
+        if kernel32.GetProcessTimes(handle, ctypes.byref(creation), ctypes.byref(exit_),
+                                    ctypes.byref(kernel), ctypes.byref(user)):
+            ticks = sum((t.dwHighDateTime << 32) | t.dwLowDateTime for t in (kernel, user))
+            cpu = ticks / 1e7
+
+        return rss, cpu
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def apply_rlimits(limits: Dict[str, Any]):
+    if resource is None:
+        return
+
+    cpu = limits.get("cpu_s")
+    if cpu:
+        soft = int(cpu) + CPU_RLIMIT_GRACE
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, soft + 1))
+
+
+def sweep_spools():
+    cutoff = time.time() - SPOOL_MAX_AGE_S
+    for path in SUPERVISED_DIR.glob("*.spool"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except OSError:
+            pass
+
+
+def drain_stream(chunks) -> str:
+    """Download streams cannot cross the process boundary: spool to a file."""
+    SUPERVISED_DIR.mkdir(exist_ok=True)
+    sweep_spools()
+    fd, path = tempfile.mkstemp(dir=SUPERVISED_DIR, suffix=".spool")
+    with open(fd, "wb") as out:
+        for chunk in chunks:
+            out.write(chunk)
+    return path
+
+
+def read_spool(path: str):
+    """Streams a spool back, deleting it once read or abandoned."""
+    try:
+        with open(path, "rb") as f:
+            while chunk := f.read(SPOOL_CHUNK):
+                yield chunk
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _child_main(conn, module_name: str, payload: dict, mode: str, format, limits: Dict[str, Any]):
+    try:
+        apply_rlimits(limits)
+        module = importlib.import_module(module_name)
+
+        if mode == "stream":
+            for event in module.stream(payload):
+                conn.send(("event", event))
+            conn.send(("done", None))
+            return
+
+        if mode == "download":
+            result = module.download(payload, format=format)
+            if "stream" in result:
+                result = {**result, "spool": drain_stream(result.pop("stream"))}
+        else:
+            result = module.run(payload)
+
+        conn.send(("done", result))
+
+    except BaseException as e:
+        conn.send(("error", f"{type(e).__name__}: {e}", traceback.format_exc()))
+    finally:
+        conn.close()
+
+
+class Supervised:
+    """
+    One module call in a child process. A watchdog thread samples it against
+    its limits whether or not anyone is reading its messages, and kills it
+    on the first limit exceeded.
+    """
+
+    def __init__(self, module_id: str, module_name: str, payload: dict, mode: str, format, limits: Dict[str, Any]):
+        self.module_id = module_id
+        self.limits = limits
+
+        self.peak_rss = 0
+        self.cpu = 0.0
+        self.started = time.perf_counter()
+        self.status: Optional[str] = None
+        self._violation: Optional[str] = None
+        self._finished = threading.Event()
+        self._record_lock = threading.Lock()
+
+        self._conn, child_conn = _CTX.Pipe(duplex=False)
+        self.process = _CTX.Process(
+            target=_child_main,
+            args=(child_conn, module_name, payload, mode, format, limits),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+        self._watchdog = threading.Thread(target=self.watch, name=f"watchdog-{module_id}", daemon=True)
+        self._watchdog.start()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def watch(self):
+        while not self._finished.wait(POLL_INTERVAL):
+            if self.process.exitcode is not None:
+                return
+            reason = self.check()
+            if reason:
+                self._violation = reason
+                # the reader sees the pipe close, then raises ModuleLimitExceeded
+                self.process.kill()
+                self.record("killed")
+                return
+
+    def check(self) -> Optional[str]:
+        """The first limit exceeded, None while within all of them."""
+        rss, cpu = process_usage(self.process.pid)  # type: ignore
+        if rss is not None:
+            self.peak_rss = max(self.peak_rss, rss)
+        if cpu is not None:
+            self.cpu = cpu
+
+        max_rss = self.limits.get("max_rss_mb")
+        if max_rss and rss is not None and rss > max_rss * 1024 * 1024:
+            return f"memory limit ({rss / 2**20:.0f} MB > {max_rss} MB)"
+
+        timeout = self.limits.get("timeout_s")
+        if timeout and self.elapsed > timeout:
+            return f"time limit ({self.elapsed:.0f} s > {timeout} s)"
+
+        cpu_limit = self.limits.get("cpu_s")
+        if cpu_limit and cpu is not None and cpu > cpu_limit:
+            return f"CPU limit ({cpu:.0f} s > {cpu_limit} s)"
+        return None
+
+    def exceeded(self):
+        self.stop()
+        raise ModuleLimitExceeded(f"Module {self.module_id} exceeded its {self._violation}")
+
+    def receive(self):
+        """Next message from the child."""
+        if self._violation:
+            self.exceeded()
+
+        while not self._conn.poll(POLL_INTERVAL):
+            if not self.process.is_alive() and not self._conn.poll():
+                self.crashed()
+
+        try:
+            message = self._conn.recv()
+        except EOFError:
+            self.process.join(1)
+            self.crashed()
+
+        if message[0] == "error":
+            self.finish("failed")
+            raise RuntimeError(message[1])
+        return message
+
+    def crashed(self):
+        if self._violation:
+            self.exceeded()
+
+        code = self.process.exitcode
+        if code == -getattr(signal, "SIGXCPU", 0) and self.limits.get("cpu_s"):
+            self.record("killed")
+            raise ModuleLimitExceeded(f"Module {self.module_id} exceeded its CPU limit ({self.limits['cpu_s']} s)")
+
+        self.record("crashed")
+        raise RuntimeError(f"Module {self.module_id} exited unexpectedly (code {code})")
+
+    def finish(self, status: str):
+        self.process.join(5)
+        self.stop()
+        self.record(status)
+
+    def stop(self):
+        self._finished.set()
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self._conn.close()
+
+    def record(self, status: str):
+        # the watchdog and the reader can both end a run: the first one counts
+        with self._record_lock:
+            if self.status is not None:
+                return
+            self.status = status
+
+        usage = {
+            "status": status,
+            "wall_s": round(self.elapsed, 3),
+            "cpu_s": round(self.cpu, 3),
+            "peak_rss_mb": round(self.peak_rss / 2**20, 1),
+        }
+
+        shares = {}
+        for key, used in (("max_rss_mb", usage["peak_rss_mb"]), ("timeout_s", usage["wall_s"]), ("cpu_s", usage["cpu_s"])):
+            if self.limits.get(key):
+                shares[key] = round(used / self.limits[key], 3)
+
+        with _METRICS_LOCK:
+            metrics = limit_metrics.setdefault(self.module_id, {"runs": 0, "killed": 0, "max_share": {}})
+            metrics["runs"] += 1
+            metrics["killed"] += status == "killed"
+            metrics["last"] = {**usage, "share": shares}
+            for key, share in shares.items():
+                metrics["max_share"][key] = max(metrics["max_share"].get(key, 0), share)
+
+
+def run_supervised(module_id: str, module_name: str, payload: dict, mode: str, format, limits: Dict[str, Any]):
+    if mode == "stream":
+        return _stream_supervised(module_id, module_name, payload, format, limits)
+
+    run = Supervised(module_id, module_name, payload, mode, format, limits)
+    try:
+        _, result = run.receive()
+    except BaseException:
+        run.stop()
+        raise
+    run.finish("done")
+
+    if "spool" in result:
+        result["stream"] = read_spool(result.pop("spool"))
+    return result
+
+
+def _stream_supervised(module_id: str, module_name: str, payload: dict, format, limits: Dict[str, Any]):
+    run = Supervised(module_id, module_name, payload, "stream", format, limits)
+    completed = False
+    try:
+        while True:
+            kind, value = run.receive()
+            if kind == "done":
+                completed = True
+                break
+            yield value
+    finally:
+        if completed:
+            run.finish("done")
+        else:
+            # limit hit, module error, or the consumer stopped early (job cancelled)
+            run.stop()
+            run.record("cancelled")
@@ -0,0 +1,228 @@
+import json
+import logging
+import os
+import queue
+import subprocess
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+PYTHON32 = Path(os.environ.get("PYTHON32", "app/python32/portable/python.exe"))
+WORKER32 = Path("app/python32/worker.py")
+
+# longest wait for a reply (or the next stream event) before giving up on it
+REPLY_TIMEOUT = float(os.environ.get("WORKER32_REPLY_TIMEOUT", "3600"))
+# how often a waiting caller checks that the worker is still running
+ALIVE_INTERVAL = 1.0
+
+logger = logging.getLogger(__name__)
+
+
+class Worker32:
+    """
+    The 32-bit interpreter, started on first use and kept running. Requests
+    are multiplexed over its stdin/stdout by id; if it dies it is restarted
+    on the next call.
+    """
+
+    def __init__(self):
+        self._proc: Optional[subprocess.Popen] = None
+        self._pending: Dict[str, "WorkerRequest"] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self.started: Optional[float] = None
+        self.requests = 0
+        self.restarts = 0
+
+    def _ensure(self) -> subprocess.Popen:
+        with self._lock:
+            if self._proc is not None and self._proc.poll() is None:
+                return self._proc
+
+            if self._proc is not None:
+                self.restarts += 1
+
+            self._proc = subprocess.Popen(
+                [str(PYTHON32), str(WORKER32)],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                # module logs go to the server console
+                stderr=None,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                bufsize=1,
+            )
+            self.started = time.time()
+            threading.Thread(target=self._read, args=(self._proc,), daemon=True).start()
+            return self._proc
+
+    def _read(self, proc: subprocess.Popen):
+        try:
+            for line in proc.stdout:  # type: ignore
+                try:
+                    message = json.loads(line)
+                    pending = self._pending.get(message["id"])
+                except (ValueError, TypeError, KeyError):
+                    # a stray print from a module, not a reply
+                    logger.warning("32-bit worker: ignored output line %r", line.rstrip()[:200])
+                    continue
+                if pending is not None:
+                    pending.queue.put(message)
+        except Exception:
+            # replies can no longer be read: restart the worker on the next call
+            logger.exception("32-bit worker: reader failed")
+            proc.kill()
+        finally:
+            # worker exited: fail everything still waiting on it
+            proc.wait()
+            for pending in list(self._pending.values()):
+                if pending.proc is proc:
+                    pending.queue.put({"type": "exit", "code": proc.returncode})
+
+    def _write(self, proc: subprocess.Popen, message: Dict[str, Any]):
+        try:
+            with self._write_lock:
+                proc.stdin.write(json.dumps(message) + "\n")  # type: ignore
+                proc.stdin.flush()  # type: ignore
+        except OSError as e:
+            raise RuntimeError(f"32-bit worker unavailable: {e}")
+
+    def submit(self, request: Dict[str, Any]) -> "WorkerRequest":
+        pending = WorkerRequest(self, self._ensure())
+        self._pending[pending.id] = pending
+        try:
+            self._write(pending.proc, {**request, "id": pending.id})
+        except BaseException:
+            pending.release()
+            raise
+        self.requests += 1
+        return pending
+
+    def call(self, request: Dict[str, Any]):
+        pending = self.submit(request)
+        try:
+            return pending.result()
+        finally:
+            pending.release()
+
+    def stream(self, request: Dict[str, Any]) -> "WorkerStream":
+        return WorkerStream(self.submit({**request, "mode": "stream"}))
+
+    def info(self) -> Dict[str, Any]:
+        alive = self._proc is not None and self._proc.poll() is None
+        return {
+            "running": alive,
+            "pid": self._proc.pid if alive else None,  # type: ignore
+            "uptime_s": round(time.time() - self.started, 1) if alive and self.started else None,
+            "requests": self.requests,
+            "restarts": self.restarts,
+        }
+
+    def stop(self):
+        with self._lock:
+            proc, self._proc = self._proc, None
+        if proc is None or proc.poll() is not None:
+            return
+        try:
+            # closing stdin lets it finish in-flight requests and log off
+            proc.stdin.close()  # type: ignore
+            proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            proc.kill()
+
+
+class WorkerRequest:
+    def __init__(self, worker: Worker32, proc: subprocess.Popen):
+        self.worker = worker
+        self.proc = proc
+        self.id = uuid.uuid4().hex
+        self.queue: queue.Queue = queue.Queue()
+        self.finished = False
+
+    def next_message(self, timeout: float = REPLY_TIMEOUT) -> Dict[str, Any]:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                message = self.queue.get(timeout=min(ALIVE_INTERVAL, max(deadline - time.monotonic(), 0)))
+                break
+            except queue.Empty:
+                pass
+
+            if self.proc.poll() is not None:
+                # the reader posts the exit once it has drained the output
+                try:
+                    message = self.queue.get(timeout=ALIVE_INTERVAL)
+                except queue.Empty:
+                    message = {"type": "exit", "code": self.proc.returncode}
+                break
+
+            if time.monotonic() >= deadline:
+                self.finished = True
+                self.control("cancel")
+                raise TimeoutError(f"32-bit worker did not reply within {timeout:.0f} s")
+
+        if message["type"] != "event":
+            self.finished = True
+        if message["type"] == "exit":
+            raise RuntimeError(f"32-bit worker exited (code {message['code']})")
+        if message["type"] == "error":
+            raise RuntimeError(message["error"])
+        return message
+
+    def result(self):
+        return self.next_message()["result"]
+
+    def control(self, op: str):
+        # only meaningful to the process serving the request
+        if self.proc.poll() is None:
+            try:
+                self.worker._write(self.proc, {"op": op, "target": self.id})
+            except RuntimeError:
+                pass
+
+    def release(self):
+        self.worker._pending.pop(self.id, None)
+
+
+class WorkerStream:
+    """
+    Events of a module's `stream()` running in the worker. Each event taken
+    is acknowledged, which lets the worker produce the next ones.
+    """
+
+    def __init__(self, request: WorkerRequest):
+        self.request = request
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.request.finished:
+            raise StopIteration
+        try:
+            message = self.request.next_message()
+        except BaseException:
+            self.request.release()
+            raise
+
+        if message["type"] != "event":
+            self.request.release()
+            raise StopIteration
+
+        self.request.control("ack")
+        return message["event"]
+
+    def cancel(self):
+        """Interrupts the module, even while it waits on the database."""
+        if not self.request.finished:
+            self.request.control("cancel")
+
+    def close(self):
+        self.cancel()
+        self.request.release()
+
+
+worker32 = Worker32()
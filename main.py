@@ -1,3 +1,4 @@
+import logging
 import threading
 import time
 import webbrowser
@@ -7,45 +8,76 @@ import uvicorn
 
 HOST = "127.0.0.1"
 
+# give up opening the browser if the server is not up by then
+STARTUP_TIMEOUT = 30
 
-def find_free_port():
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        s.bind((HOST, 0))
-        return s.getsockname()[1]
+logger = logging.getLogger("launcher")
 
 
-def run_server(port: int):
-    uvicorn.run(
-        "app.server:app",
-        host=HOST,
-        port=port,
+def bind_socket() -> socket.socket:
+    # bound here and handed to uvicorn: no window where the port is free
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind((HOST, 0))
+    return sock
+
+
+def create_server() -> uvicorn.Server:
+    from app.server import app
+
+    config = uvicorn.Config(
+        app,
         log_level="warning",
-        reload=False,
         access_log=False,
     )
+    return uvicorn.Server(config)
+
+
+def wait_until_started(server: uvicorn.Server, thread: threading.Thread) -> bool:
+    deadline = time.perf_counter() + STARTUP_TIMEOUT
+    while not server.started:
+        if not thread.is_alive() or time.perf_counter() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
 
 
 def main():
-    port = find_free_port()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s: %(message)s")
+    started = time.perf_counter()
+
+    def phase(name: str):
+        logger.info("%s after %.0f ms", name, (time.perf_counter() - started) * 1000)
+
+    sock = bind_socket()
+    port = sock.getsockname()[1]
+    phase(f"Bound {HOST}:{port}")
+
+    server = create_server()
+    phase("Application imported")
 
     server_thread = threading.Thread(
-        target=run_server,
-        args=(port,),
+        target=server.run,
+        kwargs={"sockets": [sock]},
         daemon=True,
     )
     server_thread.start()
 
-    # Small delay to ensure server is ready
-    time.sleep(0.6)
+    if not wait_until_started(server, server_thread):
+        logger.error("Server did not start")
+        return
+
+    phase("Server accepting requests")
 
     webbrowser.open(f"http://{HOST}:{port}/")
+    phase("Browser opened")
 
     # Keep main thread alive
     try:
-        while True:
+        while server_thread.is_alive():
             time.sleep(1)
     except KeyboardInterrupt:
-        pass
+        server.should_exit = True
+        server_thread.join(timeout=5)
 
 if __name__ == "__main__":
     main()
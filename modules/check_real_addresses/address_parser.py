@@ -0,0 +1,100 @@
+import re
+from typing import List, Optional, TypedDict
+
+from modules.check_real_addresses.text import (
+    NUMBER_RE,
+    POSTAL_ONLY_KEYWORDS,
+    POSTCODE_RE,
+    STREET_ABBREVIATIONS,
+    STREET_KEYWORDS,
+    normalize,
+)
+
+REPETITIONS = {"bis", "ter", "quater", "quinquies", "b", "t", "q"}
+REPETITION_NAMES = {"b": "bis", "t": "ter", "q": "quater"}
+
+NUMBER_WITH_REP_RE = re.compile(r"^(\d+)(bis|ter|quater|quinquies)$")
+TOKEN_RE = re.compile(r"[^\s,;]+")
+
+# Multi-word markers are matched on the folded text before tokenizing
+POSTAL_BOX_RE = re.compile(
+    r"\b(" + "|".join(k for k in POSTAL_ONLY_KEYWORDS if k != "cedex") + r")\.?\s*(\d+)?\b"
+)
+CEDEX_RE = re.compile(r"\bcedex\b\s*(\d+)?")
+
+
+class ParsedAddress(TypedDict):
+    number: Optional[str]
+    repetition: Optional[str]
+    street_type: Optional[str]
+    street: Optional[str]
+    postcode: Optional[str]
+    city: Optional[str]
+    cedex: Optional[str]
+    postal_box: Optional[str]
+
+
+def empty_parse() -> ParsedAddress:
+    return {
+        "number": None,
+        "repetition": None,
+        "street_type": None,
+        "street": None,
+        "postcode": None,
+        "city": None,
+        "cedex": None,
+        "postal_box": None,
+    }
+
+
+def parse_address(text: str) -> ParsedAddress:
+    """
+    Rule-based split of a free-text French address, e.g.
+    "12 bis av. Foch BP 42 75016 Paris Cedex 16".
+    """
+    parsed = empty_parse()
+    folded = normalize(text)
+
+    m = CEDEX_RE.search(folded)
+    if m:
+        parsed["cedex"] = m.group(1) or ""
+        folded = folded[:m.start()] + " " + folded[m.end():]
+
+    m = POSTAL_BOX_RE.search(folded)
+    if m:
+        parsed["postal_box"] = " ".join(g for g in m.groups() if g)
+        folded = folded[:m.start()] + " " + folded[m.end():]
+
+    tokens: List[str] = [t.rstrip(".") for t in TOKEN_RE.findall(folded)]
+    tokens = [t for t in tokens if t]
+
+    # postcode: last 5-digit token; what follows it is the city
+    for i in range(len(tokens) - 1, -1, -1):
+        if POSTCODE_RE.match(tokens[i]):
+            parsed["postcode"] = tokens[i]
+            parsed["city"] = " ".join(tokens[i + 1:]) or None
+            tokens = tokens[:i]
+            break
+
+    # house number (+ repetition index) at the start
+    if tokens:
+        m = NUMBER_WITH_REP_RE.match(tokens[0])
+        if m:
+            parsed["number"], parsed["repetition"] = m.group(1), m.group(2)
+            tokens = tokens[1:]
+        elif NUMBER_RE.match(tokens[0]):
+            parsed["number"] = tokens[0]
+            tokens = tokens[1:]
+            if tokens and tokens[0] in REPETITIONS:
+                parsed["repetition"] = REPETITION_NAMES.get(tokens[0], tokens[0])
+                tokens = tokens[1:]
+
+    if tokens:
+        first = STREET_ABBREVIATIONS.get(tokens[0], tokens[0])
+        if first in STREET_KEYWORDS:
+            parsed["street_type"] = first
+            tokens = [first] + tokens[1:]
+        parsed["street"] = " ".join(tokens)
+
+    return parsed
+
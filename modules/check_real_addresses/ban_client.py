@@ -0,0 +1,272 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from modules.check_real_addresses.engine import AimdController
+
+# Overridable so a local stand-in server can replace the real service
+BAN_BASE_URL = os.environ.get("BAN_BASE_URL", "https://api-adresse.data.gouv.fr")
+
+# api-adresse.data.gouv.fr allows 50 requests / second / IP
+BAN_RATE_LIMIT = 50.0
+BAN_BURST = 10
+
+POOL_SIZE = 32
+REQUEST_TIMEOUT = 5
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.25
+BACKOFF_MAX = 8.0
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+CONGESTION_STATUSES = {429, 503}
+LATENCY_WINDOW = 1000
+
+
+class BanLookupError(RuntimeError):
+    """The BAN service could not answer (network error or retries exhausted)."""
+
+
+def to_result(props: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn the properties of a BAN match into our {valid, score, label} result."""
+    score = float(props.get("score") or 0)
+
+    is_valid = (
+        score >= 0.8 and
+        props.get("housenumber") and
+        props.get("street") and
+        props.get("postcode") and
+        props.get("city")
+    )
+
+    return {
+        "valid": bool(is_valid),
+        "score": score,
+        "label": props.get("label")  # normalized address
+    }
+
+
+class RequestStats:
+    """Request counters and recent latencies, for the client or for one job."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._stats = {
+            "requests": 0,
+            "failures": 0,
+            "retries": 0,
+            "throttled": 0,
+            "throttle_wait_s": 0.0,
+        }
+
+    def record(self, latency: float | None = None, **deltas):
+        with self._lock:
+            for key, value in deltas.items():
+                self._stats[key] += value
+            if latency is not None:
+                self._latencies.append(latency)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            latencies = sorted(self._latencies)
+
+        if latencies:
+            stats["latency_ms"] = {
+                "p50": round(latencies[len(latencies) // 2] * 1000, 1),
+                "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1),
+                "max": round(latencies[-1] * 1000, 1),
+            }
+        else:
+            stats["latency_ms"] = None
+
+        stats["throttle_wait_s"] = round(stats["throttle_wait_s"], 3)
+        return stats
+
+
+# the job on whose behalf requests are made; lookups run on pool threads
+# inherit it through ordered_map
+_JOB_STATS: ContextVar[Optional[RequestStats]] = ContextVar("ban_job_stats", default=None)
+
+
+@contextmanager
+def tracking(stats: RequestStats):
+    """Also count the requests made inside the block in `stats`."""
+    token = _JOB_STATS.set(stats)
+    try:
+        yield stats
+    finally:
+        _JOB_STATS.reset(token)
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Take one token, blocking until available. Returns the time waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+
+            time.sleep(delay)
+            waited += delay
+
+
+def retry_after_seconds(response) -> Optional[float]:
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def backoff_delay(attempt: int) -> float:
+    # "full jitter" exponential backoff
+    cap = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt))
+    return random.uniform(0, cap)
+
+
+class BanClient:
+    """
+    Shared HTTP client for the BAN API: keep-alive connection pool,
+    client-side rate limiting and retries on transient failures.
+    """
+
+    def __init__(
+        self,
+        base_url: str = BAN_BASE_URL,
+        rate: float = BAN_RATE_LIMIT,
+        burst: int = BAN_BURST,
+        pool_size: int = POOL_SIZE,
+        timeout: float = REQUEST_TIMEOUT,
+        max_retries: int = MAX_RETRIES,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(rate, burst)
+        self.controller = AimdController(maximum=pool_size)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._totals = RequestStats()
+
+    def _record(self, latency: float | None = None, **deltas):
+        self._totals.record(latency, **deltas)
+        job = _JOB_STATS.get()
+        if job is not None:
+            job.record(latency, **deltas)
+
+    def request(self, method: str, path: str, feedback: bool = True, **kwargs) -> requests.Response:
+        """
+        `feedback` reports latency to the shared AIMD controller; turn it
+        off for requests whose latency is not comparable (batch uploads).
+        Throttling and timeouts are always reported.
+        """
+        url = f"{self.base_url}{path}"
+        kwargs.setdefault("timeout", self.timeout)
+
+        attempt = 0
+        while True:
+            self.controller.wait()
+            waited = self.bucket.acquire()
+            if waited:
+                self._record(throttle_wait_s=waited)
+
+            start = time.perf_counter()
+            response = None
+            error = None
+
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+
+            elapsed = time.perf_counter() - start
+            self._record(elapsed, requests=1)
+
+            if response is not None and response.status_code not in RETRYABLE_STATUSES:
+                if feedback:
+                    self.controller.on_success(elapsed)
+                response.raise_for_status()
+                return response
+
+            if response is not None and response.status_code == 429:
+                self._record(throttled=1)
+
+            retry_after = retry_after_seconds(response)
+
+            congested = (
+                isinstance(error, requests.Timeout) or
+                (response is not None and response.status_code in CONGESTION_STATUSES)
+            )
+            if congested:
+                self.controller.on_congestion(retry_after)
+
+            if attempt >= self.max_retries:
+                self._record(failures=1)
+                if error is not None:
+                    raise BanLookupError(str(error)) from error
+                raise BanLookupError(
+                    f"BAN returned HTTP {response.status_code} after {attempt + 1} attempts"  # type: ignore
+                )
+
+            delay = retry_after
+            if delay is None:
+                delay = backoff_delay(attempt)
+
+            self._record(retries=1)
+            attempt += 1
+            time.sleep(min(delay, BACKOFF_MAX))
+
+    def get_json(self, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        return self.request("GET", path, params=params).json()
+
+    def stats(self, job: RequestStats | None = None) -> Dict[str, Any]:
+        """Totals since startup, or the requests of one `job` only."""
+        stats = (job or self._totals).snapshot()
+        stats["concurrency"] = self.controller.snapshot()
+        return stats
+
+
+_CLIENT: Optional[BanClient] = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_client() -> BanClient:
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = BanClient()
+        return _CLIENT
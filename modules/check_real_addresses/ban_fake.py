@@ -0,0 +1,177 @@
+"""
+Local stand-in for the BAN API: `/search/` and the `/search/csv/` batch
+endpoint, answering from a fixed rule instead of the national address base,
+to run the module (and its tests) without reaching api-adresse.data.gouv.fr.
+
+    python -m modules.check_real_addresses.ban_fake --port 8765
+    BAN_BASE_URL=http://127.0.0.1:8765 python main.py
+
+A query is found when it holds a 5-digit postcode, and is a full address
+(house number, street, postcode, city) when it also starts with a number.
+"""
+import argparse
+import csv
+import io
+import json
+import re
+import threading
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+POSTCODE_RE = re.compile(r"\b(\d{5})\b")
+HOUSENUMBER_RE = re.compile(r"^\s*(\d+)\s*(?:bis|ter)?\b\s*(.*)$", re.IGNORECASE)
+
+RESULT_COLUMNS = [
+    "result_label",
+    "result_score",
+    "result_type",
+    "result_housenumber",
+    "result_name",
+    "result_street",
+    "result_postcode",
+    "result_city",
+    "result_status",
+]
+
+
+def match(query: str) -> Optional[Dict[str, Any]]:
+    """BAN-like properties of the best match for `query`, or None."""
+    postcode = POSTCODE_RE.search(query or "")
+    if not postcode:
+        return None
+
+    city = query[postcode.end():].strip(" ,") or "Ville"
+    before = query[:postcode.start()].strip(" ,")
+    number = HOUSENUMBER_RE.match(before)
+
+    if number and number.group(2):
+        street = number.group(2).strip(" ,")
+        return {
+            "label": f"{number.group(1)} {street} {postcode.group(1)} {city}",
+            "score": 0.92,
+            "type": "housenumber",
+            "housenumber": number.group(1),
+            "name": f"{number.group(1)} {street}",
+            "street": street,
+            "postcode": postcode.group(1),
+            "city": city,
+        }
+
+    return {
+        "label": f"{postcode.group(1)} {city}",
+        "score": 0.45,
+        "type": "municipality",
+        "housenumber": None,
+        "name": city,
+        "street": None,
+        "postcode": postcode.group(1),
+        "city": city,
+    }
+
+
+def multipart_field(content_type: str, body: bytes, name: str) -> Optional[bytes]:
+    message = BytesParser(policy=default_policy).parsebytes(
+        b"Content-Type: " + content_type.encode("latin-1") + b"\r\n\r\n" + body
+    )
+    for part in message.iter_parts():
+        if part.get_param("name", header="content-disposition") == name:
+            return part.get_payload(decode=True)
+    return None
+
+
+def geocode_csv(data: str, columns) -> str:
+    rows = list(csv.DictReader(io.StringIO(data)))
+    fields = list(rows[0].keys()) if rows else []
+
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=fields + RESULT_COLUMNS)
+    writer.writeheader()
+
+    for row in rows:
+        query = " ".join(row.get(c) or "" for c in columns)
+        props = match(query)
+        if props is None:
+            row["result_status"] = "not-found"
+        else:
+            row.update({f"result_{k}": "" if v is None else v for k, v in props.items()})
+            row["result_status"] = "ok"
+        writer.writerow(row)
+
+    return out.getvalue()
+
+
+class Handler(BaseHTTPRequestHandler):
+    requests = 0
+    batches = 0
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/search/":
+            return self.reply(404, b"Not found", "text/plain")
+
+        Handler.requests += 1
+        query = parse_qs(url.query).get("q", [""])[0]
+        if len(query.strip()) < 3:
+            return self.reply(400, b'{"message": "q must contain at least 3 chars"}', "application/json")
+
+        props = match(query)
+        features = [] if props is None else [{"type": "Feature", "properties": props}]
+        body = json.dumps({"type": "FeatureCollection", "features": features}).encode("utf-8")
+        self.reply(200, body, "application/json")
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/search/csv/":
+            return self.reply(404, b"Not found", "text/plain")
+
+        Handler.batches += 1
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        content_type = self.headers.get("Content-Type", "")
+
+        data = multipart_field(content_type, body, "data")
+        if data is None:
+            return self.reply(400, b'{"message": "a CSV file is required in the data field"}', "application/json")
+
+        columns = multipart_field(content_type, body, "columns")
+        columns = [columns.decode("utf-8")] if columns else None
+        text = data.decode("utf-8-sig")
+        if columns is None:
+            columns = next(csv.reader(io.StringIO(text)), [])
+
+        self.reply(200, geocode_csv(text, columns).encode("utf-8"), "text/csv; charset=utf-8")
+
+
+class Server(ThreadingHTTPServer):
+    # the default backlog of 5 drops connections under concurrent lookups,
+    # which then wait a second for the SYN retry
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def serve(host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Start the fake on a background thread; `port` 0 picks a free one."""
+    server = Server((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the BAN API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    server = Server((args.host, args.port), Handler)
+    print(f"BAN_BASE_URL=http://{args.host}:{server.server_address[1]}")
+    server.serve_forever()
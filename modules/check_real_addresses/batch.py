@@ -0,0 +1,108 @@
+import csv
+import io
+from typing import Dict, List, Optional
+
+import requests
+
+from modules.check_real_addresses.ban_client import (
+    BanClient,
+    BanLookupError,
+    get_client,
+    to_result,
+)
+from modules.check_real_addresses.engine import ordered_map
+
+BATCH_PATH = "/search/csv/"
+
+# BAN accepts files up to 50 MB; a few thousand rows per POST keeps each
+# request well under that and under the server-side processing timeout.
+BATCH_ROWS = 2000
+BATCH_PARALLELISM = 2
+BATCH_TIMEOUT = 180
+
+QUERY_COLUMN = "q"
+ID_COLUMN = "row_id"
+
+
+def build_batch_csv(queries: List[str]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([ID_COLUMN, QUERY_COLUMN])
+    for i, query in enumerate(queries):
+        writer.writerow([i, query])
+    return buffer.getvalue().encode("utf-8")
+
+
+def parse_batch_csv(text: str, count: int) -> List[Optional[dict]]:
+    results: List[Optional[dict]] = [None] * count
+
+    for line in csv.DictReader(io.StringIO(text)):
+        if line.get("result_status") != "ok":
+            continue
+
+        try:
+            i = int(line[ID_COLUMN])
+        except (KeyError, ValueError):
+            continue
+
+        if not 0 <= i < count:
+            continue
+
+        results[i] = to_result({
+            "score": line.get("result_score"),
+            "housenumber": line.get("result_housenumber"),
+            "street": line.get("result_street") or line.get("result_name"),
+            "postcode": line.get("result_postcode"),
+            "city": line.get("result_city"),
+            "label": line.get("result_label"),
+        })
+
+    return results
+
+
+def geocode_chunk(queries: List[str], client: BanClient) -> Optional[List[Optional[dict]]]:
+    """
+    Geocode one chunk through the CSV endpoint. A row maps to None when BAN
+    found nothing for it; the whole chunk is None if the POST itself failed.
+    """
+    try:
+        response = client.request(
+            "POST",
+            BATCH_PATH,
+            files={"data": ("batch.csv", build_batch_csv(queries), "text/csv")},
+            data={"columns": QUERY_COLUMN},
+            timeout=BATCH_TIMEOUT,
+            feedback=False,
+        )
+    except (BanLookupError, requests.RequestException):
+        return None
+
+    response.encoding = "utf-8"
+    return parse_batch_csv(response.text, len(queries))
+
+
+def geocode_batch(
+    queries: List[str],
+    client: BanClient | None = None,
+    chunk_rows: int = BATCH_ROWS,
+    parallelism: int = BATCH_PARALLELISM,
+) -> Dict[str, Optional[dict]]:
+    """
+    Geocode every distinct query. Returns {query: result or None}; queries
+    from chunks that could not be posted are left out of the mapping.
+    """
+    client = client or get_client()
+    unique = list(dict.fromkeys(q for q in queries if q))
+
+    chunks = [unique[i:i + chunk_rows] for i in range(0, len(unique), chunk_rows)]
+
+    results: Dict[str, Optional[dict]] = {}
+    for chunk, chunk_results in ordered_map(
+        lambda c: geocode_chunk(c, client),
+        chunks,
+        max_in_flight=parallelism,
+    ):
+        if chunk_results is not None:
+            results.update(zip(chunk, chunk_results))
+
+    return results
@@ -0,0 +1,133 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+CACHE_PATH = Path(os.environ.get(
+    "BAN_CACHE_PATH",
+    Path.home() / ".local_tool_suite" / "ban_cache.sqlite3"
+))
+
+# BAN data changes slowly; keep answers long enough to cover monthly re-runs
+CACHE_TTL = 90 * 24 * 3600
+CACHE_MAX_ENTRIES = 2_000_000
+PRUNE_EVERY = 5000
+
+
+class LookupCache:
+    """
+    Persistent query -> BAN result cache shared by every job and process.
+    A stored value of None means "BAN has no match" and is a valid hit.
+    """
+
+    def __init__(
+        self,
+        path: Path = CACHE_PATH,
+        ttl: float = CACHE_TTL,
+        max_entries: int = CACHE_MAX_ENTRIES,
+    ):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(self.path),
+            check_same_thread=False,
+            isolation_level=None,
+            timeout=10,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS lookups (
+                query TEXT PRIMARY KEY,
+                result TEXT,
+                stored_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS lookups_stored_at ON lookups(stored_at)"
+        )
+
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    def get(self, query: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """Returns (hit, result)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, stored_at FROM lookups WHERE query = ?",
+                (query,)
+            ).fetchone()
+
+            if row is None or time.time() - row[1] > self.ttl:
+                self._stats["misses"] += 1
+                return False, None
+
+            self._stats["hits"] += 1
+
+        return True, json.loads(row[0]) if row[0] is not None else None
+
+    def put(self, query: str, result: Optional[Dict[str, Any]]):
+        value = json.dumps(result) if result is not None else None
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO lookups (query, result, stored_at) VALUES (?, ?, ?)",
+                (query, value, time.time())
+            )
+            self._stats["writes"] += 1
+            self._writes_since_prune += 1
+
+            if self._writes_since_prune >= PRUNE_EVERY:
+                self._prune()
+
+    def _prune(self):
+        self._writes_since_prune = 0
+
+        expired = self._conn.execute(
+            "DELETE FROM lookups WHERE stored_at < ?",
+            (time.time() - self.ttl,)
+        ).rowcount
+
+        overflow = self._conn.execute("SELECT COUNT(*) FROM lookups").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            self._conn.execute("""
+                DELETE FROM lookups WHERE query IN (
+                    SELECT query FROM lookups ORDER BY stored_at LIMIT ?
+                )
+            """, (overflow,))
+        else:
+            overflow = 0
+
+        self._stats["evictions"] += expired + overflow
+
+    def prune(self):
+        with self._lock:
+            self._prune()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = self._conn.execute("SELECT COUNT(*) FROM lookups").fetchone()[0]
+
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else None
+        return stats
+
+
+_CACHE: Optional[LookupCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_cache() -> LookupCache:
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = LookupCache()
+        return _CACHE
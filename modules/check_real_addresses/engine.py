@@ -0,0 +1,209 @@
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, Tuple, Union
+
+DEFAULT_CONCURRENCY = 16
+MAX_CONCURRENCY = 64
+
+# AIMD tuning
+INITIAL_WINDOW = 4
+DECREASE_FACTOR = 0.5
+LATENCY_DECREASE_FACTOR = 0.9
+LATENCY_TOLERANCE = 2.0
+LATENCY_SMOOTHING = 0.2
+BASELINE_DRIFT = 0.01
+MAX_PAUSE = 60.0
+
+
+class AimdController:
+    """
+    Additive-increase / multiplicative-decrease limit on in-flight requests.
+
+    The window grows by about one slot per round trip while latency stays
+    within LATENCY_TOLERANCE of the best observed, and is halved on
+    throttling or timeouts (at most once per round trip). A Retry-After
+    pauses every caller sharing the controller.
+
+    The window is a semaphore: callers take a slot with `acquire` and give
+    it back with `release`, so every job sharing the controller stays
+    within the one window together.
+    """
+
+    def __init__(
+        self,
+        initial: int = INITIAL_WINDOW,
+        minimum: int = 1,
+        maximum: int = MAX_CONCURRENCY,
+    ):
+        self.minimum = minimum
+        self.maximum = maximum
+
+        self._lock = threading.Lock()
+        self._window = float(initial)
+        self._latency = None
+        self._baseline = None
+        self._last_decrease = 0.0
+        self._pause_until = 0.0
+        self._in_flight = 0
+        self._slots = threading.Condition(self._lock)
+        self._stats = {"successes": 0, "congestions": 0, "decreases": 0}
+
+    @property
+    def limit(self) -> int:
+        return int(self._window)
+
+    def _decrease(self, factor: float, now: float):
+        # one cut per round trip: a burst of 429s is one congestion signal
+        if now - self._last_decrease < (self._latency or 0):
+            return
+        self._window = max(self.minimum, self._window * factor)
+        self._last_decrease = now
+        self._stats["decreases"] += 1
+
+    def on_success(self, latency: float):
+        with self._lock:
+            self._stats["successes"] += 1
+
+            if self._latency is None:
+                self._latency = latency
+            else:
+                self._latency += LATENCY_SMOOTHING * (latency - self._latency)
+
+            if self._baseline is None or self._latency < self._baseline:
+                self._baseline = self._latency
+            else:
+                # let the baseline follow a lasting change of network conditions
+                self._baseline += BASELINE_DRIFT * (self._latency - self._baseline)
+
+            if self._latency > self._baseline * LATENCY_TOLERANCE:
+                self._decrease(LATENCY_DECREASE_FACTOR, time.monotonic())
+            else:
+                self._window = min(self.maximum, self._window + 1 / self._window)
+
+    def on_congestion(self, retry_after: float | None = None):
+        with self._lock:
+            now = time.monotonic()
+            self._stats["congestions"] += 1
+            self._decrease(DECREASE_FACTOR, now)
+
+            if retry_after:
+                self._pause_until = max(self._pause_until, now + min(retry_after, MAX_PAUSE))
+
+    def acquire(self, block: bool = True) -> bool:
+        """Take an in-flight slot; False if none is free and not `block`."""
+        with self._slots:
+            while self._in_flight >= max(1, self.limit):
+                if not block:
+                    return False
+                self._slots.wait()
+            self._in_flight += 1
+            return True
+
+    def release(self):
+        with self._slots:
+            self._in_flight -= 1
+            self._slots.notify_all()
+
+    def wait(self):
+        """Block while a Retry-After pause is in effect."""
+        delay = self._pause_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "window": self.limit,
+                "in_flight": self._in_flight,
+                "latency_ms": round(self._latency * 1000, 1) if self._latency is not None else None,
+                "baseline_ms": round(self._baseline * 1000, 1) if self._baseline is not None else None,
+                "paused": self._pause_until > time.monotonic(),
+                **self._stats,
+            }
+
+
+Limit = Union[int, AimdController]
+
+_END = object()
+
+
+def resolve_concurrency(value: Any) -> int:
+    if value is None:
+        return DEFAULT_CONCURRENCY
+    return max(1, min(int(value), MAX_CONCURRENCY))
+
+
+_EXECUTOR: ThreadPoolExecutor | None = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Worker threads shared by every ordered_map call, started once."""
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="lookup")
+        return _EXECUTOR
+
+
+def ordered_map(
+    fn: Callable[[Any], Any],
+    items: Iterable[Any],
+    max_in_flight: Limit = DEFAULT_CONCURRENCY,
+) -> Iterator[Tuple[Any, Any]]:
+    """
+    Run `fn` over `items` on the shared thread pool and yield `(item, result)`
+    pairs in input order. At most `max_in_flight` calls are pending at any
+    time, so memory stays bounded whatever the input size. An AimdController
+    may be passed instead of a fixed limit: each call then holds one of its
+    slots, shared with every other caller of the same controller.
+    Each call runs in a copy of the caller's context (see contextvars).
+    """
+    pending = deque()
+    source = iter(items)
+    exhausted = False
+    pool = get_executor()
+
+    controller = max_in_flight if isinstance(max_in_flight, AimdController) else None
+    local_limit = controller.maximum if controller is not None else max_in_flight
+
+    def run(item):
+        try:
+            return fn(item)
+        finally:
+            controller.release()  # type: ignore
+
+    def fill():
+        nonlocal exhausted
+        while not exhausted and len(pending) < max(1, local_limit):
+            # wait for a slot only with nothing of ours in flight: otherwise
+            # our own results free one
+            if controller is not None and not controller.acquire(block=not pending):
+                return
+
+            item = next(source, _END)
+            if item is _END:
+                exhausted = True
+                if controller is not None:
+                    controller.release()
+                return
+
+            call = fn if controller is None else run
+            pending.append((item, pool.submit(contextvars.copy_context().run, call, item)))
+
+    try:
+        fill()
+
+        while pending:
+            item, future = pending.popleft()
+            result = future.result()
+            fill()
+            yield item, result
+    finally:
+        # consumer stopped early (client disconnect, error): drop queued work
+        for _, future in pending:
+            if future.cancel() and controller is not None:
+                controller.release()
@@ -0,0 +1,176 @@
+import csv
+import io
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from openpyxl import Workbook
+
+from modules.check_real_addresses.results import RESULTS_DIR, open_results, results_path
+
+FIELD_LABELS = {
+    "valid": "Adresse valide",
+    "reason": "Raison",
+    "postal_code": "Code postal",
+    "city": "Ville",
+    "country": "Pays",
+    "confidence": "Confiance",
+}
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+FILTERS = ("all", "valid", "invalid")
+
+XLSX_MAX_ROWS = 1_048_575  # per sheet, below the header
+
+
+def export_path(job_id: str, format: str, filter: str) -> Path:
+    return results_path(job_id).with_name(f"{job_id}.{filter}.{format}")
+
+
+def filtered_batches(table: pa.Table, filter: str) -> Iterator[pa.RecordBatch]:
+    for batch in table.to_batches():
+        if filter == "valid":
+            batch = batch.filter(pc.equal(batch.column("valid"), True))
+        elif filter == "invalid":
+            batch = batch.filter(pc.invert(pc.fill_null(batch.column("valid"), False)))
+        if batch.num_rows:
+            yield batch
+
+
+def header(names: List[str]) -> List[str]:
+    return [FIELD_LABELS.get(name, name) for name in names]
+
+
+def batch_rows(batch: pa.RecordBatch) -> Iterator[tuple]:
+    return zip(*(column.to_pylist() for column in batch.columns))
+
+
+class ChunkSink(io.RawIOBase):
+    """Write-only file object whose content is drained after every write."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def csv_chunks(table: pa.Table, filter: str) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    buffer.write("\ufeff")  # Excel needs the BOM to read UTF-8
+    writer.writerow(header(table.column_names))
+
+    for batch in filtered_batches(table, filter):
+        writer.writerows(
+            ["" if value is None else value for value in row]
+            for row in batch_rows(batch)
+        )
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def parquet_chunks(table: pa.Table, filter: str) -> Iterator[bytes]:
+    sink = ChunkSink()
+    writer = pq.ParquetWriter(sink, table.schema)
+
+    for batch in filtered_batches(table, filter):
+        writer.write_batch(batch)
+        yield sink.drain()
+
+    writer.close()
+    yield sink.drain()
+
+
+def write_xlsx(table: pa.Table, filter: str, path: Path):
+    # write_only keeps one row in memory at a time; openpyxl can only
+    # produce the zip container once all rows are in, hence a file
+    wb = Workbook(write_only=True)
+    ws = None
+    rows = XLSX_MAX_ROWS
+
+    for batch in filtered_batches(table, filter):
+        for row in batch_rows(batch):
+            if rows >= XLSX_MAX_ROWS:
+                ws = wb.create_sheet(f"Results {len(wb.worksheets) + 1}" if wb.worksheets else "Results")
+                ws.append(header(table.column_names))
+                rows = 0
+            ws.append(row)  # type: ignore
+            rows += 1
+
+    if ws is None:
+        wb.create_sheet("Results").append(header(table.column_names))
+
+    wb.save(path)
+
+
+def cached(chunks: Iterator[bytes], path: Path) -> Iterator[bytes]:
+    """Pass `chunks` through while keeping a copy at `path` for next time."""
+    part = path.with_name(f"{path.name}.{os.getpid()}.{id(chunks)}.part")
+    try:
+        with part.open("wb") as out:
+            for chunk in chunks:
+                out.write(chunk)
+                yield chunk
+        part.replace(path)
+    finally:
+        # client gone mid-download: the copy is incomplete
+        part.unlink(missing_ok=True)
+
+
+def export_results(job_id: str, format: str, filter: str = "all") -> Dict[str, Any]:
+    """
+    Stream the stored results of `job_id` as csv, xlsx or parquet.
+    Exports are kept next to the results, so repeat downloads are served
+    from disk.
+    """
+    if format not in MEDIA_TYPES:
+        raise ValueError("Unsupported format")
+    if filter not in FILTERS:
+        raise ValueError(f"Unknown filter: {filter}")
+
+    filename = f"verified_addresses_{job_id}" + ("" if filter == "all" else f"_{filter}") + f".{format}"
+    response = {"filename": filename, "media_type": MEDIA_TYPES[format]}
+
+    path = export_path(job_id, format, filter)
+    if path.exists():
+        return {**response, "path": str(path)}
+
+    table = open_results(job_id)
+    RESULTS_DIR.mkdir(exist_ok=True)
+
+    if format == "xlsx":
+        part = path.with_name(f"{path.name}.{os.getpid()}.part")
+        write_xlsx(table, filter, part)
+        part.replace(path)
+        return {**response, "path": str(path)}
+
+    chunks = csv_chunks(table, filter) if format == "csv" else parquet_chunks(table, filter)
+    return {**response, "stream": cached(chunks, path)}
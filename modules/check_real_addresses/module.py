@@ -1,230 +1,464 @@
-import csv
-import json
 import math
 from pathlib import Path
-import re
-import tempfile
-import unicodedata
 import uuid
 import numpy as np
 import pandas as pd
 import requests
-from typing import Any, Dict, List, TypedDict, Optional
+from modules.check_real_addresses.ban_client import BanLookupError, RequestStats, get_client, to_result, tracking
+from modules.check_real_addresses.cache import get_cache
+from modules.check_real_addresses.batch import BATCH_PARALLELISM, BATCH_ROWS, geocode_batch
+from modules.check_real_addresses.engine import Limit, ordered_map, resolve_concurrency
+from modules.check_real_addresses.offline import get_offline_index
+from modules.check_real_addresses.postcodes import get_reference, reference_status
+from modules.check_real_addresses.results import ResultWriter
+from modules.check_real_addresses.export import export_results
+from modules.check_real_addresses.query import query_results
+from modules.check_real_addresses.address_parser import empty_parse, parse_address
+from modules.check_real_addresses.text import (
+    NUMBER_RE,
+    POSTAL_ONLY_RE,
+    POSTCODE_RE,
+    STREET_KEYWORDS_RE,
+    canonical_series,
+    map_unique,
+    normalize,
+    normalize_series,
+)
+from typing import Any, Dict, List
 from uuid import uuid4
 from threading import Lock
 
 _PROGRESS = {}
 _PROGRESS_LOCK = Lock()
 
-BAN_URL = "https://api-adresse.data.gouv.fr/search/"
+BAN_SEARCH_PATH = "/search/"
 PREVIEW_ROWS = 50
 
-POSTCODE_RE = re.compile(r"^\d{5}$")
-NUMBER_RE = re.compile(r"^\d+[a-zA-Z]?$")
-
-POSTAL_ONLY_KEYWORDS = ["bp", "boite postale", "cedex", "cs"]
-
-STREET_KEYWORDS = [
-    "rue", "avenue", "av", "boulevard", "bd",
-    "chemin", "route", "impasse", "allee",
-    "place", "quai", "cours"
-]
-
-FIELD_LABELS = {
-    "valid": "Adresse valide",
-    "reason": "Raison",
-    "postal_code": "Code postal",
-    "city": "Ville",
-    "country": "Pays",
-    "confidence": "Confiance",
-}
-
-class AddressParts(TypedDict):
-    number: Optional[str]
-    street: Optional[str]
-    postcode: Optional[str]
-    city: Optional[str]
-    mixed: List[str]
+CLASSIFY_SAMPLE = 500
+CHUNK_ROWS = 1000
+# chunks start small and double, so the first rows come back quickly
+FIRST_CHUNK_ROWS = 16
 
 def is_postal_only(text: str) -> bool:
+    """BP / CS / CEDEX markers with no street in `text`."""
     t = normalize(text)
-    return any(k in t for k in POSTAL_ONLY_KEYWORDS)
+    return bool(POSTAL_ONLY_RE.search(t)) and not STREET_KEYWORDS_RE.search(t)
 
-def normalize(text: str) -> str:
-    text = text.lower().strip()
-    return "".join(
-        c for c in unicodedata.normalize("NFD", text)
-        if unicodedata.category(c) != "Mn"
-    )
+
+def canonical_keys(df, columns: List[str]) -> List[str]:
+    """One key per row: two rows with the same key are the same address."""
+    if not columns:
+        raise ValueError("Select at least one address column")
+
+    keys = canonical_series(column_text(df[columns[0]]))
+    if len(columns) > 1:
+        keys = keys.str.cat(
+            [canonical_series(column_text(df[col])) for col in columns[1:]],
+            sep="|"
+        )
+    return keys.tolist()
+
+
+def classify_sample(series, size: int = CLASSIFY_SAMPLE):
+    """Up to `size` non-empty values spread evenly over the whole column."""
+    # as the parts are built: integer columns with blanks are not read as 12.0
+    values = column_text(series)
+    values = values[values != ""]
+    if len(values) <= size:
+        return values
+    positions = np.linspace(0, len(values) - 1, size).astype(int)
+    return values.iloc[positions]
 
 
 def classify_column(series) -> str:
-    sample = series.dropna().astype(str).head(20)
+    sample = classify_sample(series).str.strip()
+
+    is_postcode = sample.str.match(POSTCODE_RE)
+    is_number = ~is_postcode & sample.str.match(NUMBER_RE)
+    rest = ~(is_postcode | is_number)
+    is_street = rest & normalize_series(sample).str.contains(STREET_KEYWORDS_RE)
+    rest &= ~is_street
+    is_mixed = rest & sample.str.contains(r"\d")
 
     scores = {
-        "postcode": 0,
-        "number": 0,
-        "street": 0,
-        "city": 0,
-        "mixed": 0,
+        "postcode": int(is_postcode.sum()),
+        "number": int(is_number.sum()),
+        "street": int(is_street.sum()),
+        "city": int((rest & ~is_mixed).sum()),
+        "mixed": int(is_mixed.sum()),
     }
 
-    for v in sample:
-        v = v.strip()
-        nv = normalize(v)
-
-        if POSTCODE_RE.match(v):
-            scores["postcode"] += 1
-        elif NUMBER_RE.match(v):
-            scores["number"] += 1
-        elif any(k in nv for k in STREET_KEYWORDS):
-            scores["street"] += 1
-        elif any(c.isdigit() for c in v):
-            scores["mixed"] += 1
+    return max(scores.items(), key=lambda item: item[1])[0]
+
+
+ADDRESS_PARTS = ("number", "street", "postcode", "city")
+
+
+def column_text(series):
+    """Column as stripped, whitespace-folded strings; missing values become ''."""
+    if pd.api.types.is_float_dtype(series) and (series.dropna() % 1 == 0).all():
+        # integer columns with blanks are read as float: 75001.0 -> 75001
+        series = series.astype("Int64")
+
+    text = series.astype(str).str.replace(r"\s+", " ", regex=True).str.strip()
+    return text.where(series.notna(), "")
+
+
+def address_parts(df, column_types: Dict[str, str]):
+    """
+    Column-wise split of the selected columns into number/street/postcode/city
+    Series plus a list of free-text (mixed) Series. Free text is run through
+    the local parser, which fills the parts no column provided.
+    """
+    empty = pd.Series("", index=df.index, dtype=object)
+    parts = {name: empty for name in ADDRESS_PARTS}
+    mixed = []
+
+    for col, col_type in column_types.items():
+        value = column_text(df[col])
+
+        if col_type in ADDRESS_PARTS:
+            # first non-empty value of a type wins, extra ones are free text
+            free = parts[col_type] == ""
+            mixed.append(value.where(~free, ""))
+            parts[col_type] = parts[col_type].where(~free, value)
         else:
-            scores["city"] += 1
+            mixed.append(value)
 
-    return max(scores.items(), key=lambda item: item[1])[0]
+    if mixed:
+        free_text = mixed[0].str.cat(mixed[1:], sep=" ").str.strip() if len(mixed) > 1 else mixed[0]
+        parsed = pd.DataFrame.from_records(
+            map_unique(free_text, parse_address).tolist(), index=df.index
+        )
+    else:
+        parsed = pd.DataFrame.from_records([empty_parse()] * len(df), index=df.index)
+
+    number = parsed["number"].fillna("")
+    repetition = parsed["repetition"].fillna("")
+    number = (number + " " + repetition).str.strip()
+
+    found = {
+        "number": number,
+        "street": parsed["street"].fillna(""),
+        "postcode": parsed["postcode"].fillna(""),
+        "city": parsed["city"].fillna(""),
+    }
+    for name in ADDRESS_PARTS:
+        parts[name] = parts[name].where(parts[name] != "", found[name])
 
+    # Excel drops the leading zero of numeric postcodes (01000 -> 1000)
+    parts["postcode"] = parts["postcode"].str.replace(r"^(\d{4})$", r"0\1", regex=True)
 
-def build_address_candidates(parts: AddressParts) -> List[str]:
-    candidates = []
+    return parts, mixed, parsed
 
-    n = parts.get("number")
-    s = parts.get("street")
-    p = parts.get("postcode")
-    c = parts.get("city")
 
-    # Ideal French postal format
-    if all([n, s, p, c]):
-        candidates.append(f"{n} {s} {p} {c}")
+def build_address_candidates(df, column_types: Dict[str, str]) -> np.ndarray:
+    parts, mixed, _ = address_parts(df, column_types)
+    return candidate_matrix(parts, mixed)
 
-    # Street + city + postcode
-    if s and c and p:
-        candidates.append(f"{s} {p} {c}")
 
-    # Number + street
-    if n and s:
-        candidates.append(f"{n} {s}")
+def candidate_matrix(parts, mixed) -> np.ndarray:
+    """
+    Candidate queries for every row, built column-wise. Returns a
+    (rows x candidates) object array in priority order; '' marks no
+    candidate (missing parts or a duplicate of an earlier one in the row).
+    """
+    n, s, p, c = (parts[name] for name in ADDRESS_PARTS)
+    has_n, has_s, has_p, has_c = (parts[name] != "" for name in ADDRESS_PARTS)
 
-    # Known merged fields
-    for m in parts.get("mixed", []):
-        candidates.append(m)
+    candidates = [
+        # Ideal French postal format
+        (n + " " + s + " " + p + " " + c).where(has_n & has_s & has_p & has_c, ""),
+        # Street + city + postcode
+        (s + " " + p + " " + c).where(has_s & has_p & has_c, ""),
+        # Number + street
+        (n + " " + s).where(has_n & has_s, ""),
+        # Known merged fields
+        *mixed,
+        # Last resort: everything concatenated
+        (n + " " + s + " " + p + " " + c).str.replace(r"\s+", " ", regex=True).str.strip(),
+    ]
 
-    # Last resort: everything concatenated
-    flat = " ".join(
-        v for v in [n, s, p, c]
-        if isinstance(v, str)
-    )
-    if flat:
-        candidates.append(flat)
+    matrix = np.column_stack([cand.to_numpy(dtype=object) for cand in candidates])
+
+    # Deduplicate within each row, keeping the first occurrence
+    for j in range(1, matrix.shape[1]):
+        for i in range(j):
+            matrix[matrix[:, j] == matrix[:, i], j] = ""
+
+    return matrix
+
+def cache_key(address: str) -> str:
+    return " ".join(normalize(address).split())
+
+
+def uses_ban(options: Dict[str, Any]) -> bool:
+    return options.get("backend", "api") != "offline"
+
+
+def ban_stats(options: Dict[str, Any], stats: Dict[str, Any]) -> Dict[str, Any] | None:
+    """BAN request stats of one job; None on the offline backend."""
+    return get_client().stats(stats["ban"]) if uses_ban(options) else None
 
-    # Deduplicate
-    return list(dict.fromkeys(a.strip() for a in candidates if a.strip()))
 
 def validate_with_ban(address: str) -> dict | None:
+    """
+    Returns None when BAN has no match for `address`.
+    Raises BanLookupError when the service itself could not be reached.
+    """
+    cache = get_cache()
+    key = cache_key(address)
+
+    hit, cached = cache.get(key)
+    if hit:
+        return cached
+
     params = {
         "q": address,
         "limit": 1
     }
 
     try:
-        r = requests.get(BAN_URL, params=params, timeout=3)
-        r.raise_for_status()
-        data = r.json()
+        data = get_client().get_json(BAN_SEARCH_PATH, params)
 
         if not data.get("features"):
-            return None
+            result = None
+        else:
+            result = to_result(data["features"][0]["properties"])
 
-        props = data["features"][0]["properties"]
-        score = float(props.get("score", 0))
-        has_number = bool(props.get("housenumber"))
-        is_named_place = props.get("type") in ("poi", "place")
+    except requests.HTTPError:
+        # 4xx: BAN rejected the query itself (too short, malformed...)
+        result = None
 
+    except (requests.RequestException, ValueError):
+        # truncated or unreadable answer: no match for this row, but not
+        # cached, the next lookup may well succeed
+        return None
 
-        is_valid = (
-            props.get("score", 0) >= 0.8 and
-            props.get("housenumber") and
-            props.get("street") and
-            props.get("postcode") and
-            props.get("city")
-        )
+    cache.put(key, result)
+    return result
 
-        return {
-            "valid": bool(is_valid),
-            "score": score,
-            "label": props.get("label")  # normalized address
-        }
 
-    except requests.RequestException:
-        return None
+def geocode_batch_cached(queries: List[str]) -> Dict[str, dict | None]:
+    cache = get_cache()
+    found = {}
+    missing = []
 
+    for query in dict.fromkeys(queries):
+        hit, cached = cache.get(cache_key(query))
+        if hit:
+            found[query] = cached
+        else:
+            missing.append(query)
 
-def explain_result(result: dict) -> str:
-    if result["score"] is None:
-        return "No match found"
+    for query, result in geocode_batch(missing).items():
+        cache.put(cache_key(query), result)
+        found[query] = result
 
-    if result["score"] < 0.6:
-        return "Address not recognized"
+    return found
 
-    if result["score"] < 0.8:
-        return "Low confidence match"
 
-    return "Missing delivery details"
+def prevalidate(parts, mixed) -> np.ndarray:
+    """
+    Offline first pass. Returns, per row, the reason it is certainly
+    invalid, or None when it still needs a geocoder lookup.
+    """
+    reference = get_reference()
+    postcode, city = parts["postcode"], parts["city"]
+
+    text = parts["street"]
+    for value in mixed:
+        text = text + " " + value
+
+    normalized = normalize_series(text)
+    postal_only = (
+        (parts["number"] == "")
+        & normalized.str.contains(POSTAL_ONLY_RE)
+        & ~normalized.str.contains(STREET_KEYWORDS_RE)
+    )
+    malformed = (postcode != "") & ~postcode.str.match(POSTCODE_RE)
 
+    reasons = np.full(len(postcode), None, dtype=object)
 
-def validate_row(row, column_types: Dict[str, str]) -> dict:
-    parts: AddressParts = {
-        "number": None,
-        "street": None,
-        "postcode": None,
-        "city": None,
-        "mixed": []
-    }
+    if reference is not None:
+        checkable = (postcode != "") & ~malformed
+        unknown = checkable & map_unique(postcode, reference.unknown).astype(bool)
 
-    for col, col_type in column_types.items():
-        value = str(row[col]).strip()
-        if not value:
+        pairs = postcode + "|" + city
+        known = checkable & map_unique(postcode, reference.known).astype(bool)
+        mismatch = known & (city != "") & ~map_unique(
+            pairs, lambda pair: reference.matches(*pair.split("|", 1))
+        ).astype(bool)
+
+        reasons[mismatch.to_numpy()] = "Postcode does not match city"
+        reasons[unknown.to_numpy()] = "Unknown postcode"
+
+    reasons[malformed.to_numpy()] = "Malformed postcode"
+    reasons[postal_only.to_numpy()] = "Postal box only (no street address)"
+
+    return reasons
+
+
+def explain_results(score: np.ndarray, error: np.ndarray) -> np.ndarray:
+    return np.select(
+        [(error != None) & (score == 0), score == 0, score < 0.6, score < 0.8],  # noqa: E711
+        ["Address service unavailable", "No match found", "Address not recognized", "Low confidence match"],
+        default="Missing delivery details"
+    )
+
+
+def run_lookups(queries: List[str], lookup, concurrency: Limit) -> list:
+    """Look every query up concurrently; returns (result, error) pairs in order."""
+    def safe_lookup(query):
+        try:
+            return lookup(query), None
+        except BanLookupError as e:
+            return None, str(e)
+
+    return [out for _, out in ordered_map(safe_lookup, queries, max_in_flight=concurrency)]
+
+
+def run_batch_lookups(queries: List[str], concurrency: Limit) -> list:
+    """BAN CSV batch pass, with per-query lookups for chunks that failed to post."""
+    found = geocode_batch_cached(queries)
+    missing = [q for q in queries if q not in found]
+    retried = dict(zip(missing, run_lookups(missing, validate_with_ban, concurrency)))
+
+    return [(found[q], None) if q in found else retried[q] for q in queries]
+
+
+def validate_candidates(candidates: np.ndarray, backend: str, concurrency: Limit) -> pd.DataFrame:
+    """
+    Validate a (rows x candidates) matrix. Candidates are tried rank by rank
+    and a row stops at its first valid match, as a sequential per-row loop
+    would, but each rank only looks up the distinct queries still needed.
+    """
+    if backend == "offline":
+        lookup = get_offline_index().lookup
+    elif backend in ("api", "batch"):
+        lookup = validate_with_ban
+    else:
+        raise ValueError(f"Unknown backend: {backend}")
+
+    rows = candidates.shape[0]
+    valid = np.zeros(rows, dtype=bool)
+    score = np.zeros(rows, dtype=float)
+    address = np.full(rows, None, dtype=object)
+    error = np.full(rows, None, dtype=object)
+
+    for rank in range(candidates.shape[1]):
+        active = np.flatnonzero(~valid & (candidates[:, rank] != ""))
+        if not len(active):
             continue
 
-        if col_type in ("number", "street", "postcode", "city"):
-            if parts[col_type] is None:
-                parts[col_type] = value
-            else:
-                parts["mixed"].append(value)
+        codes, queries = pd.factorize(candidates[active, rank])
+        queries = list(queries)
+
+        if backend == "batch" and rank == 0:
+            found = run_batch_lookups(queries, concurrency)
         else:
-            parts["mixed"].append(value)
+            found = run_lookups(queries, lookup, concurrency)
 
-    best_score = 0.0
-    best_label = None
+        q_valid = np.array([bool(r and r["valid"]) for r, _ in found])
+        q_score = np.array([r["score"] if r else 0.0 for r, _ in found], dtype=float)
+        q_label = np.array([r["label"] if r else None for r, _ in found], dtype=object)
+        q_error = np.array([e for _, e in found], dtype=object)
 
-    for addr in build_address_candidates(parts):
-        result = validate_with_ban(addr)
-        if not result:
-            continue
+        failed = q_error[codes] != None  # noqa: E711
+        error[active[failed]] = q_error[codes][failed]
 
-        if result["score"] > best_score:
-            best_score = result["score"]
-            best_label = result["label"]
+        # keep the best score seen so far, or the first valid match
+        better = (q_score[codes] > score[active]) | q_valid[codes]
+        score[active[better]] = q_score[codes][better]
+        address[active[better]] = q_label[codes][better]
+        valid[active] = q_valid[codes]
 
-        if result["valid"]:
-            return {
-                "valid": True,
-                "score": result["score"],
-                "address": result["label"],
-                "reason": "Valid postal address"
-            }
+    reason = np.where(valid, "Valid postal address", explain_results(score, error))
 
-    return {
-    "valid": False,
-    "score": best_score if best_score > 0 else None,
-    "address": best_label,
-    "reason": explain_result({
-        "score": best_score
+    return pd.DataFrame({
+        "valid": valid,
+        "score": np.where(score > 0, score, np.nan),
+        "address": address,
+        "reason": reason,
     })
-   }
 
 
+def validate_chunks(df, column_types: Dict[str, str], options: Dict[str, Any], stats: Dict[str, Any] | None = None):
+    """
+    Validate `df` in chunks of distinct addresses. Yields `(rows, results)`
+    pairs covering the whole frame in order, where `results` holds typed
+    valid/score/address/reason columns aligned with `rows`.
+
+    Rows sharing the same canonical address are validated once and the
+    result is copied to every duplicate.
+    """
+    backend = options.get("backend", "api")
+    concurrency = options.get("concurrency", "auto")
+
+    if concurrency == "auto" and uses_ban(options):
+        # shared across jobs: BAN limits apply to the whole machine
+        concurrency = get_client().controller
+    else:
+        concurrency = resolve_concurrency(None if concurrency == "auto" else concurrency)
+    if backend == "batch":
+        chunk_rows = size = BATCH_ROWS * BATCH_PARALLELISM
+    else:
+        chunk_rows, size = CHUNK_ROWS, FIRST_CHUNK_ROWS
+
+    # factorize numbers keys in order of first appearance
+    codes, keys = pd.factorize(pd.Series(canonical_keys(df, list(column_types))))
+    first_positions = np.unique(codes, return_index=True)[1]
+
+    tracked = RequestStats()
+    if stats is not None:
+        stats["unique_addresses"] = len(keys)
+        stats["prevalidated_invalid"] = 0
+        stats["ban"] = tracked
+
+    unique_results = {
+        "valid": np.zeros(len(keys), dtype=bool),
+        "score": np.full(len(keys), np.nan),
+        "address": np.full(len(keys), None, dtype=object),
+        "reason": np.full(len(keys), None, dtype=object),
+    }
+    emitted = start = 0
+
+    while start < len(keys):
+        chunk = df.iloc[first_positions[start:start + size]]
+        size = min(size * 2, chunk_rows)
+        parts, mixed, _ = address_parts(chunk, column_types)
+        candidates = candidate_matrix(parts, mixed)
+
+        if options.get("prevalidate", True):
+            rejected = prevalidate(parts, mixed)
+            # rejected rows keep no candidate, so they cost no lookup
+            candidates[rejected != None] = ""  # noqa: E711
+        else:
+            rejected = np.full(len(chunk), None, dtype=object)
+
+        with tracking(tracked):
+            results = validate_candidates(candidates, backend, concurrency)
+        results["reason"] = np.where(rejected != None, rejected, results["reason"])  # noqa: E711
+
+        if stats is not None:
+            stats["prevalidated_invalid"] += int((rejected != None).sum())  # noqa: E711
+
+        done = start + len(chunk)
+
+        for name, values in unique_results.items():
+            values[start:done] = results[name].to_numpy()
+
+        # every row up to the first not-yet-validated address can go out
+        pending = np.flatnonzero(codes[emitted:] >= done)
+        stop = emitted + pending[0] if len(pending) else len(df)
+
+        yield df.iloc[emitted:stop], pd.DataFrame({
+            name: values[codes[emitted:stop]]
+            for name, values in unique_results.items()
+        })
+        emitted = stop
+        start = done
+
 
 def load_preview(payload: Dict[str, Any]) -> Dict[str, Any]:
     file_path = Path(payload["file_path"])
@@ -253,27 +487,38 @@ def verify_addresses(payload: Dict[str, Any]) -> Dict[str, Any]:
         for col in selected_columns
     }
 
-    results = df.apply(
-        lambda row: validate_row(row, column_types),
-        axis=1
-    )
+    stats: Dict[str, Any] = {}
+    chunks = [r for _, r in validate_chunks(df, column_types, payload, stats)]
+    # an empty sheet yields no chunk
+    results = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame({
+        "valid": np.zeros(0, dtype=bool),
+        "score": np.zeros(0),
+        "address": np.full(0, None, dtype=object),
+        "reason": np.full(0, None, dtype=object),
+    })
 
     df_result = df[selected_columns].copy()
-    df_result["valid"] = results.apply(lambda r: r["valid"])
-    df_result["score"] = results.apply(lambda r: r["score"])
-    df_result["normalized_address"] = results.apply(lambda r: r["address"])
+    df_result["valid"] = results["valid"].to_numpy()
+    df_result["score"] = results["score"].to_numpy()
+    df_result["normalized_address"] = results["address"].to_numpy()
+    df_result["reason"] = results["reason"].to_numpy()
 
     invalid = df_result[~df_result["valid"]]
     valid = df_result[df_result["valid"]]
 
     return {
         "checked": int(len(df_result)),
+        "unique_addresses": stats["unique_addresses"],
+        "prevalidated_invalid": stats["prevalidated_invalid"],
         "valid": int(valid.shape[0]),
         "invalid": int(invalid.shape[0]),
-        "invalid_samples": invalid.head(20).to_dict(orient="records"),
-        "valid_samples": valid.head(20).to_dict(orient="records")
+        "invalid_samples": sanitize_for_json(invalid.head(20).to_dict(orient="records")),
+        "valid_samples": sanitize_for_json(valid.head(20).to_dict(orient="records")),
+        "ban_stats": ban_stats(payload, stats),
+        "cache_stats": get_cache().stats()
     }
 
+
 def stream(payload: Dict[str, Any]):
     file_path = Path(payload["file_path"])
     selected_columns = payload["columns"]
@@ -285,53 +530,45 @@ def stream(payload: Dict[str, Any]):
 
     yield { "type": "started", "job_id": job_id }
 
-    RESULTS_DIR = Path(tempfile.gettempdir()) / "module_results"
-    RESULTS_DIR.mkdir(exist_ok=True)
-
-    result_path = RESULTS_DIR / f"{job_id}.jsonl"
-
     column_types = {
         col: classify_column(df[col])
         for col in selected_columns
     }
 
-    valid_count = 0
-    invalid_count = 0
-    valid_samples = []
-    invalid_samples = []
-
-    with result_path.open("a", encoding="utf-8-sig") as f:
-        for idx, row in df.iterrows():
-            result = validate_row(row, column_types)
-            output = { **row.to_dict(), **result }
-
-            f.write(json.dumps(output) + "\n")
-
-            if result["valid"]:
-                valid_count += 1
-                if len(valid_samples) < 20:
-                    valid_samples.append(output)
-            else:
-                invalid_count += 1
-                if len(invalid_samples) < 20:
-                    invalid_samples.append(output)
-
-            yield {
-                "type": "progress",
-                "current": idx + 1, # type: ignore
-                "total": total,
-                "message": f"Validated {idx + 1} / {total}" # type: ignore
-            }
-
-    yield {
+    stats: Dict[str, Any] = {}
+    writer = ResultWriter(job_id, df.columns)
+    controller = get_client().controller if uses_ban(payload) else None
+    done = 0
+
+    try:
+        for rows, results in validate_chunks(df, column_types, payload, stats):
+            writer.write(rows, results)
+            concurrency = controller.snapshot() if controller is not None else None
+
+            for _ in range(len(rows)):
+                done += 1
+                yield {
+                    "type": "progress",
+                    "current": done,
+                    "total": total,
+                    "message": f"Validated {done} / {total}",
+                    "concurrency": concurrency
+                }
+    except BaseException:
+        writer.discard()
+        raise
+
+    summary = writer.close(
+        unique_addresses=stats["unique_addresses"],
+        prevalidated_invalid=stats["prevalidated_invalid"]
+    )
+
+    yield sanitize_for_json({
         "type": "done",
-        "job_id": job_id,
-        "checked": total,
-        "valid": valid_count,
-        "invalid": invalid_count,
-        "valid_samples": valid_samples,
-        "invalid_samples": invalid_samples
-    }
+        **summary,
+        "ban_stats": ban_stats(payload, stats),
+        "cache_stats": get_cache().stats()
+    })
 
 
 
@@ -344,8 +581,16 @@ def run(payload: Dict[str, Any]) -> Dict[str, Any]:
     if action == "verify":
         return verify_addresses(payload)
 
+    if action == "query":
+        return sanitize_for_json(query_results(payload["job_id"], payload))
+
     raise ValueError(f"Unknown action: {action}")
 
+
+def health() -> Dict[str, Any]:
+    """Reported by /api/health: a missing postcode table disables most prevalidation."""
+    return {"postcode_reference": reference_status()}
+
 def sanitize_for_json(obj: Any) -> Any:
     """
     Recursively convert Pandas / NumPy values into JSON-safe Python types.
@@ -399,50 +644,15 @@ def finish_progress(job_id: str):
             _PROGRESS[job_id]["done"] = True
 
 def download(payload: Dict[str, Any], format: str | None = None):
-    if format != "csv":
-        raise ValueError("Unsupported format")
-
     job_id = payload.get("job_id")
-    if not job_id:
-        raise ValueError("Missing job_id")
-
-    RESULTS_DIR = Path(tempfile.gettempdir()) / "module_results"
-    source = RESULTS_DIR / f"{job_id}.jsonl"
-
-    if not source.exists():
-        raise ValueError("Results not found")
-
-    fd, csv_path = tempfile.mkstemp(suffix=".csv")
-
-    with source.open("r", encoding="utf-8-sig") as src, \
-         open(fd, "w", newline="", encoding="utf-8-sig") as out:
-
-        writer = None
-        fieldnames = None
-
-        for line in src:
-            row = json.loads(line)
 
-            # First row → define schema
-            if fieldnames is None:
-                fieldnames = list(row.keys())
+    if not job_id and payload.get("file_path"):
+        # No stored job yet: validate the file now, then export it
+        for event in stream(payload):
+            if event["type"] == "done":
+                job_id = event["job_id"]
 
-                headers = [
-                    FIELD_LABELS.get(name, name)
-                    for name in fieldnames
-                ]
-
-                writer = csv.writer(out)
-                writer.writerow(headers)
-
-            # Write row values in the same order
-            writer.writerow([ # type: ignore
-                row.get(name, "")
-                for name in fieldnames
-            ])
+    if not job_id:
+        raise ValueError("Missing job_id")
 
-    return {
-        "path": csv_path,
-        "filename": f"verified_addresses_{job_id}.csv",
-        "media_type": "text/csv"
-    }
+    return export_results(job_id, format or "csv", payload.get("filter", "all"))
@@ -0,0 +1,288 @@
+import argparse
+import csv
+import gzip
+import io
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+from modules.check_real_addresses.ban_client import to_result
+from modules.check_real_addresses.text import canonical_text
+
+OFFLINE_INDEX_PATH = Path(os.environ.get(
+    "BAN_OFFLINE_PATH",
+    Path.home() / ".local_tool_suite" / "ban_offline.sqlite3"
+))
+
+# Public BAN export, one gzipped ';'-separated CSV per département
+BAN_EXPORT_URL = "https://adresse.data.gouv.fr/data/ban/adresses/latest/csv/adresses-{dept}.csv.gz"
+
+INSERT_BATCH = 10_000
+SEARCH_CANDIDATES = 10
+
+HOUSENUMBER_RE = re.compile(r"^\s*(\d+)\s*(bis|ter|quater|[a-z])?\b", re.IGNORECASE)
+POSTCODE_TOKEN_RE = re.compile(r"\b(\d{5})\b")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS streets (
+    id INTEGER PRIMARY KEY,
+    departement TEXT NOT NULL,
+    name TEXT NOT NULL,
+    postcode TEXT NOT NULL,
+    city TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS streets_departement ON streets(departement);
+
+CREATE TABLE IF NOT EXISTS housenumbers (
+    street_id INTEGER NOT NULL,
+    number INTEGER NOT NULL,
+    rep TEXT NOT NULL,
+    PRIMARY KEY (street_id, number, rep)
+) WITHOUT ROWID;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS streets_fts USING fts5(
+    name, city, postcode,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(path), check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def read_only_uri(path: Path) -> str:
+    # as_uri() percent-encodes spaces, '?' and '#' that would break the URI
+    return Path(path).resolve().as_uri() + "?mode=ro"
+
+
+def open_export(source: str) -> io.TextIOBase:
+    if source.endswith(".gz"):
+        return io.TextIOWrapper(gzip.open(source, "rb"), encoding="utf-8")
+    return open(source, "r", encoding="utf-8")
+
+
+def download_export(dept: str) -> str:
+    fd, path = tempfile.mkstemp(suffix=".csv.gz")
+    with requests.get(BAN_EXPORT_URL.format(dept=dept), stream=True, timeout=60) as r:
+        r.raise_for_status()
+        with open(fd, "wb") as out:
+            for chunk in r.iter_content(chunk_size=1 << 20):
+                out.write(chunk)
+    return path
+
+
+def read_export(source: str) -> Iterable[Tuple[str, str, str, int, str]]:
+    """Yields (street, postcode, city, number, rep) per address."""
+    with open_export(source) as f:
+        for line in csv.DictReader(f, delimiter=";"):
+            try:
+                number = int(line["numero"])
+            except (KeyError, ValueError):
+                continue
+
+            yield (
+                line["nom_voie"],
+                line["code_postal"],
+                line["nom_commune"],
+                number,
+                (line.get("rep") or "").lower(),
+            )
+
+
+def import_departement(dept: str, source: str | None = None, path: Path = OFFLINE_INDEX_PATH) -> Dict[str, int]:
+    """
+    (Re)build the index rows of one département from a BAN CSV export.
+    `source` is a local .csv/.csv.gz file; it is downloaded when omitted.
+    """
+    downloaded = source is None
+    if downloaded:
+        source = download_export(dept)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = connect(path)
+
+    streets: Dict[Tuple[str, str, str], int] = {}
+    numbers: List[Tuple[int, int, str]] = []
+    addresses = 0
+
+    try:
+        with conn:
+            old_ids = "SELECT id FROM streets WHERE departement = ?"
+            conn.execute(f"DELETE FROM housenumbers WHERE street_id IN ({old_ids})", (dept,))
+            conn.execute(f"DELETE FROM streets_fts WHERE rowid IN ({old_ids})", (dept,))
+            conn.execute("DELETE FROM streets WHERE departement = ?", (dept,))
+
+            next_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM streets").fetchone()[0]
+
+            for street, postcode, city, number, rep in read_export(source):  # type: ignore
+                key = (street, postcode, city)
+                street_id = streets.get(key)
+
+                if street_id is None:
+                    street_id = streets[key] = next_id
+                    next_id += 1
+                    conn.execute(
+                        "INSERT INTO streets (id, departement, name, postcode, city) VALUES (?, ?, ?, ?, ?)",
+                        (street_id, dept, street, postcode, city)
+                    )
+                    conn.execute(
+                        "INSERT INTO streets_fts (rowid, name, city, postcode) VALUES (?, ?, ?, ?)",
+                        (street_id, street, city, postcode)
+                    )
+
+                numbers.append((street_id, number, rep))
+                addresses += 1
+
+                if len(numbers) >= INSERT_BATCH:
+                    conn.executemany("INSERT OR IGNORE INTO housenumbers VALUES (?, ?, ?)", numbers)
+                    numbers.clear()
+
+            conn.executemany("INSERT OR IGNORE INTO housenumbers VALUES (?, ?, ?)", numbers)
+
+            # merge the FTS segments written by the import, in the same commit
+            conn.execute("INSERT INTO streets_fts(streets_fts) VALUES ('optimize')")
+    finally:
+        conn.close()
+        if downloaded:
+            os.remove(source)  # type: ignore
+
+    return {"departement": dept, "streets": len(streets), "addresses": addresses}  # type: ignore
+
+
+def search_tokens(text: str) -> List[str]:
+    # drop short filler words ("de", "la", "l") that carry no signal
+    return [t for t in text.split() if len(t) > 2 and not t.isdigit()]
+
+
+def token_similarity(a: List[str], b: List[str]) -> float:
+    if not a or not b:
+        return 0.0
+    common = len(set(a) & set(b))
+    return 2 * common / (len(set(a)) + len(set(b)))
+
+
+class OfflineIndex:
+    """
+    Local stand-in for the BAN search API, backed by an SQLite FTS5 index
+    of the BAN export. `lookup` has the same contract as validate_with_ban.
+    """
+
+    def __init__(self, path: Path = OFFLINE_INDEX_PATH):
+        if not Path(path).exists():
+            raise ValueError(
+                f"Offline address index not found at {path}; "
+                "import a département first (python -m modules.check_real_addresses.offline 75)"
+            )
+        self.path = Path(path)
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        # one read connection per worker thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(
+                read_only_uri(self.path), uri=True, check_same_thread=False
+            )
+        return conn
+
+    def lookup(self, address: str) -> dict | None:
+        text = canonical_text(address)
+
+        number, rep = None, ""
+        m = HOUSENUMBER_RE.match(text)
+        if m:
+            number = int(m.group(1))
+            rep = (m.group(2) or "").lower()
+            text = text[m.end():]
+
+        postcode = None
+        m = POSTCODE_TOKEN_RE.search(text)
+        if m:
+            postcode = m.group(1)
+            text = text[:m.start()] + text[m.end():]
+
+        tokens = search_tokens(text)
+        if not tokens:
+            return None
+
+        match = " OR ".join(f'"{t}"' for t in tokens)
+        if postcode:
+            match = f'({match}) AND postcode:"{postcode}"'
+
+        conn = self._conn()
+        rows = conn.execute(
+            """
+            SELECT s.id, s.name, s.postcode, s.city
+            FROM streets_fts f JOIN streets s ON s.id = f.rowid
+            WHERE streets_fts MATCH ?
+            ORDER BY f.rank
+            LIMIT ?
+            """,
+            (match, SEARCH_CANDIDATES)
+        ).fetchall()
+
+        best = None
+        for street_id, name, street_postcode, city in rows:
+            similarity = token_similarity(tokens, search_tokens(canonical_text(f"{name} {city}")))
+
+            if postcode is None:
+                postcode_score = 0.5
+            else:
+                postcode_score = 1.0 if postcode == street_postcode else 0.0
+
+            housenumber = None
+            if number is not None:
+                found = conn.execute(
+                    "SELECT rep FROM housenumbers WHERE street_id = ? AND number = ? ORDER BY rep = ? DESC, rep LIMIT 1",
+                    (street_id, number, rep)
+                ).fetchone()
+                if found is not None:
+                    housenumber = f"{number} {found[0]}".strip()
+
+            number_score = 1.0 if housenumber else (0.5 if number is None else 0.0)
+            score = 0.6 * similarity + 0.2 * postcode_score + 0.2 * number_score
+
+            if best is None or score > best["score"]:
+                prefix = f"{housenumber} " if housenumber else ""
+                best = {
+                    "score": round(score, 4),
+                    "housenumber": housenumber,
+                    "street": name,
+                    "postcode": street_postcode,
+                    "city": city,
+                    "label": f"{prefix}{name} {street_postcode} {city}",
+                }
+
+        return to_result(best) if best else None
+
+
+_INDEX: Optional[OfflineIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_offline_index() -> OfflineIndex:
+    global _INDEX
+    with _INDEX_LOCK:
+        if _INDEX is None:
+            _INDEX = OfflineIndex()
+        return _INDEX
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import BAN exports into the offline address index")
+    parser.add_argument("departements", nargs="+", help="département codes, e.g. 75 2A 971")
+    parser.add_argument("--source", help="local export file (only with a single département)")
+    args = parser.parse_args()
+
+    for dept in args.departements:
+        print(import_departement(dept, source=args.source))
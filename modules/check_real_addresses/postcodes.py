@@ -0,0 +1,225 @@
+import argparse
+import csv
+import os
+import re
+import shutil
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+
+import requests
+
+from modules.check_real_addresses.offline import OFFLINE_INDEX_PATH, read_only_uri
+from modules.check_real_addresses.text import canonical_text
+
+# La Poste "base officielle des codes postaux" (Licence Ouverte), kept
+# next to the module; not shipped: fetch it with `--download`, or copy a
+# file downloaded elsewhere with `--import FILE`.
+REFERENCE_PATH = Path(os.environ.get(
+    "POSTCODE_REFERENCE_PATH",
+    Path(__file__).parent / "data" / "laposte_hexasmal.csv"
+))
+REFERENCE_URL = "https://datanova.laposte.fr/data-fair/api/v1/datasets/laposte-hexasmal/raw"
+REFERENCE_HINT = (
+    "python -m modules.check_real_addresses.postcodes --download "
+    "(or --import laposte_hexasmal.csv)"
+)
+
+CEDEX_SUFFIX_RE = re.compile(r"\bcedex\b.*$")
+COUNTRY_SUFFIX_RE = re.compile(r"\s+(france|fr)$")
+ARRONDISSEMENT_RE = re.compile(r"\s+\d+(er|e|eme)?$")
+
+COMMUNE_ABBREVIATIONS = {"st": "saint", "ste": "sainte"}
+
+# too common to identify a commune from the start of its name
+PARTIAL_STOPWORDS = {"le", "la", "les", "l", "saint", "sainte"}
+PARTIAL_MIN_LENGTH = 3
+
+
+def commune_key(name: str) -> str:
+    """'ST-DENIS CEDEX 2', 'Saint Denis, France' and 'Saint Denis' all give 'saint denis'."""
+    text = CEDEX_SUFFIX_RE.sub("", canonical_text(name)).strip()
+    text = COUNTRY_SUFFIX_RE.sub("", text)
+    return " ".join(COMMUNE_ABBREVIATIONS.get(w, w) for w in text.split())
+
+
+def postcode_departement(postcode: str) -> str:
+    # overseas départements have 3-digit codes (971, 974...)
+    return postcode[:3] if postcode[:2] in ("97", "98") else postcode[:2]
+
+
+class PostcodeReference:
+    """
+    In-memory postcode -> commune names hash index. `departements` lists
+    the départements it covers, None when it covers the whole country.
+    """
+
+    def __init__(self, communes: Dict[str, Set[str]], source: str, departements: Optional[Set[str]] = None):
+        self.communes = communes
+        self.source = source
+        self.departements = departements
+
+    def __len__(self):
+        return len(self.communes)
+
+    def covers(self, postcode: str) -> bool:
+        return self.departements is None or postcode_departement(postcode) in self.departements
+
+    def known(self, postcode: str) -> bool:
+        return postcode in self.communes
+
+    def unknown(self, postcode: str) -> bool:
+        """Certainly not a postcode: covered by the table and missing from it."""
+        return self.covers(postcode) and not self.known(postcode)
+
+    def matches(self, postcode: str, city: str) -> bool:
+        names = self.communes.get(postcode)
+        if not names:
+            return False
+
+        key = commune_key(city)
+        if key in names:
+            return True
+
+        # "Paris" vs "Paris 16", "Lyon 3e arrondissement"...
+        base = ARRONDISSEMENT_RE.sub("", key.replace(" arrondissement", ""))
+        if any(ARRONDISSEMENT_RE.sub("", name) == base for name in names):
+            return True
+
+        # "Boulogne" for "Boulogne-Billancourt": the name cut after a word
+        if len(key) < PARTIAL_MIN_LENGTH or key in PARTIAL_STOPWORDS:
+            return False
+        return any(name.startswith(key + " ") for name in names)
+
+
+def load_laposte(path: Path) -> Dict[str, Set[str]]:
+    communes: Dict[str, Set[str]] = {}
+
+    raw = path.read_bytes()
+    try:
+        text = raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        text = raw.decode("latin-1")
+
+    reader = csv.reader(text.splitlines(), delimiter=";")
+    header = [h.lstrip("#").strip().lower() for h in next(reader)]
+
+    def column(prefix: str) -> Optional[int]:
+        return next((i for i, h in enumerate(header) if h.startswith(prefix)), None)
+
+    postcode_col = column("code_postal")
+    name_cols = [
+        i for i in (column("nom_de_la_commune"), column("libell"), column("ligne_5"))
+        if i is not None
+    ]
+
+    if postcode_col is None or not name_cols:
+        raise ValueError(f"Unrecognized postcode reference file: {path}")
+
+    for line in reader:
+        if len(line) <= postcode_col:
+            continue
+
+        postcode = line[postcode_col].strip().zfill(5)
+        names = communes.setdefault(postcode, set())
+        for i in name_cols:
+            if i < len(line) and line[i].strip():
+                names.add(commune_key(line[i]))
+
+    return communes
+
+
+def load_offline_index(path: Path) -> PostcodeReference:
+    communes: Dict[str, Set[str]] = {}
+
+    conn = sqlite3.connect(read_only_uri(path), uri=True)
+    try:
+        for postcode, city in conn.execute("SELECT DISTINCT postcode, city FROM streets"):
+            communes.setdefault(postcode, set()).add(commune_key(city))
+        departements = {
+            # Corsica (2A, 2B) shares the 20xxx postcodes
+            "20" if d.upper() in ("2A", "2B") else d
+            for (d,) in conn.execute("SELECT DISTINCT departement FROM streets")
+        }
+    finally:
+        conn.close()
+
+    # only the imported départements are checked: a postcode elsewhere is
+    # not unknown, just not in the index
+    return PostcodeReference(communes, str(path), departements)
+
+
+def load_reference() -> Optional[PostcodeReference]:
+    """
+    The La Poste file when present, otherwise the postcodes of the
+    départements imported into the offline BAN index. None when neither
+    exists: only structural checks then apply.
+    """
+    if REFERENCE_PATH.exists():
+        return PostcodeReference(load_laposte(REFERENCE_PATH), str(REFERENCE_PATH))
+
+    if OFFLINE_INDEX_PATH.exists():
+        return load_offline_index(OFFLINE_INDEX_PATH)
+
+    return None
+
+
+def reference_status() -> Dict[str, Any]:
+    """Which table prevalidation uses, without loading it."""
+    if REFERENCE_PATH.exists():
+        return {"source": str(REFERENCE_PATH), "coverage": "national"}
+    if OFFLINE_INDEX_PATH.exists():
+        return {"source": str(OFFLINE_INDEX_PATH), "coverage": "offline index départements"}
+    return {
+        "source": None,
+        "missing": True,
+        "message": f"No postcode table: only structural checks apply. Install it with {REFERENCE_HINT}",
+    }
+
+
+def import_reference(source: Path, path: Optional[Path] = None):
+    """Copies a La Poste file into place, once it parses."""
+    path = path or REFERENCE_PATH
+    if not load_laposte(source):
+        raise ValueError(f"No postcodes in {source}")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(source, path)
+
+
+def download_reference(path: Path = REFERENCE_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    r = requests.get(REFERENCE_URL, timeout=60)
+    r.raise_for_status()
+    path.write_bytes(r.content)
+
+
+_REFERENCE: Optional[PostcodeReference] = None
+_REFERENCE_LOADED = False
+_REFERENCE_LOCK = threading.Lock()
+
+
+def get_reference() -> Optional[PostcodeReference]:
+    global _REFERENCE, _REFERENCE_LOADED
+    with _REFERENCE_LOCK:
+        # a table installed while the server runs is picked up
+        missing = _REFERENCE is None and (REFERENCE_PATH.exists() or OFFLINE_INDEX_PATH.exists())
+        if not _REFERENCE_LOADED or missing:
+            _REFERENCE = load_reference()
+            _REFERENCE_LOADED = True
+        return _REFERENCE
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Postcode reference table")
+    parser.add_argument("--download", action="store_true", help="fetch the La Poste file")
+    parser.add_argument("--import", dest="source", type=Path, help="install a La Poste file downloaded elsewhere")
+    args = parser.parse_args()
+
+    if args.download:
+        download_reference()
+    if args.source:
+        import_reference(args.source)
+
+    reference = get_reference()
+    print(f"{len(reference)} postcodes from {reference.source}" if reference else f"No reference table: {REFERENCE_HINT}")
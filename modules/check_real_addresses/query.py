@@ -0,0 +1,173 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from modules.check_real_addresses.results import open_results
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+# open tables are memory maps, row selections are int64 arrays
+OPEN_TABLES = 8
+CACHED_SELECTIONS = 32
+
+
+class LruCache:
+    def __init__(self, size: int):
+        self.size = size
+        self._items: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+
+_TABLES = LruCache(OPEN_TABLES)
+_SELECTIONS = LruCache(CACHED_SELECTIONS)
+
+
+def job_table(job_id: str) -> pa.Table:
+    table = _TABLES.get(job_id)
+    if table is None:
+        table = open_results(job_id)
+        _TABLES.put(job_id, table)
+    return table
+
+
+TRUE_VALUES = {"true", "1"}
+FALSE_VALUES = {"false", "0"}
+
+
+def parse_valid(value: Any) -> Optional[bool]:
+    """The `valid` filter: a bool, "true"/"false", "1"/"0", or None / "" for no filter."""
+    if value is None or isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text == "":
+        return None
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f"Invalid value for valid: {value!r}")
+
+
+def filter_mask(table: pa.Table, query: Dict[str, Any]) -> Optional[pa.ChunkedArray]:
+    conditions = []
+
+    valid = parse_valid(query.get("valid"))
+    if valid is not None:
+        conditions.append(pc.equal(pc.fill_null(table["valid"], False), valid))
+
+    if query.get("score_min") is not None:
+        conditions.append(pc.greater_equal(table["score"], float(query["score_min"])))
+
+    if query.get("score_max") is not None:
+        conditions.append(pc.less_equal(table["score"], float(query["score_max"])))
+
+    for column, text in (query.get("contains") or {}).items():
+        if column not in table.column_names:
+            raise ValueError(f"Unknown column: {column}")
+        values = table[column]
+        if not pa.types.is_string(values.type):
+            values = pc.cast(values, pa.string())
+        conditions.append(pc.match_substring(values, str(text), ignore_case=True))
+
+    if not conditions:
+        return None
+
+    mask = conditions[0]
+    for condition in conditions[1:]:
+        mask = pc.and_(mask, condition)
+    # null (missing score, empty cell) never matches
+    return pc.fill_null(mask, False)
+
+
+def selection_key(job_id: str, query: Dict[str, Any]) -> Tuple:
+    contains = tuple(sorted((query.get("contains") or {}).items()))
+    return (
+        job_id,
+        parse_valid(query.get("valid")),
+        query.get("score_min"),
+        query.get("score_max"),
+        contains,
+        query.get("sort"),
+        bool(query.get("descending")),
+    )
+
+
+def select_rows(table: pa.Table, query: Dict[str, Any]) -> Optional[pa.Array]:
+    """
+    Row numbers matching `query`, in the requested order. None means every
+    row in storage order, which pages by slicing.
+    """
+    mask = filter_mask(table, query)
+    sort = query.get("sort")
+    if sort and sort not in table.column_names:
+        raise ValueError(f"Unknown column: {sort}")
+
+    if mask is None and not sort:
+        return None
+
+    if table.num_rows == 0:
+        # an empty job's columns have no chunks, which indices_nonzero
+        # does not handle (it crashes the process)
+        return pa.array([], type=pa.int64())
+
+    rows = pa.array(range(table.num_rows), type=pa.int64()) if mask is None else \
+        pc.indices_nonzero(mask).cast(pa.int64())
+
+    if sort:
+        order = "descending" if query.get("descending") else "ascending"
+        keys = pc.take(table[sort], rows)
+        rows = pc.take(rows, pc.array_sort_indices(keys, order=order, null_placement="at_end"))
+
+    return rows
+
+
+def query_results(job_id: str, query: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    One page of a stored job. The row selection of a filter/sort is kept
+    across calls, so paging through it only costs a slice and a take.
+    """
+    table = job_table(job_id)
+
+    offset = max(0, int(query.get("offset", 0)))
+    limit = max(1, min(int(query.get("limit", DEFAULT_LIMIT)), MAX_LIMIT))
+
+    key = selection_key(job_id, query)
+    cached = _SELECTIONS.get(key)
+    if cached is None:
+        cached = (select_rows(table, query),)
+        _SELECTIONS.put(key, cached)
+    rows = cached[0]
+
+    if rows is None:
+        total = table.num_rows
+        page = table.slice(offset, limit)
+    else:
+        total = len(rows)
+        page = table.take(rows.slice(offset, limit))
+
+    return {
+        "job_id": job_id,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "columns": table.column_names,
+        "rows": page.to_pylist(),
+    }
@@ -0,0 +1,200 @@
+import json
+import re
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+RESULTS_DIR = Path(tempfile.gettempdir()) / "module_results"
+
+FLUSH_ROWS = 5000
+SAMPLE_SIZE = 20
+
+RESULT_FIELDS = [
+    pa.field("valid", pa.bool_()),
+    pa.field("score", pa.float64()),
+    pa.field("address", pa.string()),
+    pa.field("reason", pa.string()),
+]
+RESULT_COLUMNS = [field.name for field in RESULT_FIELDS]
+
+JOB_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+def results_path(job_id: str) -> Path:
+    if not JOB_ID_RE.match(job_id):
+        raise ValueError("Invalid job_id")
+    return RESULTS_DIR / f"{job_id}.arrow"
+
+
+def summary_path(job_id: str) -> Path:
+    return results_path(job_id).with_suffix(".json")
+
+
+def result_schema(columns) -> pa.Schema:
+    """Source columns as strings, then the validation results."""
+    source = [pa.field(str(col), pa.string()) for col in columns if str(col) not in RESULT_COLUMNS]
+    return pa.schema(source + RESULT_FIELDS)
+
+
+def text_column(values: pd.Series) -> pd.Series:
+    if pd.api.types.is_float_dtype(values) and (values.dropna() % 1 == 0).all():
+        # integer columns with blanks are read as float: 75001.0 -> 75001
+        values = values.astype("Int64")
+    if pd.api.types.is_integer_dtype(values) or pd.api.types.is_float_dtype(values):
+        # numbers: one Arrow cast, same text as str()
+        text = pc.cast(pa.array(values, from_pandas=True), pa.string())
+        return pd.Series(pd.arrays.ArrowStringArray(text))
+    # text, dates, mixed Excel cells: str() per cell, in pandas' C loop
+    return values.astype("string")
+
+
+def arrow_ready(rows: pd.DataFrame) -> pd.DataFrame:
+    """
+    Source columns as text: Excel columns mix numbers and text, and a
+    column's type must not depend on the rows of the first batch.
+    """
+    out = pd.DataFrame(index=range(len(rows)))
+    for col in rows.columns:
+        out[str(col)] = text_column(rows[col].reset_index(drop=True))
+    return out
+
+
+class ResultWriter:
+    """
+    Buffers validated rows and appends them to an Arrow IPC stream in
+    batches of FLUSH_ROWS. Counts and samples are kept on the side and
+    written to a JSON summary next to the results on close.
+    """
+
+    def __init__(self, job_id: str, columns, flush_rows: int = FLUSH_ROWS, sample_size: int = SAMPLE_SIZE):
+        RESULTS_DIR.mkdir(exist_ok=True)
+
+        self.job_id = job_id
+        self.path = results_path(job_id)
+        self.flush_rows = flush_rows
+        self.sample_size = sample_size
+
+        self._buffer: List[pd.DataFrame] = []
+        self._buffered = 0
+        self._sink = None
+        self._writer = None
+        self._schema = result_schema(columns)
+
+        self.rows = 0
+        self.valid = 0
+        self.invalid = 0
+        self.batches: List[int] = []
+        self.valid_samples: List[Dict[str, Any]] = []
+        self.invalid_samples: List[Dict[str, Any]] = []
+
+    def write(self, rows: pd.DataFrame, results: pd.DataFrame):
+        output = arrow_ready(rows)
+        for col in RESULT_COLUMNS:
+            output[col] = results[col].reset_index(drop=True)
+
+        valid = output["valid"].to_numpy(dtype=bool)
+        self.valid += int(valid.sum())
+        self.invalid += int(len(valid) - valid.sum())
+        self.rows += len(output)
+
+        self._sample(output[valid], self.valid_samples)
+        self._sample(output[~valid], self.invalid_samples)
+
+        self._buffer.append(output)
+        self._buffered += len(output)
+        if self._buffered >= self.flush_rows:
+            self.flush()
+
+    def _sample(self, rows: pd.DataFrame, samples: List[Dict[str, Any]]):
+        missing = self.sample_size - len(samples)
+        if missing > 0 and len(rows):
+            head = rows.head(missing).astype(object)
+            samples.extend(head.where(head.notna(), None).to_dict("records"))
+
+    def flush(self):
+        if not self._buffer:
+            return
+
+        frame = pd.concat(self._buffer, ignore_index=True)
+        self._buffer.clear()
+        self._buffered = 0
+
+        self._open()
+        table = pa.Table.from_pandas(frame, schema=self._schema, preserve_index=False)
+
+        for batch in table.to_batches(max_chunksize=self.flush_rows):
+            self._writer.write_batch(batch)
+            self.batches.append(batch.num_rows)
+
+    def _open(self):
+        if self._writer is None:
+            self._sink = pa.OSFile(str(self.path), "wb")
+            self._writer = pa.ipc.new_stream(self._sink, self._schema)
+
+    def summary(self, **extra: Any) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "checked": self.rows,
+            "valid": self.valid,
+            "invalid": self.invalid,
+            "valid_samples": self.valid_samples,
+            "invalid_samples": self.invalid_samples,
+            **extra,
+        }
+
+    def close(self, **extra: Any) -> Dict[str, Any]:
+        self.flush()
+        # no rows still leaves a stream with the schema: filters and sorts
+        # on an empty job find their columns
+        self._open()
+        self._writer.close()  # type: ignore
+        self._sink.close()  # type: ignore
+
+        summary = self.summary(**extra)
+        sidecar = {
+            **summary,
+            "columns": self._schema.names,
+            "batches": self.batches,
+        }
+
+        tmp = summary_path(self.job_id).with_suffix(".tmp")
+        tmp.write_text(json.dumps(sidecar, default=str), encoding="utf-8")
+        tmp.replace(summary_path(self.job_id))
+        return summary
+
+    def discard(self):
+        """Drop a job that did not finish (error, client gone)."""
+        if self._writer is not None:
+            self._writer.close()
+            self._sink.close()  # type: ignore
+        self._buffer.clear()
+        self.path.unlink(missing_ok=True)
+
+
+_SUMMARIES: Dict[str, Dict[str, Any]] = {}
+_SUMMARIES_LOCK = threading.Lock()
+
+
+def read_summary(job_id: str) -> Dict[str, Any]:
+    with _SUMMARIES_LOCK:
+        if job_id not in _SUMMARIES:
+            path = summary_path(job_id)
+            if not path.exists():
+                raise ValueError("Results not found")
+            _SUMMARIES[job_id] = json.loads(path.read_text(encoding="utf-8"))
+        return _SUMMARIES[job_id]
+
+
+def open_results(job_id: str) -> pa.Table:
+    """The stored results of a finished job, memory-mapped (no copy)."""
+    summary = read_summary(job_id)
+    path = results_path(job_id)
+    if not path.exists():
+        # stored before empty jobs wrote their schema
+        return result_schema(summary["columns"]).empty_table()
+    return pa.ipc.open_stream(pa.memory_map(str(path))).read_all()
@@ -0,0 +1,615 @@
+let filePath = null;
+let columns = [];
+let selected = new Set();
+
+let currentJobId = null;
+let isProcessing = false;
+
+async function uploadFile(file) {
+  console.log("Uploading file:", file.name);
+
+  const form = new FormData();
+  form.append("file", file);
+
+  const res = await fetch("/api/upload", {
+    method: "POST",
+    body: form
+  });
+
+  console.log("Upload response status:", res.status);
+
+  if (!res.ok) {
+    const t = await res.text();
+    throw new Error("Upload failed: " + t);
+  }
+
+  const data = await res.json();
+  console.log("Upload response JSON:", data);
+
+  if (!data.path) {
+    throw new Error("Upload response missing path");
+  }
+
+  return data.path;
+}
+
+async function loadPreview() {
+  const input = document.getElementById("file");
+  const file = input.files[0];
+
+  if (!file) {
+    alert("Select a file first");
+    return;
+  }
+
+
+  try {
+    filePath = await uploadFile(file);
+    console.log("File uploaded to:", filePath);
+  } catch (err) {
+    console.error(err);
+    alert("Upload failed — see console");
+    return;
+  }
+
+  console.log("Requesting preview with path:", filePath);
+
+  const res = await fetch("/api/run/check_real_addresses", {
+    method: "POST",
+    headers: {"Content-Type": "application/json"},
+    body: JSON.stringify({
+      action: "preview",
+      file_path: filePath
+    })
+  });
+
+  console.log("Preview response status:", res.status);
+
+  if (!res.ok) {
+    const t = await res.text();
+    console.error(t);
+    alert("Preview failed — see console");
+    return;
+  }
+
+  const data = await res.json();
+  console.log("Preview response JSON:", data);
+
+  if (!Array.isArray(data.columns)) {
+    alert("Invalid preview response");
+    return;
+  }
+
+  columns = data.columns;
+  renderPreview(data.preview);
+}
+
+function renderPreview(rows) {
+  selected.clear();
+
+  let html = "<table><thead><tr>";
+  columns.forEach(c => {
+    html += `<th onclick="toggleColumn('${c}')">${c}</th>`;
+  });
+  html += "</tr></thead><tbody>";
+
+  rows.forEach(r => {
+    html += "<tr>";
+    columns.forEach(c => {
+      html += `<td>${r[c] ?? ""}</td>`;
+    });
+    html += "</tr>";
+  });
+
+  html += "</tbody></table>";
+  document.getElementById("preview").innerHTML = html;
+}
+
+function toggleColumn(col) {
+  if (selected.has(col)) selected.delete(col);
+  else selected.add(col);
+
+  document.querySelectorAll("th").forEach(th => {
+    th.classList.toggle("selected", selected.has(th.textContent));
+  });
+}
+
+async function verify() {
+  if (!filePath || selected.size === 0) {
+    alert("Missing input");
+    return;
+  }
+
+  showProcessing();
+  startProgressUI();
+
+  const payload = {
+    action: "verify",
+    file_path: filePath,
+    columns: Array.from(selected),
+    backend: document.getElementById("backend").value
+  };
+
+  if (embedded) {
+    startBackgroundJob(payload);
+    return;
+  }
+
+  let response;
+  try {
+    response = await fetch(
+      `/api/run/check_real_addresses?mode=stream`,
+      {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify(payload)
+      }
+    );
+  } catch (err) {
+    hideProcessing();
+    throw err;
+  }
+
+  if (!response.ok || !response.body) {
+    hideProcessing();
+    throw new Error("Stream failed");
+  }
+
+  streamJobId = response.headers.get("X-Job-Id");
+  lastEventId = 0;
+
+  try {
+    await readEvents(response.body.getReader());
+  } catch (err) {
+    console.warn("Event stream interrupted", err);
+  }
+
+  // connection dropped before the end: pick up where we stopped
+  if (isProcessing) {
+    log("Connection lost, reconnecting...");
+    followJob(streamJobId);
+  }
+}
+
+// Server-side job running the stream, and the last event we handled
+let streamJobId = null;
+let lastEventId = 0;
+let jobEvents = null;
+
+async function readEvents(reader) {
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+
+    buffer += decoder.decode(value, { stream: true });
+
+    const events = buffer.split("\n\n");
+    buffer = events.pop(); // keep incomplete chunk
+
+    for (const evt of events) {
+      let data = null;
+
+      for (const line of evt.split("\n")) {
+        if (line.startsWith("id:")) lastEventId = Number(line.slice(3));
+        if (line.startsWith("data:")) data = line.slice(5).trim();
+      }
+
+      if (data) handleEvent(JSON.parse(data));
+    }
+  }
+}
+
+function followJob(jobId) {
+  if (jobEvents) jobEvents.close();
+
+  // EventSource resends Last-Event-ID itself on later reconnects
+  jobEvents = new EventSource(
+    `/api/jobs/${jobId}/events?last_event_id=${lastEventId}`
+  );
+
+  jobEvents.onmessage = (e) => {
+    lastEventId = Number(e.lastEventId);
+    const data = JSON.parse(e.data);
+    handleEvent(data);
+
+    if (data.type === "done" || data.type === "error" || data.type === "cancelled") {
+      jobEvents.close();
+      jobEvents = null;
+    }
+  };
+}
+
+// Inside the tool suite shell the parent page holds the only event
+// connection and forwards our jobs' events with postMessage
+const embedded = window.parent !== window;
+let pendingBusEvents = [];
+
+async function startBackgroundJob(payload) {
+  streamJobId = null;
+  pendingBusEvents = [];
+
+  const res = await fetch(
+    `/api/run/check_real_addresses?mode=background`,
+    {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(payload)
+    }
+  );
+
+  if (!res.ok) {
+    hideProcessing();
+    alert("Could not start verification");
+    return;
+  }
+
+  watchBusJob((await res.json()).job_id);
+}
+
+function watchBusJob(jobId) {
+  streamJobId = jobId;
+
+  // events that arrived before we knew the job id
+  const early = pendingBusEvents.filter(m => m.job_id === jobId);
+  pendingBusEvents = [];
+  early.forEach(handleBusEvent);
+}
+
+function handleBusEvent(message) {
+  const event = message.event;
+
+  if (event.type === "job_finished") {
+    if (isProcessing) {
+      isProcessing = false;
+      hideProcessing();
+      log(`Job ${event.status}`);
+    }
+    return;
+  }
+
+  if (event.type !== "job_started") handleEvent(event);
+}
+
+window.addEventListener("message", (e) => {
+  if (e.origin !== location.origin || !e.data || e.data.kind !== "job-event") return;
+
+  if (!streamJobId) {
+    pendingBusEvents.push(e.data);
+  } else if (e.data.job_id === streamJobId) {
+    handleBusEvent(e.data);
+  }
+});
+
+// Another tab may already be running a job: watch it instead of starting over
+async function attachRunningJob() {
+  const res = await fetch("/api/jobs?module_id=check_real_addresses");
+  if (!res.ok) return;
+
+  const running = (await res.json()).filter(j => j.status === "running");
+  if (running.length === 0) return;
+
+  showProcessing();
+  startProgressUI();
+  isProcessing = true;
+
+  if (embedded) {
+    // progress events carry absolute counts: the next one catches us up
+    watchBusJob(running[running.length - 1].job_id);
+    return;
+  }
+
+  streamJobId = running[running.length - 1].job_id;
+  lastEventId = 0;
+  followJob(streamJobId);
+}
+
+attachRunningJob();
+
+function handleEvent(data) {
+    if (data.type === "started") {
+    currentJobId = data.job_id;
+    isProcessing = true;
+    disableDownload();
+  }
+
+  if (data.type === "progress") {
+    const percent = Math.round(
+      (data.current / data.total) * 100
+    );
+    setProgress(percent);
+    updateProgressText(data.message);
+    log(data.message);
+
+    const elapsed = (Date.now() - processStartTime) / 1000;
+    const rate = data.current / elapsed;
+    if (rate > 0) {
+      updateETA(
+        Math.round((data.total - data.current) / rate)
+      );
+    }
+  }
+
+  if (data.type === "error") {
+    isProcessing = false;
+    hideProcessing();
+    alert("Verification failed: " + data.message);
+  }
+
+  if (data.type === "cancelled") {
+    isProcessing = false;
+    hideProcessing();
+    log("Verification cancelled");
+  }
+
+  if (data.type === "done") {
+    isProcessing = false;
+
+    // job_id is authoritative — store it
+    currentJobId = data.job_id;
+    
+    setProgress(100);
+    updateProgressText("Completed");
+    updateETA(0);
+    renderResults(data);
+    hideProcessing();
+  }
+}
+
+function renderResults(data) {
+  const results = document.getElementById("results");
+
+  results.innerHTML = `
+    <h3>Results overview</h3>
+
+    ${renderScoreBar(data.valid, data.invalid)}
+
+    <p>Total checked: <b>${data.checked}</b></p>
+    <p style="color:green">Valid: <b>${data.valid}</b></p>
+    <p style="color:red">Invalid: <b>${data.invalid}</b></p>
+
+    <h4 style="color:red">Invalid address samples</h4>
+    ${renderTable(data.invalid_samples, "invalid")}
+
+    <h4 style="color:green">Valid address samples</h4>
+    ${renderTable(data.valid_samples ?? [], "valid")}
+
+    <h4>Browse all results</h4>
+    <div class="actions">
+      <select id="browseValid" onchange="browse(0)">
+        <option value="">All rows</option>
+        <option value="false">Invalid only</option>
+        <option value="true">Valid only</option>
+      </select>
+      <input id="browseSearch" placeholder="Search address..." onchange="browse(0)"/>
+      <select id="browseSort" onchange="browse(0)">
+        <option value="">File order</option>
+        <option value="score">Lowest score first</option>
+      </select>
+      <button class="secondary" id="browsePrevious" onclick="browse(browseOffset - BROWSE_PAGE)" disabled>Previous</button>
+      <button class="secondary" id="browseNext" onclick="browse(browseOffset + BROWSE_PAGE)" disabled>Next</button>
+      <span class="muted" id="browseInfo"></span>
+    </div>
+    <div id="browseTable"></div>
+  `;
+
+  browse(0);
+}
+
+const BROWSE_PAGE = 50;
+let browseOffset = 0;
+let browseTotal = 0;
+
+async function browse(offset) {
+  if (!currentJobId) return;
+  // offset 0 is always allowed: it reloads after a filter change
+  if (offset < 0 || (offset > 0 && offset >= browseTotal)) return;
+
+  const valid = document.getElementById("browseValid").value;
+  const search = document.getElementById("browseSearch").value.trim();
+  const sort = document.getElementById("browseSort").value;
+
+  const res = await fetch("/api/run/check_real_addresses", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({
+      action: "query",
+      job_id: currentJobId,
+      offset: offset,
+      limit: BROWSE_PAGE,
+      valid: valid === "" ? null : valid === "true",
+      contains: search ? { address: search } : {},
+      sort: sort || null
+    })
+  });
+
+  if (!res.ok) {
+    console.error(await res.text());
+    return;
+  }
+
+  const page = await res.json();
+  browseOffset = page.offset;
+  browseTotal = page.total;
+
+  const last = Math.min(page.offset + page.rows.length, page.total);
+  document.getElementById("browseInfo").textContent =
+    page.total ? `${page.offset + 1}-${last} of ${page.total}` : "No rows";
+  document.getElementById("browsePrevious").disabled = page.offset === 0;
+  document.getElementById("browseNext").disabled = last >= page.total;
+  document.getElementById("browseTable").innerHTML = renderTable(page.rows, "");
+}
+
+function renderScoreBar(valid, invalid) {
+  const total = valid + invalid || 1;
+  const vPct = Math.round((valid / total) * 100);
+  const iPct = 100 - vPct;
+
+  return `
+    <div class="scorebar">
+      <div class="valid" style="width:${vPct}%"></div>
+      <div class="invalid" style="width:${iPct}%"></div>
+    </div>
+    <p class="muted">${vPct}% valid - ${iPct}% invalid</p>
+  `;
+}
+
+function renderTable(rows, type) {
+  if (!rows || rows.length === 0) {
+    return "<p><i>No samples available</i></p>";
+  }
+
+  const cols = Object.keys(rows[0]);
+
+  let html = "<table><thead><tr>";
+  cols.forEach(c => html += `<th>${c}</th>`);
+  html += "</tr></thead><tbody>";
+
+  rows.forEach(r => {
+    html += `<tr class="${type}">`;
+
+    cols.forEach(c => {
+      let value = r[c] ?? "";
+
+      if (c === "score" && value !== "") {
+        const cls =
+          value >= 0.8 ? "good" :
+          value >= 0.6 ? "medium" :
+          "bad";
+
+        html += `<td class="${cls}">${value.toFixed(3)}</td>`;
+      }
+      else if (c === "reason") {
+        html += `<td class="bad-reason">${value}</td>`;
+      }
+      else {
+        html += `<td>${value}</td>`;
+      }
+    });
+
+    html += "</tr>";
+  });
+
+  html += "</tbody></table>";
+  return html;
+}
+
+function showProcessing() {
+  document.body.classList.add("modal-open");
+  document.getElementById("processingOverlay").style.display = "flex";
+
+  // Disable all buttons defensively
+  document.querySelectorAll("button").forEach(
+    b => b.disabled = true
+  );
+
+  startProgressUI();
+}
+
+function hideProcessing() {
+  document.body.classList.remove("modal-open");
+  document.getElementById("processingOverlay").style.display = "none";
+
+  document.querySelectorAll("button").forEach(
+    b => b.disabled = false
+  );
+}
+
+function startProgressUI() {
+  processStartTime = Date.now();
+
+  setProgress(0);
+  updateProgressText("Initializing verification...");
+  updateETA(null);
+
+  const logEl = document.getElementById("processLog");
+  logEl.innerHTML = "";
+}
+
+function setProgress(percent) {
+  document.getElementById("progressBar").style.width = `${percent}%`;
+}
+
+function updateProgressText(text) {
+  document.getElementById("progressText").textContent = text;
+}
+
+function updateETA(seconds) {
+  const el = document.getElementById("etaText");
+
+  if (seconds === null || !isFinite(seconds)) {
+    el.textContent = "";
+    return;
+  }
+
+  el.textContent = `Estimated time remaining: ~${seconds}s`;
+}
+
+function log(message) {
+  const el = document.getElementById("processLog");
+  const line = document.createElement("div");
+
+  const ts = new Date().toLocaleTimeString();
+  line.textContent = `[${ts}] ${message}`;
+
+  el.appendChild(line);
+  el.scrollTop = el.scrollHeight;
+}
+
+const downloadBtn = document.getElementById("downloadCsvBtn");
+
+function enableDownload() {
+  downloadBtn.disabled = false;
+}
+
+function disableDownload() {
+  downloadBtn.disabled = true;
+}
+
+downloadBtn.addEventListener("click", async () => {
+  if (!currentJobId) {
+    alert("No completed job to download");
+    return;
+  }
+
+  const format = document.getElementById("downloadFormat").value;
+  const filter = document.getElementById("downloadFilter").value;
+
+  try {
+    const res = await fetch(
+      `/api/run/check_real_addresses?mode=download&format=${format}`,
+      {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({
+          job_id: currentJobId,
+          filter: filter
+        })
+      }
+    );
+
+    if (!res.ok) {
+      throw new Error("Download failed");
+    }
+
+    const blob = await res.blob();
+    const url = URL.createObjectURL(blob);
+
+    const a = document.createElement("a");
+    a.href = url;
+    a.download = `verified_addresses.${format}`;
+    document.body.appendChild(a);
+    a.click();
+    a.remove();
+
+    URL.revokeObjectURL(url);
+  } catch (err) {
+    console.error(err);
+    alert("Could not download results");
+  }
+});
+
+
+
@@ -0,0 +1,97 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+POSTCODE_RE = re.compile(r"^\d{5}$")
+NUMBER_RE = re.compile(r"^\d+[a-zA-Z]?$")
+
+POSTAL_ONLY_KEYWORDS = ["bp", "boite postale", "cedex", "cs"]
+
+STREET_KEYWORDS = [
+    "rue", "avenue", "av", "boulevard", "bd",
+    "chemin", "route", "impasse", "allee",
+    "place", "quai", "cours"
+]
+
+STREET_ABBREVIATIONS = {
+    "av": "avenue",
+    "ave": "avenue",
+    "bd": "boulevard",
+    "bvd": "boulevard",
+    "rte": "route",
+    "imp": "impasse",
+    "pl": "place",
+}
+
+NON_WORD_RE = re.compile(r"[^\w]+")
+
+ABBREVIATION_RE = re.compile(r"\b(?:" + "|".join(map(re.escape, STREET_ABBREVIATIONS)) + r")\b")
+
+# One pass instead of `any(k in text for k in KEYWORDS)`
+STREET_KEYWORDS_RE = re.compile(r"\b(?:" + "|".join(map(re.escape, STREET_KEYWORDS)) + r")\b")
+POSTAL_ONLY_RE = re.compile(r"\b(" + "|".join(map(re.escape, POSTAL_ONLY_KEYWORDS)) + r")\b")
+
+
+def _strip_marks(text: str) -> str:
+    return "".join(
+        c for c in unicodedata.normalize("NFD", text)
+        if unicodedata.category(c) != "Mn"
+    )
+
+
+# Latin-1 + Latin Extended-A covers the accents found in French data;
+# anything else still goes through the unicodedata path.
+ACCENT_TABLE = str.maketrans({
+    c: _strip_marks(c)
+    for c in map(chr, range(0xC0, 0x180))
+    if _strip_marks(c) != c
+})
+
+
+@lru_cache(maxsize=65536)
+def normalize(text: str) -> str:
+    text = text.lower().strip().translate(ACCENT_TABLE)
+    if text.isascii():
+        return text
+    return _strip_marks(text)
+
+
+def canonical_text(text: str) -> str:
+    """Accent-free, abbreviation-expanded, whitespace-folded form of `text`."""
+    words = NON_WORD_RE.sub(" ", normalize(text)).split()
+    return " ".join(STREET_ABBREVIATIONS.get(w, w) for w in words)
+
+
+def map_unique(series, fn):
+    """
+    Apply `fn` once per distinct value of a string column and broadcast back.
+    Missing values are not passed to `fn` and stay None.
+    """
+    codes, uniques = pd.factorize(series)
+    # factorize codes missing values -1: the trailing None
+    mapped = np.array([fn(v) for v in uniques] + [None], dtype=object)
+    return pd.Series(mapped[codes], index=series.index, dtype=object)
+
+
+def normalize_series(series):
+    """`normalize` over a whole pandas column of strings, with `.str` methods."""
+    text = series.str.lower().str.strip().str.translate(ACCENT_TABLE)
+    # marks outside the table: rare, per value
+    rest = text.notna() & ~text.str.isascii().fillna(True).astype(bool)
+    if rest.any():
+        text = text.copy()
+        text[rest] = text[rest].map(_strip_marks)
+    return text
+
+
+def canonical_series(series):
+    """`canonical_text` over a whole pandas column of strings, with `.str` methods."""
+    return (
+        normalize_series(series)
+        .str.replace(NON_WORD_RE, " ", regex=True)
+        .str.strip()
+        .str.replace(ABBREVIATION_RE, lambda m: STREET_ABBREVIATIONS[m.group(0)], regex=True)
+    )
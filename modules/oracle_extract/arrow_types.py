@@ -0,0 +1,118 @@
+"""
+Oracle column descriptions -> Arrow types, and fetched rows -> record
+batches. Columns are built with one `pa.array` call each: the per-value
+work stays in C.
+"""
+import decimal
+from typing import Any, List, Optional, Sequence, Tuple
+
+import pyarrow as pa
+
+# NUMBER(p, 0) up to this precision always fits an int64
+INT64_DIGITS = 18
+DECIMAL128_DIGITS = 38
+
+
+def db_type(driver, name: str):
+    return getattr(driver, name, None)
+
+
+def number_type(precision: int, scale: int) -> pa.DataType:
+    if not precision:
+        # unconstrained NUMBER (scale -127): any magnitude, any scale
+        return pa.float64()
+    if scale <= 0:
+        digits = precision - scale
+        if digits <= INT64_DIGITS:
+            return pa.int64()
+        return pa.decimal128(min(digits, DECIMAL128_DIGITS), 0)
+    return pa.decimal128(min(precision, DECIMAL128_DIGITS), min(scale, DECIMAL128_DIGITS))
+
+
+def arrow_type(driver, type_code, precision: int, scale: int) -> Optional[pa.DataType]:
+    """None when the type is unknown: inferred from the data instead."""
+    t = lambda name: type_code is not None and type_code is db_type(driver, name)
+
+    if t("DB_TYPE_NUMBER"):
+        return number_type(precision or 0, scale or 0)
+    if t("DB_TYPE_BINARY_INTEGER"):
+        return pa.int64()
+    if t("DB_TYPE_BINARY_FLOAT"):
+        return pa.float32()
+    if t("DB_TYPE_BINARY_DOUBLE"):
+        return pa.float64()
+    if t("DB_TYPE_BOOLEAN"):
+        return pa.bool_()
+
+    if t("DB_TYPE_DATE"):
+        # Oracle DATE has a time part, to the second
+        return pa.timestamp("s")
+    if t("DB_TYPE_TIMESTAMP") or t("DB_TYPE_TIMESTAMP_TZ") or t("DB_TYPE_TIMESTAMP_LTZ"):
+        return pa.timestamp("us")
+
+    if t("DB_TYPE_CLOB") or t("DB_TYPE_NCLOB") or t("DB_TYPE_LONG") or t("DB_TYPE_LONG_NVARCHAR"):
+        return pa.large_string()
+    if t("DB_TYPE_BLOB") or t("DB_TYPE_LONG_RAW"):
+        return pa.large_binary()
+    if t("DB_TYPE_RAW"):
+        return pa.binary()
+
+    if type_code is None:
+        return None
+    # VARCHAR2, CHAR, NVARCHAR2, NCHAR, ROWID, and anything else as text
+    return pa.string()
+
+
+def describe(driver, description: Sequence[Tuple]) -> List[Tuple[str, Any, Optional[pa.DataType]]]:
+    """(name, Oracle type name, Arrow type) per column of a cursor."""
+    columns = []
+    for entry in description:
+        name, type_code, precision, scale = entry[0], entry[1], entry[4], entry[5]
+        columns.append((name, getattr(type_code, "name", None), arrow_type(driver, type_code, precision, scale)))
+    return columns
+
+
+def decimal_handler(driver):
+    """
+    Output type handler: LOBs inline (str / bytes) and scaled NUMBERs as
+    Decimal, so they are not rounded through float before reaching Arrow.
+    """
+    from app.oracle_pool import lob_as_value
+
+    number = db_type(driver, "DB_TYPE_NUMBER")
+
+    def handler(cursor, metadata):
+        if metadata.type_code is number and metadata.precision and metadata.scale > 0:
+            return cursor.var(decimal.Decimal, arraysize=cursor.arraysize)
+        return lob_as_value(cursor, metadata)
+
+    return handler
+
+
+def string_column(values: Sequence[Any]) -> List[Optional[str]]:
+    return [None if v is None else str(v) for v in values]
+
+
+def to_record_batch(rows: List[Tuple], schema: pa.Schema) -> pa.RecordBatch:
+    arrays = []
+    for values, field in zip(zip(*rows), schema):
+        try:
+            arrays.append(pa.array(values, type=field.type))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            if not pa.types.is_string(field.type):
+                raise
+            # ROWID and other driver objects: their text form
+            arrays.append(pa.array(string_column(values), type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def resolve_schema(columns: List[Tuple[str, Any, Optional[pa.DataType]]], rows: List[Tuple]) -> pa.Schema:
+    """Schema of the export: unknown types inferred once, from the first batch."""
+    fields = []
+    for i, (name, _, arrow) in enumerate(columns):
+        if arrow is None:
+            arrow = pa.array([row[i] for row in rows]).type if rows else pa.null()
+            if pa.types.is_null(arrow):
+                arrow = pa.string()
+        fields.append(pa.field(name, arrow))
+    return pa.schema(fields)
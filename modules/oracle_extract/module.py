@@ -0,0 +1,243 @@
+import re
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from app.oracle_pool import is_query, pools
+from modules.oracle_extract.arrow_types import decimal_handler, describe, resolve_schema, to_record_batch
+
+EXTRACT_DIR = Path(tempfile.gettempdir()) / "oracle_extracts"
+
+# bulk fetches: few round-trips, each batch converted to Arrow in one go
+ARRAYSIZE = 10000
+MAX_ARRAYSIZE = 100000
+
+ROWS_PER_FILE = 1_000_000
+ROW_GROUP_ROWS = 128 * 1024
+COMPRESSION = "snappy"
+
+PROGRESS_INTERVAL = 0.5
+
+# marks the folders this module wrote, the only ones it deletes or replaces
+# (hidden from dataset readers by its leading dot)
+MARKER = ".oracle_extract"
+
+TABLE_RE = re.compile(r"^[A-Za-z][\w$#]*(\.[A-Za-z][\w$#]*)?$")
+
+
+def extract_query(payload: dict):
+    """(SQL, export name) for a `table` or a read-only `sql` query."""
+    table = (payload.get("table") or "").strip()
+    if table:
+        if not TABLE_RE.match(table):
+            raise ValueError(f"Invalid table name: {table}")
+        return f"SELECT * FROM {table}", table.lower().replace(".", "_")
+
+    sql = payload.get("sql") or ""
+    if not is_query(sql):
+        raise ValueError("Give a table, or a SELECT / WITH query")
+    return sql, payload.get("name") or "query"
+
+
+def owned(path: Path) -> bool:
+    return (path / MARKER).is_file()
+
+
+def remove_owned(path: Path):
+    """Deletes a folder of a previous extract; anything else is refused."""
+    if not path.exists():
+        return
+    if not owned(path):
+        raise ValueError(f"{path} was not written by this module, not replacing it")
+    shutil.rmtree(path)
+
+
+def partition_columns(payload: dict) -> List[str]:
+    value = payload.get("partition_by") or []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [c.strip() for c in value if c.strip()]
+
+
+class ExtractState:
+    """Counters shared by the fetching thread and the progress loop."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.rows = 0
+        self.batches = 0
+        self.arrow_bytes = 0
+        self.fetch_s = 0.0
+        self.convert_s = 0.0
+        self.files: List[Dict[str, Any]] = []
+        self.error: Optional[BaseException] = None
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "rows": self.rows,
+            "batches": self.batches,
+            "files": len(self.files),
+            "elapsed_s": round(elapsed, 3),
+            "rows_per_s": round(self.rows / elapsed) if elapsed > 0 else None,
+            "arrow_mb": round(self.arrow_bytes / 2**20, 1),
+            "fetch_s": round(self.fetch_s, 3),
+            "convert_s": round(self.convert_s, 3),
+        }
+
+
+def stream(payload: dict):
+    """
+    Writes the rows as Parquet files under `output_dir` (hive-partitioned
+    by `partition_by` if given), with progress events while it runs. The
+    files appear only once the export is complete.
+    """
+    dsn = payload.get("dsn", "LAVAUR_PROD")
+    user = payload.get("user", "LAVAUR")
+    password = payload.get("password", "LAVAUR")
+
+    sql, name = extract_query(payload)
+    partitioning = partition_columns(payload)
+    rows_per_file = max(int(payload.get("rows_per_file") or ROWS_PER_FILE), 1)
+    row_group = min(ROW_GROUP_ROWS, rows_per_file)
+    arraysize = min(max(int(payload.get("arraysize") or ARRAYSIZE), 1), MAX_ARRAYSIZE)
+    compression = payload.get("compression") or COMPRESSION
+
+    target = Path(payload.get("output_dir") or EXTRACT_DIR / f"{name}_{time.strftime('%Y%m%d_%H%M%S')}")
+    if target.exists() and any(target.iterdir()):
+        if not payload.get("overwrite"):
+            raise ValueError(f"{target} is not empty")
+        if not owned(target):
+            raise ValueError(f"{target} holds other files: only a previous extract can be overwritten")
+
+    partial = target.with_name(target.name + ".partial")
+    remove_owned(partial)
+    partial.mkdir(parents=True)
+    (partial / MARKER).write_text(f"{name}\n", encoding="utf-8")
+
+    state = ExtractState()
+    stop = threading.Event()
+
+    with pools.connection(dsn, user, password) as conn:
+        cur = conn.cursor()
+        try:
+            cur.arraysize = arraysize
+            cur.prefetchrows = arraysize
+            cur.outputtypehandler = decimal_handler(pools.driver)
+            cur.execute(sql)
+
+            columns = describe(pools.driver, cur.description)
+            first = cur.fetchmany(arraysize)
+            schema = resolve_schema(columns, first)
+
+            yield {
+                "type": "schema",
+                "columns": [
+                    {"name": field.name, "oracle_type": oracle_type, "arrow_type": str(field.type)}
+                    for field, (_, oracle_type, _) in zip(schema, columns)
+                ],
+            }
+
+            def batches():
+                rows = first
+                while rows and not stop.is_set():
+                    started = time.perf_counter()
+                    batch = to_record_batch(rows, schema)
+                    state.convert_s += time.perf_counter() - started
+
+                    state.rows += batch.num_rows
+                    state.batches += 1
+                    state.arrow_bytes += batch.nbytes
+                    yield batch
+
+                    started = time.perf_counter()
+                    rows = cur.fetchmany(arraysize)
+                    state.fetch_s += time.perf_counter() - started
+
+            def written(file):
+                state.files.append({
+                    "path": Path(file.path).relative_to(partial).as_posix(),
+                    "rows": file.metadata.num_rows,
+                })
+
+            def write():
+                try:
+                    # fetching runs on this thread, pulled by the Arrow writer
+                    ds.write_dataset(
+                        pa.RecordBatchReader.from_batches(schema, batches()),
+                        partial,
+                        format="parquet",
+                        file_options=ds.ParquetFileFormat().make_write_options(compression=compression),
+                        partitioning=partitioning or None,
+                        partitioning_flavor="hive" if partitioning else None,
+                        basename_template="part-{i}.parquet",
+                        max_rows_per_file=rows_per_file,
+                        max_rows_per_group=row_group,
+                        min_rows_per_group=row_group,
+                        preserve_order=True,
+                        # the folder is new, holding only the marker
+                        existing_data_behavior="overwrite_or_ignore",
+                        file_visitor=written,
+                    )
+                except BaseException as e:
+                    state.error = e
+
+            writer = threading.Thread(target=write, daemon=True)
+            writer.start()
+
+            completed = False
+            try:
+                while writer.is_alive():
+                    writer.join(PROGRESS_INTERVAL)
+                    yield {"type": "progress", **state.stats()}
+
+                if state.error is not None:
+                    raise state.error
+                if not state.files and not partitioning:
+                    # no rows: one empty file still carries the schema
+                    path = partial / "part-0.parquet"
+                    pq.write_table(schema.empty_table(), path, compression=compression)
+                    state.files.append({"path": path.name, "rows": 0})
+                completed = True
+            finally:
+                if not completed:
+                    # cancelled or failed: stop fetching, leave no partial files
+                    stop.set()
+                    if writer.is_alive():
+                        conn.cancel()
+                    writer.join()
+                    shutil.rmtree(partial, ignore_errors=True)
+        finally:
+            cur.close()
+
+    if target.exists():
+        # empty, or a previous extract (checked above)
+        shutil.rmtree(target)
+    partial.rename(target)
+
+    parquet_bytes = sum(f.stat().st_size for f in target.rglob("*.parquet"))
+    stats = state.stats()
+    yield {
+        "type": "done",
+        **stats,
+        "output_dir": str(target),
+        "partition_by": partitioning,
+        "parquet_mb": round(parquet_bytes / 2**20, 1),
+        "mb_per_s": round(parquet_bytes / 2**20 / stats["elapsed_s"], 1) if stats["elapsed_s"] else None,
+        "file_list": sorted(state.files, key=lambda f: f["path"]),
+    }
+
+
+def run(payload: dict):
+    done: Dict[str, Any] = {}
+    for event in stream(payload):
+        if event["type"] == "done":
+            done = event
+    return {k: v for k, v in done.items() if k != "type"}
@@ -0,0 +1,130 @@
+import time
+from typing import Any, Dict
+
+from app import cancel
+from app.oracle_pool import is_query, lob_as_value, pools
+
+# rows per round-trip: large enough that the network latency is amortized,
+# small enough that one batch stays a few hundred KB in the 32-bit process
+ARRAYSIZE = 1000
+MAX_ARRAYSIZE = 10000
+
+
+def fetch_settings(payload: dict):
+    arraysize = min(max(int(payload.get("arraysize") or ARRAYSIZE), 1), MAX_ARRAYSIZE)
+    # rows returned with the execute round-trip; the next fetch is a full batch
+    prefetchrows = min(max(int(payload.get("prefetchrows") or arraysize), 1), MAX_ARRAYSIZE)
+    return arraysize, prefetchrows
+
+
+def stats(fetched: int, batches: int, round_trips: int, started: float, executed: float) -> Dict[str, Any]:
+    elapsed = time.perf_counter() - started
+    return {
+        "fetched": fetched,
+        "batches": batches,
+        "round_trips": round_trips,
+        "execute_ms": round((executed - started) * 1000, 1),
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_s": round(fetched / elapsed) if elapsed > 0 else None,
+    }
+
+
+def stream(payload: dict):
+    """
+    Rows as they are fetched, one `rows` event per batch. Only one batch is
+    held at a time: memory does not grow with the result.
+    """
+    dsn = payload.get("dsn", "LAVAUR_PROD")
+    user = payload.get("user", "LAVAUR")
+    password = payload.get("password", "LAVAUR")
+    sql = payload.get("sql", "")
+
+    if not is_query(sql):
+        yield {"type": "error", "message": "Only SELECT / WITH queries are allowed"}
+        return
+
+    arraysize, prefetchrows = fetch_settings(payload)
+    scope = cancel.current()
+    started = time.perf_counter()
+
+    with pools.connection(dsn, user, password) as conn:
+        # cancel() reaches the database even in the middle of a round-trip
+        with scope.on_cancel(conn.cancel):
+            cur = conn.cursor()
+            try:
+                cur.arraysize = arraysize
+                cur.prefetchrows = prefetchrows
+                cur.outputtypehandler = lob_as_value
+
+                cur.execute(sql, payload.get("params") or {})
+                executed = time.perf_counter()
+
+                columns = [d[0] for d in cur.description]
+                yield {
+                    "type": "columns",
+                    "columns": columns,
+                    "arraysize": arraysize,
+                    "prefetchrows": prefetchrows,
+                }
+
+                fetched = batches = 0
+                # estimated from the fetch settings: the execute round-trip
+                # brings back `prefetchrows` rows, then one per full batch
+                round_trips = 1
+                buffered = prefetchrows
+                exhausted = False
+
+                while not scope.cancelled:
+                    if buffered < arraysize and not exhausted:
+                        round_trips += 1
+                        buffered += arraysize
+
+                    rows = cur.fetchmany(arraysize)
+                    buffered -= len(rows)
+                    exhausted = len(rows) < arraysize
+
+                    if rows:
+                        fetched += len(rows)
+                        batches += 1
+                        yield {
+                            "type": "rows",
+                            "rows": rows,
+                            **stats(fetched, batches, round_trips, started, executed),
+                        }
+
+                    if exhausted:
+                        break
+
+                yield {
+                    "type": "done",
+                    "cancelled": scope.cancelled,
+                    "columns": columns,
+                    **stats(fetched, batches, round_trips, started, executed),
+                }
+            finally:
+                cur.close()
+
+
+def run(payload: dict):
+    """First rows only, for a quick look without streaming."""
+    limit = int(payload.get("limit") or 100)
+    preview = []
+    done: Dict[str, Any] = {}
+
+    events = stream({**payload, "arraysize": min(limit, MAX_ARRAYSIZE)})
+    try:
+        for event in events:
+            if event["type"] == "error":
+                return {"success": False, "error": event["message"]}
+            if event["type"] == "rows":
+                preview.extend(event["rows"][:limit - len(preview)])
+                done = {k: v for k, v in event.items() if k not in ("type", "rows")}
+                if len(preview) >= limit:
+                    break
+            if event["type"] == "done":
+                done = {k: v for k, v in event.items() if k != "type"}
+    finally:
+        # stops fetching and returns the session to the pool
+        events.close()
+
+    return {"success": True, "preview": preview, "truncated": len(preview) >= limit, **done}
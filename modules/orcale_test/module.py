@@ -1,7 +1,6 @@
-import oracledb
-from pathlib import Path
+import time
 
-ORACLE_CLIENT = r"C:\oracle\instantclient_11_2"
+from app.oracle_pool import pools
 
 
 def run(payload: dict):
@@ -11,35 +10,33 @@ def run(payload: dict):
     password = payload.get("password", "LAVAUR")
 
     try:
-        # initialize thick mode
-        oracledb.init_oracle_client(lib_dir=ORACLE_CLIENT)
-
-        conn = oracledb.connect(
-            user=user,
-            password=password,
-            dsn=dsn
-        )
-
-        cur = conn.cursor()
-
-        cur.execute("""
-            SELECT table_name
-            FROM user_tables
-            ORDER BY table_name
-        """)
-
-        tables = [name for (name,) in cur.fetchall()]
-
-        result = {
-            "success": True,
-            "dsn": dsn,
-            "oracle_version": conn.version,
-            "table_count": len(tables),
-            "tables_preview": tables[:10]
-        }
-
-        cur.close()
-        conn.close()
+        started = time.perf_counter()
+
+        # pooled session: the logon is paid once per worker, not per run
+        with pools.connection(dsn, user, password) as conn:
+            acquired = time.perf_counter()
+
+            cur = conn.cursor()
+
+            cur.execute("""
+                SELECT table_name
+                FROM user_tables
+                ORDER BY table_name
+            """)
+
+            tables = [name for (name,) in cur.fetchall()]
+            cur.close()
+
+            result = {
+                "success": True,
+                "dsn": dsn,
+                "oracle_version": conn.version,
+                "table_count": len(tables),
+                "tables_preview": tables[:10],
+                "acquire_ms": round((acquired - started) * 1000, 1),
+                "query_ms": round((time.perf_counter() - acquired) * 1000, 1),
+                "pool": pools.stats().get(f"{user.upper()}@{dsn}"),
+            }
 
         return result
 
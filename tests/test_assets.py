@@ -0,0 +1,13 @@
+from app.assets import accepted_encodings
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("gzip, deflate, br") == {"gzip", "deflate", "br"}
+    assert accepted_encodings("br;q=1.0, gzip;q=0.8") == {"br", "gzip"}
+
+
+def test_refused_encodings():
+    assert accepted_encodings("br;q=0, gzip") == {"gzip"}
+    assert accepted_encodings("br;q=0.0, gzip; q=0.000") == set()
+    assert accepted_encodings("br; q = 0.0, gzip;q=junk, identity") == {"identity"}
+    assert accepted_encodings("") == set()
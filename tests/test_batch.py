@@ -0,0 +1,45 @@
+import pytest
+
+from modules.check_real_addresses import ban_fake
+from modules.check_real_addresses.ban_client import BanClient
+from modules.check_real_addresses.batch import geocode_batch
+
+
+@pytest.fixture(scope="module")
+def client():
+    server = ban_fake.serve()
+    yield BanClient(base_url=f"http://127.0.0.1:{server.server_address[1]}", rate=1000, burst=100)
+    server.shutdown()
+
+
+def test_batch_through_csv_endpoint(client):
+    queries = [
+        "12 rue de la Paix 75002 Paris",
+        "rue sans numero",
+        "12 rue de la Paix 75002 Paris",
+        "Mairie 69001 Lyon",
+        "3 bis avenue Foch 74000 Annecy",
+    ]
+    batches = ban_fake.Handler.batches
+
+    results = geocode_batch(queries, client=client, chunk_rows=2)
+
+    # 4 distinct queries in chunks of 2
+    assert ban_fake.Handler.batches - batches == 2
+    assert set(results) == set(queries)
+
+    assert results["12 rue de la Paix 75002 Paris"] == {
+        "valid": True,
+        "score": 0.92,
+        "label": "12 rue de la Paix 75002 Paris",
+    }
+    assert results["3 bis avenue Foch 74000 Annecy"]["valid"]
+    assert results["rue sans numero"] is None
+    assert results["Mairie 69001 Lyon"]["valid"] is False
+    assert results["Mairie 69001 Lyon"]["score"] == 0.45
+
+
+def test_failed_post_leaves_chunk_out(client):
+    broken = BanClient(base_url=client.base_url + "/missing", rate=1000, burst=100, max_retries=0)
+
+    assert geocode_batch(["12 rue de la Paix 75002 Paris"], client=broken) == {}
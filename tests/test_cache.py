@@ -0,0 +1,75 @@
+import pytest
+
+from modules.check_real_addresses import cache
+from modules.check_real_addresses.cache import LookupCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache, "time", clock)
+    return clock
+
+
+def test_hits_and_no_match(tmp_path, clock):
+    lookups = LookupCache(tmp_path / "cache.sqlite3")
+    lookups.put("12 rue x", {"score": 0.9})
+    lookups.put("nowhere", None)
+
+    assert lookups.get("12 rue x") == (True, {"score": 0.9})
+    # a stored "no match" is a hit too
+    assert lookups.get("nowhere") == (True, None)
+    assert lookups.get("unknown") == (False, None)
+    assert lookups.stats()["hit_rate"] == round(2 / 3, 3)
+
+
+def test_ttl_expiry(tmp_path, clock):
+    lookups = LookupCache(tmp_path / "cache.sqlite3", ttl=100)
+    lookups.put("12 rue x", {"score": 0.9})
+
+    clock.now += 99
+    assert lookups.get("12 rue x")[0]
+
+    clock.now += 2
+    assert lookups.get("12 rue x") == (False, None)
+
+    # stored again: fresh
+    lookups.put("12 rue x", {"score": 0.8})
+    assert lookups.get("12 rue x") == (True, {"score": 0.8})
+
+
+def test_prune_expired_and_oldest(tmp_path, clock):
+    lookups = LookupCache(tmp_path / "cache.sqlite3", ttl=100, max_entries=3)
+    for i in range(6):
+        lookups.put(f"q{i}", {"i": i})
+        clock.now += 30
+
+    # q0..q2 expired, then the oldest beyond max_entries
+    lookups.put("q6", {"i": 6})
+    lookups.prune()
+
+    stats = lookups.stats()
+    assert stats["entries"] == 3
+    assert stats["evictions"] == 4
+    assert [q for q in ("q3", "q4", "q5", "q6") if lookups.get(q)[0]] == ["q4", "q5", "q6"]
+
+
+def test_prune_every_writes(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(cache, "PRUNE_EVERY", 5)
+    lookups = LookupCache(tmp_path / "cache.sqlite3", max_entries=2)
+
+    for i in range(4):
+        lookups.put(f"q{i}", None)
+        clock.now += 1
+    assert lookups.stats()["entries"] == 4
+
+    lookups.put("q4", None)
+    assert lookups.stats()["entries"] == 2
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from modules.check_real_addresses.module import build_address_candidates, classify_column, explain_results
+from modules.check_real_addresses.text import canonical_series, canonical_text, normalize, normalize_series
+
+
+def test_integer_columns_with_blanks():
+    # read from Excel as float64 because of the blanks
+    df = pd.DataFrame({
+        "num": [5, 12, np.nan, 3],
+        "rue": ["rue X", "rue Royale", "avenue Foch", "rue Y"],
+        "cp": [1000, 74000, 75002, np.nan],
+        "ville": ["Bourg", "Annecy", "Paris", "Lyon"],
+    })
+
+    types = {col: classify_column(df[col]) for col in df}
+    assert types == {"num": "number", "rue": "street", "cp": "postcode", "ville": "city"}
+
+    candidates = build_address_candidates(df, types)
+    assert candidates[0, 0] == "5 rue X 01000 Bourg"
+    assert "1000" not in candidates[0]
+
+
+def test_series_match_scalar_forms():
+    values = [" Élodie  AV. de l'Œuf ", "12 bd Saint-Ŝ", None, "ave_x rue", "", "x́y"]
+    series = pd.Series(values, dtype=object)
+
+    assert normalize_series(series).tolist() == [None if v is None else normalize(v) for v in values]
+    assert canonical_series(series).tolist() == [None if v is None else canonical_text(v) for v in values]
+    assert canonical_series(series)[0] == "elodie avenue de l œuf"
+
+
+def test_invalid_reasons():
+    score = np.array([0.0, 0.0, 0.4, 0.7, 0.9])
+    error = np.array(["timeout", None, None, None, None], dtype=object)
+
+    assert explain_results(score, error).tolist() == [
+        "Address service unavailable",
+        "No match found",
+        "Address not recognized",
+        "Low confidence match",
+        "Missing delivery details",
+    ]
@@ -0,0 +1,147 @@
+import threading
+import time
+
+import pytest
+
+from modules.check_real_addresses import engine
+from modules.check_real_addresses.engine import MAX_PAUSE, AimdController, ordered_map
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(engine, "time", clock)
+    return clock
+
+
+def test_additive_increase(clock):
+    controller = AimdController(initial=4, maximum=6)
+
+    # about one slot per window of successes
+    for _ in range(4):
+        controller.on_success(0.05)
+    assert controller.limit == 4
+    controller.on_success(0.05)
+    assert controller.limit == 5
+
+    for _ in range(50):
+        controller.on_success(0.05)
+    assert controller.limit == 6
+
+
+def test_multiplicative_decrease(clock):
+    controller = AimdController(initial=16, minimum=2)
+    controller.on_success(1.0)
+
+    controller.on_congestion()
+    assert controller.limit == 8
+
+    # the same round trip: one congestion signal
+    controller.on_congestion()
+    assert controller.limit == 8
+
+    for expected in (4, 2, 2):
+        clock.now += 1.5
+        controller.on_congestion()
+        assert controller.limit == expected
+
+    # the floor still counts as a cut
+    assert controller.snapshot()["decreases"] == 4
+
+
+def test_latency_decrease(clock):
+    controller = AimdController(initial=10)
+    for _ in range(5):
+        controller.on_success(0.05)
+    window = controller._window
+
+    for _ in range(10):
+        clock.now += 1.0
+        controller.on_success(1.0)
+    assert controller._window < window
+
+
+def test_retry_after_pause(clock):
+    controller = AimdController()
+
+    controller.on_congestion(retry_after=2)
+    assert controller.snapshot()["paused"]
+    controller.wait()
+    assert clock.slept == [2]
+    assert not controller.snapshot()["paused"]
+
+    # nothing left to wait for
+    controller.wait()
+    assert clock.slept == [2]
+
+    controller.on_congestion(retry_after=3600)
+    controller.wait()
+    assert clock.slept[-1] == MAX_PAUSE
+
+
+def test_ordered_results():
+    def slow_square(n):
+        time.sleep(0.001 * (10 - n))
+        return n * n
+
+    assert list(ordered_map(slow_square, range(10), max_in_flight=4)) == [(n, n * n) for n in range(10)]
+
+
+@pytest.mark.parametrize("limit", [4, AimdController(initial=4)])
+def test_error_keeps_order(limit):
+    def lookup(n):
+        if n == 5:
+            raise ValueError("boom")
+        time.sleep(0.001 * (10 - n))
+        return n
+
+    seen = []
+    with pytest.raises(ValueError, match="boom"):
+        for item, result in ordered_map(lookup, range(20), max_in_flight=limit):
+            seen.append(result)
+    assert seen == [0, 1, 2, 3, 4]
+
+    if isinstance(limit, AimdController):
+        # running calls give their slot back as they end, queued ones at once
+        deadline = time.monotonic() + 2
+        while limit.snapshot()["in_flight"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert limit.snapshot()["in_flight"] == 0
+
+
+def test_shared_window():
+    controller = AimdController(initial=3, maximum=3)
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def lookup(n):
+        with lock:
+            running.append(n)
+            peak.append(len(running))
+        time.sleep(0.005)
+        with lock:
+            running.remove(n)
+        return n
+
+    jobs = [threading.Thread(target=lambda: list(ordered_map(lookup, range(20), max_in_flight=controller))) for _ in range(3)]
+    for job in jobs:
+        job.start()
+    for job in jobs:
+        job.join()
+
+    assert max(peak) <= 3
+    assert controller.snapshot()["in_flight"] == 0
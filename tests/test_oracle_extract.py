@@ -0,0 +1,89 @@
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pytest
+
+from app import oracle_fake, oracle_pool
+from app.oracle_pool import PoolManager
+from modules.oracle_extract import module
+from modules.oracle_extract.arrow_types import arrow_type, describe, resolve_schema, to_record_batch
+
+
+@pytest.fixture
+def pools(tmp_path, monkeypatch):
+    path = tmp_path / "fake.db"
+    oracle_fake.seed(str(path), 50)
+    monkeypatch.setattr(oracle_fake, "FAKE_DB", str(path))
+    monkeypatch.setattr(oracle_fake, "LOGON_DELAY", 0)
+
+    manager = PoolManager(driver=oracle_fake)
+    monkeypatch.setattr(oracle_pool, "pools", manager)
+    monkeypatch.setattr(module, "pools", manager)
+    yield manager
+    manager.close()
+
+
+def test_number_types():
+    number = oracle_fake.DB_TYPE_NUMBER
+    assert arrow_type(oracle_fake, number, 0, -127) == pa.float64()
+    assert arrow_type(oracle_fake, number, 12, 0) == pa.int64()
+    assert arrow_type(oracle_fake, number, 38, 0) == pa.decimal128(38, 0)
+    assert arrow_type(oracle_fake, number, 12, 2) == pa.decimal128(12, 2)
+    assert arrow_type(oracle_fake, number, 5, -3) == pa.int64()
+
+
+def test_other_types():
+    assert arrow_type(oracle_fake, oracle_fake.DB_TYPE_DATE, 0, 0) == pa.timestamp("s")
+    assert arrow_type(oracle_fake, oracle_fake.DB_TYPE_TIMESTAMP, 0, 0) == pa.timestamp("us")
+    assert arrow_type(oracle_fake, oracle_fake.DB_TYPE_CLOB, 0, 0) == pa.large_string()
+    assert arrow_type(oracle_fake, oracle_fake.DB_TYPE_BLOB, 0, 0) == pa.large_binary()
+    assert arrow_type(oracle_fake, oracle_fake.DB_TYPE_VARCHAR, 0, 0) == pa.string()
+    assert arrow_type(oracle_fake, None, 0, 0) is None
+
+
+def test_sample_table_schema(pools):
+    with pools.connection("TEST", "scott", "tiger") as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM sample_orders")
+        columns = describe(oracle_fake, cur.description)
+        rows = cur.fetchall()
+
+    schema = resolve_schema(columns, rows)
+    assert schema.field("order_id").type == pa.int64()
+    assert schema.field("amount").type == pa.decimal128(12, 2)
+    assert schema.field("score").type == pa.float64()
+    assert schema.field("ordered_on").type == pa.timestamp("s")
+
+    batch = to_record_batch(rows, schema)
+    assert batch.num_rows == 50
+    assert batch.column("score").null_count == 17
+
+
+def test_zero_rows_keep_schema(pools, tmp_path):
+    target = tmp_path / "empty"
+    result = module.run({"sql": "SELECT * FROM sample_orders WHERE 1 = 0", "output_dir": str(target)})
+
+    assert result["rows"] == 0
+    assert result["file_list"] == [{"path": "part-0.parquet", "rows": 0}]
+    dataset = ds.dataset(target)
+    assert dataset.count_rows() == 0
+    assert dataset.schema.names[:3] == ["order_id", "customer", "amount"]
+
+
+def test_overwrite_only_own_folder(pools, tmp_path):
+    target = tmp_path / "orders"
+    module.run({"table": "sample_orders", "output_dir": str(target)})
+    assert (target / module.MARKER).is_file()
+
+    with pytest.raises(ValueError, match="not empty"):
+        module.run({"table": "sample_orders", "output_dir": str(target)})
+
+    result = module.run({"sql": "SELECT * FROM sample_orders WHERE order_id < 10", "output_dir": str(target), "overwrite": True})
+    assert result["rows"] == 10
+    assert ds.dataset(target).count_rows() == 10
+
+    other = tmp_path / "other"
+    other.mkdir()
+    (other / "keep.txt").write_text("x")
+    with pytest.raises(ValueError, match="only a previous extract"):
+        module.run({"table": "sample_orders", "output_dir": str(other), "overwrite": True})
+    assert [p.name for p in other.iterdir()] == ["keep.txt"]
@@ -0,0 +1,72 @@
+import pytest
+
+from app import oracle_fake
+from app.oracle_pool import PoolManager
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    monkeypatch.setenv("ORACLE_DRIVER", "fake")
+    monkeypatch.setattr(oracle_fake, "LOGON_DELAY", 0)
+    manager = PoolManager()
+    yield manager
+    manager.close()
+
+
+def test_pool_reused(pools):
+    before = oracle_fake.logons
+    for _ in range(3):
+        with pools.connection("TEST", "scott", "tiger") as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT dummy FROM dual")
+            assert cur.fetchall() == [("X",)]
+
+    assert oracle_fake.logons - before == 1
+    stats = pools.stats()["SCOTT@TEST"]
+    assert stats["acquired"] == 3
+    assert stats["opened"] == 1
+    assert stats["busy"] == 0
+
+
+def test_password_change_replaces_pool(pools, monkeypatch):
+    monkeypatch.setenv("ORACLE_FAKE_PASSWORD", "tiger")
+    with pools.connection("TEST", "scott", "tiger"):
+        pass
+    old = pools.pool("TEST", "scott", "tiger")
+
+    monkeypatch.setenv("ORACLE_FAKE_PASSWORD", "lion")
+    with pools.connection("TEST", "scott", "tiger") as held:
+        # the old pool still lends its busy session until it is released
+        with pools.connection("TEST", "scott", "lion"):
+            assert pools.pool("TEST", "scott", "lion") is not old
+        assert pools._retired == [old]
+        assert held.cursor()
+
+    assert pools._retired == []
+    assert old.opened == 0
+    assert pools.stats()["SCOTT@TEST"]["replaced"] == 1
+
+
+def test_wrong_password_keeps_pool(pools, monkeypatch):
+    monkeypatch.setenv("ORACLE_FAKE_PASSWORD", "tiger")
+    working = pools.pool("TEST", "scott", "tiger")
+
+    with pytest.raises(oracle_fake.DatabaseError, match="ORA-01017"):
+        with pools.connection("TEST", "scott", "wrong"):
+            pass
+
+    assert pools.pool("TEST", "scott", "tiger") is working
+    assert pools.stats()["SCOTT@TEST"]["replaced"] == 0
+    assert pools._retired == []
+
+
+def test_health_drops_broken_session(pools):
+    with pools.connection("TEST", "scott", "tiger") as conn:
+        conn.broken = True
+
+    report = pools.health()["SCOTT@TEST"]
+    assert not report["healthy"]
+    assert "ORA-03113" in report["error"]
+    assert pools.stats()["SCOTT@TEST"]["dropped"] == 1
+
+    assert pools.health()["SCOTT@TEST"]["healthy"]
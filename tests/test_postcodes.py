@@ -0,0 +1,101 @@
+import pytest
+
+from modules.check_real_addresses import offline
+from modules.check_real_addresses.postcodes import PostcodeReference, commune_key, load_laposte, load_offline_index
+from modules.check_real_addresses.text import STREET_KEYWORDS_RE
+
+LAPOSTE_CSV = """#Code_commune_INSEE;Nom_de_la_commune;Code_postal;Libellé_d_acheminement;Ligne_5
+92012;BOULOGNE BILLANCOURT;92100;BOULOGNE BILLANCOURT;
+75116;PARIS 16;75016;PARIS;
+75116;PARIS 16;75116;PARIS;
+93066;ST DENIS;93200;ST DENIS;
+74010;ANNECY;74000;ANNECY;
+74010;ANNECY;74370;ANNECY;PRINGY
+1053;BOURG EN BRESSE;1000;BOURG EN BRESSE;
+"""
+
+BAN_EXPORT = """id;numero;rep;nom_voie;code_postal;nom_commune
+74010_0001_00012;12;;Rue Royale;74000;Annecy
+74010_0002_00003;3;bis;Avenue de Chevêne;74000;Annecy
+74060_0001_00001;1;;Route de Chavanod;74650;Chavanod
+"""
+
+
+@pytest.fixture
+def reference(tmp_path):
+    path = tmp_path / "laposte_hexasmal.csv"
+    path.write_text(LAPOSTE_CSV, encoding="utf-8")
+    return PostcodeReference(load_laposte(path), str(path))
+
+
+def test_commune_key():
+    assert commune_key("ST-DENIS CEDEX 2") == "saint denis"
+    assert commune_key("Saint Denis, France") == "saint denis"
+    assert commune_key("Boulogne-Billancourt") == "boulogne billancourt"
+
+
+def test_laposte_table(reference):
+    assert reference.known("92100")
+    assert reference.known("01000")
+    assert reference.unknown("92999")
+
+    assert reference.matches("93200", "St-Denis")
+    assert reference.matches("75016", "Paris 16e")
+    assert reference.matches("74370", "Pringy")
+    assert not reference.matches("74000", "Lyon")
+
+
+def test_lenient_city(reference):
+    assert reference.matches("92100", "Boulogne")
+    assert reference.matches("92100", "Boulogne-Billancourt France")
+    assert reference.matches("74000", "ANNECY, FRANCE")
+
+    # a generic first word is not enough
+    assert not reference.matches("93200", "Saint")
+    assert not reference.matches("92100", "Billancourt")
+
+
+def test_offline_index_covers_imported_departements(tmp_path):
+    export = tmp_path / "adresses-74.csv"
+    export.write_text(BAN_EXPORT, encoding="utf-8")
+    path = tmp_path / "ban offline.sqlite3"
+    offline.import_departement("74", str(export), path)
+
+    reference = load_offline_index(path)
+
+    assert reference.matches("74000", "Annecy")
+    assert reference.unknown("74999")
+    # not imported: no opinion on other départements
+    assert not reference.unknown("75016")
+
+
+def test_street_keywords_are_whole_words():
+    assert STREET_KEYWORDS_RE.search("12 av de la gare")
+    assert STREET_KEYWORDS_RE.search("route de chavanod")
+    assert not STREET_KEYWORDS_RE.search("chavanod")
+    assert not STREET_KEYWORDS_RE.search("bourg en bresse")
+
+
+def test_reference_import_and_status(tmp_path, monkeypatch):
+    from modules.check_real_addresses import postcodes
+
+    installed = tmp_path / "data" / "laposte_hexasmal.csv"
+    monkeypatch.setattr(postcodes, "REFERENCE_PATH", installed)
+    monkeypatch.setattr(postcodes, "OFFLINE_INDEX_PATH", tmp_path / "missing.sqlite3")
+    monkeypatch.setattr(postcodes, "_REFERENCE", None)
+    monkeypatch.setattr(postcodes, "_REFERENCE_LOADED", False)
+
+    assert postcodes.reference_status()["missing"]
+    assert postcodes.get_reference() is None
+
+    source = tmp_path / "download.csv"
+    source.write_text(LAPOSTE_CSV, encoding="utf-8")
+    postcodes.import_reference(source)
+
+    assert postcodes.reference_status() == {"source": str(installed), "coverage": "national"}
+    assert postcodes.get_reference().known("92100")
+
+    bad = tmp_path / "bad.csv"
+    bad.write_text("a;b\n1;2\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        postcodes.import_reference(bad, tmp_path / "other.csv")
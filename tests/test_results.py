@@ -0,0 +1,54 @@
+import pandas as pd
+import pyarrow as pa
+
+from modules.check_real_addresses import results
+from modules.check_real_addresses.query import query_results
+from modules.check_real_addresses.results import ResultWriter, open_results
+
+
+def chunk(rows, address):
+    source = pd.DataFrame({"num": [1.0, None][:rows], "rue": ["rue x", 12][:rows]})
+    validated = pd.DataFrame({
+        "valid": [address is not None] * rows,
+        "score": [0.9] * rows,
+        "address": [address] * rows,
+        "reason": [None] * rows,
+    })
+    return source, validated
+
+
+def test_schema_does_not_depend_on_first_batch(tmp_path, monkeypatch):
+    monkeypatch.setattr(results, "RESULTS_DIR", tmp_path)
+    writer = ResultWriter("0" * 32, ["num", "rue"], flush_rows=2)
+
+    # no address at all in the first flushed batch
+    writer.write(*chunk(2, None))
+    writer.write(*chunk(2, "1 rue x 75001 Paris"))
+    summary = writer.close()
+
+    table = open_results("0" * 32)
+    assert summary["checked"] == 4
+    assert table.schema.field("address").type == pa.string()
+    assert table.schema.field("num").type == pa.string()
+    assert table["num"].to_pylist() == ["1", None, "1", None]
+    assert table["rue"].to_pylist() == ["rue x", "12", "rue x", "12"]
+    assert table["address"].to_pylist() == [None, None, "1 rue x 75001 Paris", "1 rue x 75001 Paris"]
+
+
+def test_zero_row_job_keeps_columns(tmp_path, monkeypatch):
+    monkeypatch.setattr(results, "RESULTS_DIR", tmp_path)
+    job_id = "1" * 32
+    writer = ResultWriter(job_id, ["num", "rue"])
+    summary = writer.close()
+
+    assert summary["checked"] == 0
+    table = open_results(job_id)
+    assert table.num_rows == 0
+    assert table.column_names == ["num", "rue"] + results.RESULT_COLUMNS
+
+    page = query_results(job_id, {"valid": "false", "sort": "score", "descending": True})
+    assert page["total"] == 0
+    assert page["rows"] == []
+
+    page = query_results(job_id, {"contains": {"rue": "x"}})
+    assert page["total"] == 0